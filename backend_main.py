@@ -16,16 +16,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import the AI Hedge Fund modules
 from src.utils.analysts import ANALYST_ORDER
 from src.llm.models import LLM_ORDER, get_model_info
+from src.llm.retry import get_retry_stats
 from src.tools.api import (
-    get_prices, 
-    get_financial_metrics, 
-    search_line_items,
-    get_insider_trades,
-    get_company_news,
-    get_market_cap,
-    prices_to_df
+    aget_price_series,
+    aget_financial_metrics,
+    aget_insider_trades,
+    aget_company_news,
+    aget_market_cap,
 )
+from src.tools.http_client import get_http_client
+from src.data.cache import get_cache
 from src.tools.akshare_api import is_ashare_ticker
+from src.tools.akshare_client import get_akshare_client
 from src.main import run_hedge_fund, validate_ticker
 from src.backtester import Backtester
 
@@ -56,6 +58,11 @@ app.add_middleware(
 # Background tasks dict to store long-running tasks
 background_tasks = {}
 
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled data API connections on shutdown"""
+    await get_http_client().aclose()
+
 # ---- Pydantic Models ----
 
 class TickerType(str, Enum):
@@ -275,6 +282,21 @@ async def root():
     """API status check endpoint"""
     return {"status": "online", "message": "AI Hedge Fund API is running"}
 
+@app.get("/api/cache/stats", tags=["Status"])
+async def get_cache_stats():
+    """In-memory data cache size, hit rate and evictions"""
+    return get_cache().stats()
+
+@app.get("/api/akshare/stats", tags=["Status"])
+async def get_akshare_stats():
+    """Per-endpoint akshare calls, retries and failures"""
+    return get_akshare_client().stats()
+
+@app.get("/api/llm/stats", tags=["Status"])
+async def get_llm_stats():
+    """LLM attempts, retries by error kind and default-response fallbacks, per agent and model"""
+    return get_retry_stats().stats()
+
 @app.get("/api/ticker-info/{ticker}", response_model=TickerInfo, tags=["Tickers"])
 async def get_ticker_info(ticker: str):
     """Get information about a ticker symbol"""
@@ -322,15 +344,13 @@ async def get_stock_data(
         start_date, end_date = get_default_dates()
     
     try:
-        # Get price data
-        prices = get_prices(ticker, start_date, end_date)
-        prices_df = prices_to_df(prices)
-        
-        # Get financial metrics
-        metrics = get_financial_metrics(ticker, end_date, limit=5)
-        
-        # Get market cap
-        market_cap = get_market_cap(ticker, end_date)
+        # Fetch price data, financial metrics and market cap concurrently
+        price_series, metrics, market_cap = await asyncio.gather(
+            aget_price_series(ticker, start_date, end_date),
+            aget_financial_metrics(ticker, end_date, limit=5),
+            aget_market_cap(ticker, end_date),
+        )
+        prices_df = price_series.to_frame()
         
         # Format data for response
         return StockData(
@@ -368,9 +388,8 @@ async def get_price_data(
         raise HTTPException(status_code=400, detail=f"开始日期不能超过当前日期: {start_date} > {current_date}")
     
     try:
-        prices = get_prices(ticker, start_date, end_date)
-        prices_df = prices_to_df(prices)
-        return prices_df.reset_index().to_dict(orient="records")
+        price_series = await aget_price_series(ticker, start_date, end_date)
+        return price_series.to_frame().reset_index().to_dict(orient="records")
     except Exception as e:
         logger.exception(f"Error getting price data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -391,7 +410,7 @@ async def get_financials(
         _, end_date = get_default_dates()
     
     try:
-        metrics = get_financial_metrics(ticker, end_date, limit=10)
+        metrics = await aget_financial_metrics(ticker, end_date, limit=10)
         return [m.model_dump() for m in metrics]
     except Exception as e:
         logger.exception(f"Error getting financial metrics: {e}")
@@ -415,7 +434,7 @@ async def get_news(
         start_date, end_date = get_default_dates()
     
     try:
-        news = get_company_news(ticker, end_date, start_date, limit)
+        news = await aget_company_news(ticker, end_date, start_date, limit)
         return [n.model_dump() for n in news]
     except Exception as e:
         logger.exception(f"Error getting news: {e}")
@@ -439,8 +458,9 @@ async def get_insider_activity(
         start_date, end_date = get_default_dates()
     
     try:
-        trades = get_insider_trades(ticker, end_date, start_date, limit)
-        return [t.model_dump() for t in trades]
+        trades = await aget_insider_trades(ticker, end_date, start_date, limit)
+        # Compact trade records become pydantic models only here, at the API boundary
+        return [t.to_model().model_dump() for t in trades]
     except Exception as e:
         logger.exception(f"Error getting insider trades: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,16 +1,41 @@
 from langchain_openai import ChatOpenAI
 from src.graph.state import AgentState, show_agent_reasoning
-from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
+from src.tools.api import get_financial_metrics, get_market_cap, search_line_items_many
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.llm import call_llm_packed
 import math
 
 
+# Financial line items this agent analyzes (also prefetched by the backtester)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "earnings_per_share",
+        "revenue",
+        "net_income",
+        "book_value_per_share",
+        "total_assets",
+        "total_liabilities",
+        "current_assets",
+        "current_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+    ],
+    "period": "annual",
+    "limit": 10,
+}
+
+# Financial metrics this agent analyzes (also prefetched by the backtester)
+FINANCIAL_METRICS_REQUEST = {
+    "period": "annual",
+    "limit": 10,
+}
+
+
 class BenGrahamSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
@@ -32,12 +57,15 @@ def ben_graham_agent(state: AgentState):
     analysis_data = {}
     graham_analysis = {}
 
+    # Fetch this agent's line items for every ticker in batched requests
+    line_items_by_ticker = search_line_items_many(tickers, end_date=end_date, **LINE_ITEM_REQUEST)
+
     for ticker in tickers:
         progress.update_status("ben_graham_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)
+        metrics = get_financial_metrics(ticker, end_date, **FINANCIAL_METRICS_REQUEST)
 
         progress.update_status("ben_graham_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(ticker, ["earnings_per_share", "revenue", "net_income", "book_value_per_share", "total_assets", "total_liabilities", "current_assets", "current_liabilities", "dividends_and_other_cash_distributions", "outstanding_shares"], end_date, period="annual", limit=10)
+        financial_line_items = line_items_by_ticker[ticker]
 
         progress.update_status("ben_graham_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
@@ -67,13 +95,14 @@ def ben_graham_agent(state: AgentState):
         analysis_data[ticker] = {"signal": signal, "score": total_score, "max_score": max_possible_score, "earnings_analysis": earnings_analysis, "strength_analysis": strength_analysis, "valuation_analysis": valuation_analysis}
 
         progress.update_status("ben_graham_agent", ticker, "Generating Ben Graham analysis")
-        graham_output = generate_graham_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
 
+    graham_outputs = generate_graham_outputs(
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+    for ticker, graham_output in graham_outputs.items():
         graham_analysis[ticker] = {"signal": graham_output.signal, "confidence": graham_output.confidence, "reasoning": graham_output.reasoning}
 
         progress.update_status("ben_graham_agent", ticker, "Done")
@@ -276,12 +305,12 @@ def analyze_valuation_graham(metrics: list, financial_line_items: list, market_c
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_graham_output(
-    ticker: str,
+def generate_graham_outputs(
+    tickers: list[str],
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> BenGrahamSignal:
+) -> dict[str, BenGrahamSignal]:
     """
     Generates an investment decision in the style of Benjamin Graham:
     - Value emphasis, margin of safety, net-nets, conservative balance sheet, stable earnings.
@@ -318,16 +347,20 @@ def generate_graham_output(
         )
     ])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+    # One prompt per ticker, holding only that ticker's analysis
+    prompts = {
+        ticker: template.invoke({
+            "analysis_data": json.dumps(analysis_data[ticker], indent=2),
+            "ticker": ticker
+        })
+        for ticker in tickers
+    }
 
     def create_default_ben_graham_signal():
         return BenGrahamSignal(signal="neutral", confidence=0.0, reasoning="Error in generating analysis; defaulting to neutral.")
 
-    return call_llm(
-        prompt=prompt,
+    return call_llm_packed(
+        prompts=prompts,
         model_name=model_name,
         model_provider=model_provider,
         pydantic_model=BenGrahamSignal,
@@ -1,13 +1,37 @@
 from langchain_openai import ChatOpenAI
 from src.graph.state import AgentState, show_agent_reasoning
-from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
+from src.tools.api import get_financial_metrics, get_market_cap, search_line_items_many
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.llm import call_llm_packed
+
+
+# Financial line items this agent analyzes (also prefetched by the backtester)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "revenue",
+        "operating_margin",
+        "debt_to_equity",
+        "free_cash_flow",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
+# Financial metrics this agent analyzes (also prefetched by the backtester)
+FINANCIAL_METRICS_REQUEST = {
+    "period": "annual",
+    "limit": 5,
+}
+
 
 class BillAckmanSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -27,29 +51,17 @@ def bill_ackman_agent(state: AgentState):
     analysis_data = {}
     ackman_analysis = {}
     
+    # Fetch this agent's line items for every ticker in batched requests
+    line_items_by_ticker = search_line_items_many(tickers, end_date=end_date, **LINE_ITEM_REQUEST)
+
     for ticker in tickers:
         progress.update_status("bill_ackman_agent", ticker, "Fetching financial metrics")
         # You can adjust these parameters (period="annual"/"ttm", limit=5/10, etc.)
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+        metrics = get_financial_metrics(ticker, end_date, **FINANCIAL_METRICS_REQUEST)
         
         progress.update_status("bill_ackman_agent", ticker, "Gathering financial line items")
         # Request multiple periods of data (annual or TTM) for a more robust long-term view.
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "operating_margin",
-                "debt_to_equity",
-                "free_cash_flow",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "outstanding_shares"
-            ],
-            end_date,
-            period="annual",  # or "ttm" if you prefer trailing 12 months
-            limit=5           # fetch up to 5 annual periods (or more if needed)
-        )
+        financial_line_items = line_items_by_ticker[ticker]
         
         progress.update_status("bill_ackman_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
@@ -85,13 +97,14 @@ def bill_ackman_agent(state: AgentState):
         }
         
         progress.update_status("bill_ackman_agent", ticker, "Generating Bill Ackman analysis")
-        ackman_output = generate_ackman_output(
-            ticker=ticker, 
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
-        
+
+    ackman_outputs = generate_ackman_outputs(
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+    for ticker, ackman_output in ackman_outputs.items():
         ackman_analysis[ticker] = {
             "signal": ackman_output.signal,
             "confidence": ackman_output.confidence,
@@ -336,12 +349,12 @@ def analyze_valuation(financial_line_items: list, market_cap: float) -> dict:
     }
 
 
-def generate_ackman_output(
-    ticker: str,
+def generate_ackman_outputs(
+    tickers: list[str],
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> BillAckmanSignal:
+) -> dict[str, BillAckmanSignal]:
     """
     Generates investment decisions in the style of Bill Ackman.
     """
@@ -382,10 +395,14 @@ def generate_ackman_output(
         )
     ])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+    # One prompt per ticker, holding only that ticker's analysis
+    prompts = {
+        ticker: template.invoke({
+            "analysis_data": json.dumps(analysis_data[ticker], indent=2),
+            "ticker": ticker
+        })
+        for ticker in tickers
+    }
 
     def create_default_bill_ackman_signal():
         return BillAckmanSignal(
@@ -394,8 +411,8 @@ def generate_ackman_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
-        prompt=prompt, 
+    return call_llm_packed(
+        prompts=prompts, 
         model_name=model_name, 
         model_provider=model_provider, 
         pydantic_model=BillAckmanSignal, 
@@ -1,13 +1,41 @@
 from langchain_openai import ChatOpenAI
 from src.graph.state import AgentState, show_agent_reasoning
-from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
+from src.tools.api import get_financial_metrics, get_market_cap, search_line_items_many
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.llm import call_llm_packed
+
+
+# Financial line items this agent analyzes (also prefetched by the backtester)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "revenue",
+        "gross_margin",
+        "operating_margin",
+        "debt_to_equity",
+        "free_cash_flow",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+        "research_and_development",
+        "capital_expenditure",
+        "operating_expense",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
+# Financial metrics this agent analyzes (also prefetched by the backtester)
+FINANCIAL_METRICS_REQUEST = {
+    "period": "annual",
+    "limit": 5,
+}
+
 
 class CathieWoodSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -30,34 +58,17 @@ def cathie_wood_agent(state: AgentState):
     analysis_data = {}
     cw_analysis = {}
 
+    # Fetch this agent's line items for every ticker in batched requests
+    line_items_by_ticker = search_line_items_many(tickers, end_date=end_date, **LINE_ITEM_REQUEST)
+
     for ticker in tickers:
         progress.update_status("cathie_wood_agent", ticker, "Fetching financial metrics")
         # You can adjust these parameters (period="annual"/"ttm", limit=5/10, etc.)
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+        metrics = get_financial_metrics(ticker, end_date, **FINANCIAL_METRICS_REQUEST)
 
         progress.update_status("cathie_wood_agent", ticker, "Gathering financial line items")
         # Request multiple periods of data (annual or TTM) for a more robust view.
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "gross_margin",
-                "operating_margin",
-                "debt_to_equity",
-                "free_cash_flow",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "outstanding_shares",
-                "research_and_development",
-                "capital_expenditure",
-                "operating_expense",
-
-            ],
-            end_date,
-            period="annual",
-            limit=5
-        )
+        financial_line_items = line_items_by_ticker[ticker]
 
         progress.update_status("cathie_wood_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
@@ -92,13 +103,14 @@ def cathie_wood_agent(state: AgentState):
         }
 
         progress.update_status("cathie_wood_agent", ticker, "Generating Cathie Wood analysis")
-        cw_output = generate_cathie_wood_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
 
+    cw_outputs = generate_cathie_wood_outputs(
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+    for ticker, cw_output in cw_outputs.items():
         cw_analysis[ticker] = {
             "signal": cw_output.signal,
             "confidence": cw_output.confidence,
@@ -420,12 +432,12 @@ def analyze_cathie_wood_valuation(financial_line_items: list, market_cap: float)
     }
 
 
-def generate_cathie_wood_output(
-    ticker: str,
+def generate_cathie_wood_outputs(
+    tickers: list[str],
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> CathieWoodSignal:
+) -> dict[str, CathieWoodSignal]:
     """
     Generates investment decisions in the style of Cathie Wood.
     """
@@ -456,10 +468,14 @@ def generate_cathie_wood_output(
         )
     ])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+    # One prompt per ticker, holding only that ticker's analysis
+    prompts = {
+        ticker: template.invoke({
+            "analysis_data": json.dumps(analysis_data[ticker], indent=2),
+            "ticker": ticker
+        })
+        for ticker in tickers
+    }
 
     def create_default_cathie_wood_signal():
         return CathieWoodSignal(
@@ -468,8 +484,8 @@ def generate_cathie_wood_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
-        prompt=prompt,
+    return call_llm_packed(
+        prompts=prompts,
         model_name=model_name,
         model_provider=model_provider,
         pydantic_model=CathieWoodSignal,
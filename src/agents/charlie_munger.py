@@ -1,12 +1,42 @@
 from src.graph.state import AgentState, show_agent_reasoning
-from src.tools.api import get_financial_metrics, get_market_cap, search_line_items, get_insider_trades, get_company_news
+from src.tools.api import get_financial_metrics, get_market_cap, get_insider_trades, get_company_news, search_line_items_many
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.llm import call_llm_packed
+
+
+# Financial line items this agent analyzes (also prefetched by the backtester)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "revenue",
+        "net_income",
+        "operating_income",
+        "return_on_invested_capital",
+        "gross_margin",
+        "operating_margin",
+        "free_cash_flow",
+        "capital_expenditure",
+        "cash_and_equivalents",
+        "total_debt",
+        "shareholders_equity",
+        "outstanding_shares",
+        "research_and_development",
+        "goodwill_and_intangible_assets",
+    ],
+    "period": "annual",
+    "limit": 10,
+}
+
+# Financial metrics this agent analyzes (also prefetched by the backtester)
+FINANCIAL_METRICS_REQUEST = {
+    "period": "annual",
+    "limit": 10,
+}
+
 
 class CharlieMungerSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -26,33 +56,15 @@ def charlie_munger_agent(state: AgentState):
     analysis_data = {}
     munger_analysis = {}
     
+    # Fetch this agent's line items for every ticker in batched requests
+    line_items_by_ticker = search_line_items_many(tickers, end_date=end_date, **LINE_ITEM_REQUEST)
+
     for ticker in tickers:
         progress.update_status("charlie_munger_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)  # Munger looks at longer periods
+        metrics = get_financial_metrics(ticker, end_date, **FINANCIAL_METRICS_REQUEST)  # Munger looks at longer periods
         
         progress.update_status("charlie_munger_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "net_income",
-                "operating_income",
-                "return_on_invested_capital",
-                "gross_margin",
-                "operating_margin",
-                "free_cash_flow",
-                "capital_expenditure",
-                "cash_and_equivalents",
-                "total_debt",
-                "shareholders_equity",
-                "outstanding_shares",
-                "research_and_development",
-                "goodwill_and_intangible_assets",
-            ],
-            end_date,
-            period="annual",
-            limit=10  # Munger examines long-term trends
-        )
+        financial_line_items = line_items_by_ticker[ticker]
         
         progress.update_status("charlie_munger_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
@@ -121,13 +133,14 @@ def charlie_munger_agent(state: AgentState):
         }
         
         progress.update_status("charlie_munger_agent", ticker, "Generating Charlie Munger analysis")
-        munger_output = generate_munger_output(
-            ticker=ticker, 
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
-        
+
+    munger_outputs = generate_munger_outputs(
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+    for ticker, munger_output in munger_outputs.items():
         munger_analysis[ticker] = {
             "signal": munger_output.signal,
             "confidence": munger_output.confidence,
@@ -659,12 +672,12 @@ def analyze_news_sentiment(news_items: list) -> str:
     return f"Qualitative review of {len(news_items)} recent news items would be needed"
 
 
-def generate_munger_output(
-    ticker: str,
+def generate_munger_outputs(
+    tickers: list[str],
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> CharlieMungerSignal:
+) -> dict[str, CharlieMungerSignal]:
     """
     Generates investment decisions in the style of Charlie Munger.
     """
@@ -711,10 +724,14 @@ def generate_munger_output(
         )
     ])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+    # One prompt per ticker, holding only that ticker's analysis
+    prompts = {
+        ticker: template.invoke({
+            "analysis_data": json.dumps(analysis_data[ticker], indent=2),
+            "ticker": ticker
+        })
+        for ticker in tickers
+    }
 
     def create_default_charlie_munger_signal():
         return CharlieMungerSignal(
@@ -723,8 +740,8 @@ def generate_munger_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
-        prompt=prompt, 
+    return call_llm_packed(
+        prompts=prompts, 
         model_name=model_name, 
         model_provider=model_provider, 
         pydantic_model=CharlieMungerSignal, 
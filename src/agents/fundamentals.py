@@ -6,6 +6,13 @@ import json
 from src.tools.api import get_financial_metrics
 
 
+# Financial metrics this agent analyzes (also prefetched by the backtester)
+FINANCIAL_METRICS_REQUEST = {
+    "period": "ttm",
+    "limit": 10,
+}
+
+
 ##### Fundamental Agent #####
 def fundamentals_agent(state: AgentState):
     """Analyzes fundamental data and generates trading signals for multiple tickers."""
@@ -23,8 +30,7 @@ def fundamentals_agent(state: AgentState):
         financial_metrics = get_financial_metrics(
             ticker=ticker,
             end_date=end_date,
-            period="ttm",
-            limit=10,
+            **FINANCIAL_METRICS_REQUEST,
         )
 
         if not financial_metrics:
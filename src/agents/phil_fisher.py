@@ -2,7 +2,7 @@ from src.graph.state import AgentState, show_agent_reasoning
 from src.tools.api import (
     get_financial_metrics,
     get_market_cap,
-    search_line_items,
+    search_line_items_many,
     get_insider_trades,
     get_company_news,
 )
@@ -12,10 +12,38 @@ from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.llm import call_llm_packed
 import statistics
 
 
+# Financial line items this agent analyzes (also prefetched by the backtester)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "revenue",
+        "net_income",
+        "earnings_per_share",
+        "free_cash_flow",
+        "research_and_development",
+        "operating_income",
+        "operating_margin",
+        "gross_margin",
+        "total_debt",
+        "shareholders_equity",
+        "cash_and_equivalents",
+        "ebit",
+        "ebitda",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
+# Financial metrics this agent analyzes (also prefetched by the backtester)
+FINANCIAL_METRICS_REQUEST = {
+    "period": "annual",
+    "limit": 5,
+}
+
+
 class PhilFisherSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
@@ -42,9 +70,12 @@ def phil_fisher_agent(state: AgentState):
     analysis_data = {}
     fisher_analysis = {}
 
+    # Fetch this agent's line items for every ticker in batched requests
+    line_items_by_ticker = search_line_items_many(tickers, end_date=end_date, **LINE_ITEM_REQUEST)
+
     for ticker in tickers:
         progress.update_status("phil_fisher_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+        metrics = get_financial_metrics(ticker, end_date, **FINANCIAL_METRICS_REQUEST)
 
         progress.update_status("phil_fisher_agent", ticker, "Gathering financial line items")
         # Include relevant line items for Phil Fisher's approach:
@@ -52,27 +83,7 @@ def phil_fisher_agent(state: AgentState):
         #   - Margins & Stability: operating_income, operating_margin, gross_margin
         #   - Management Efficiency & Leverage: total_debt, shareholders_equity, free_cash_flow
         #   - Valuation: net_income, free_cash_flow (for P/E, P/FCF), ebit, ebitda
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "net_income",
-                "earnings_per_share",
-                "free_cash_flow",
-                "research_and_development",
-                "operating_income",
-                "operating_margin",
-                "gross_margin",
-                "total_debt",
-                "shareholders_equity",
-                "cash_and_equivalents",
-                "ebit",
-                "ebitda",
-            ],
-            end_date,
-            period="annual",
-            limit=5,
-        )
+        financial_line_items = line_items_by_ticker[ticker]
 
         progress.update_status("phil_fisher_agent", ticker, "Getting market cap")
         market_cap = get_market_cap(ticker, end_date)
@@ -140,13 +151,14 @@ def phil_fisher_agent(state: AgentState):
         }
 
         progress.update_status("phil_fisher_agent", ticker, "Generating Phil Fisher-style analysis")
-        fisher_output = generate_fisher_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
 
+    fisher_outputs = generate_fisher_outputs(
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+    for ticker, fisher_output in fisher_outputs.items():
         fisher_analysis[ticker] = {
             "signal": fisher_output.signal,
             "confidence": fisher_output.confidence,
@@ -525,12 +537,12 @@ def analyze_sentiment(news_items: list) -> dict:
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_fisher_output(
-    ticker: str,
+def generate_fisher_outputs(
+    tickers: list[str],
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> PhilFisherSignal:
+) -> dict[str, PhilFisherSignal]:
     """
     Generates a JSON signal in the style of Phil Fisher.
     """
@@ -570,7 +582,11 @@ def generate_fisher_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    # One prompt per ticker, holding only that ticker's analysis
+    prompts = {
+        ticker: template.invoke({"analysis_data": json.dumps(analysis_data[ticker], indent=2), "ticker": ticker})
+        for ticker in tickers
+    }
 
     def create_default_signal():
         return PhilFisherSignal(
@@ -579,8 +595,8 @@ def generate_fisher_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
-        prompt=prompt,
+    return call_llm_packed(
+        prompts=prompts,
         model_name=model_name,
         model_provider=model_provider,
         pydantic_model=PhilFisherSignal,
@@ -3,7 +3,27 @@ from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.progress import progress
 import json
 
-from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
+from src.tools.api import get_financial_metrics, get_market_cap, search_line_items_many
+
+
+# Financial line items this agent analyzes (also prefetched by the backtester)
+LINE_ITEM_REQUEST = {
+    "line_items": [
+        "free_cash_flow",
+        "net_income",
+        "depreciation_and_amortization",
+        "capital_expenditure",
+        "working_capital",
+    ],
+    "period": "ttm",
+    "limit": 2,
+}
+
+# Financial metrics this agent analyzes (also prefetched by the backtester)
+FINANCIAL_METRICS_REQUEST = {
+    "period": "ttm",
+    "limit": 10,
+}
 
 
 ##### Valuation Agent #####
@@ -16,6 +36,9 @@ def valuation_agent(state: AgentState):
     # Initialize valuation analysis for each ticker
     valuation_analysis = {}
 
+    # Fetch this agent's line items for every ticker in batched requests
+    line_items_by_ticker = search_line_items_many(tickers, end_date=end_date, **LINE_ITEM_REQUEST)
+
     for ticker in tickers:
         progress.update_status("valuation_agent", ticker, "Fetching financial data")
 
@@ -23,7 +46,7 @@ def valuation_agent(state: AgentState):
         financial_metrics = get_financial_metrics(
             ticker=ticker,
             end_date=end_date,
-            period="ttm",
+            **FINANCIAL_METRICS_REQUEST,
         )
 
         # Add safety check for financial metrics
@@ -35,19 +58,7 @@ def valuation_agent(state: AgentState):
 
         progress.update_status("valuation_agent", ticker, "Gathering line items")
         # Fetch the specific line_items that we need for valuation purposes
-        financial_line_items = search_line_items(
-            ticker=ticker,
-            line_items=[
-                "free_cash_flow",
-                "net_income",
-                "depreciation_and_amortization",
-                "capital_expenditure",
-                "working_capital",
-            ],
-            end_date=end_date,
-            period="ttm",
-            limit=2,
-        )
+        financial_line_items = line_items_by_ticker[ticker]
 
         # Add safety check for financial line items
         if len(financial_line_items) < 2:
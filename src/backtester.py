@@ -1,5 +1,7 @@
+import os
 import sys
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import questionary
@@ -7,11 +9,14 @@ import questionary
 import matplotlib.pyplot as plt
 import pandas as pd
 from colorama import Fore, Style, init
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
 import numpy as np
 import itertools
 
+from src.llm.cache import get_llm_cache
+from src.llm.retry import get_retry_stats
 from src.llm.models import LLM_ORDER, get_model_info
-from src.utils.analysts import ANALYST_ORDER
+from src.utils.analysts import ANALYST_ORDER, get_financial_metrics_requests, get_line_item_requests
 from src.main import run_hedge_fund
 from src.tools.api import (
     get_company_news,
@@ -19,7 +24,15 @@ from src.tools.api import (
     get_prices,
     get_financial_metrics,
     get_insider_trades,
+    get_market_cap,
+    search_line_items,
+    search_line_items_many,
 )
+from src.tools.akshare_api import is_ashare_ticker
+from src.data.cache import get_cache
+from src.tools.akshare_client import get_akshare_client
+from src.tools.http_client import get_http_client
+from src.utils.rate_limiter import RateLimiter
 from src.utils.display import print_backtest_results, format_backtest_row
 from typing_extensions import Callable
 
@@ -38,6 +51,8 @@ class Backtester:
         model_provider: str = "OpenAI",
         selected_analysts: list[str] = [],
         initial_margin_requirement: float = 0.0,
+        prefetch_workers: int = 8,
+        prefetch_rate_limits: dict[str, float] | None = None,
     ):
         """
         :param agent: The trading agent (Callable).
@@ -49,6 +64,8 @@ class Backtester:
         :param model_provider: Which LLM provider (OpenAI, etc).
         :param selected_analysts: List of analyst names or IDs to incorporate.
         :param initial_margin_requirement: The margin ratio (e.g. 0.5 = 50%).
+        :param prefetch_workers: Maximum number of concurrent pre-fetch requests.
+        :param prefetch_rate_limits: Requests per second per data source ("financialdatasets", "akshare"); <= 0 means unlimited.
         """
         self.agent = agent
         self.tickers = tickers
@@ -58,6 +75,16 @@ class Backtester:
         self.model_name = model_name
         self.model_provider = model_provider
         self.selected_analysts = selected_analysts
+        self.prefetch_workers = max(1, prefetch_workers)
+
+        # Per data source token buckets used while pre-fetching
+        rate_limits = {
+            "financialdatasets": float(os.environ.get("FD_PREFETCH_RATE_LIMIT", 10)),
+            # akshare endpoints are rate limited individually by the akshare client
+            "akshare": float(os.environ.get("AKSHARE_PREFETCH_RATE_LIMIT", 0)),
+            **(prefetch_rate_limits or {}),
+        }
+        self._rate_limiters = {source: RateLimiter(rate) for source, rate in rate_limits.items()}
 
         # Store the margin ratio (e.g. 0.5 means 50% margin required).
         self.margin_ratio = initial_margin_requirement
@@ -271,7 +298,7 @@ class Backtester:
         return total_value
 
     def prefetch_data(self):
-        """Pre-fetch all data needed for the backtest period."""
+        """Pre-fetch all data needed for the backtest period across a bounded worker pool."""
         print("\nPre-fetching data for the entire backtest period...")
 
         # Convert end_date string to datetime, fetch up to 1 year before
@@ -279,20 +306,86 @@ class Backtester:
         start_date_dt = end_date_dt - relativedelta(years=1)
         start_date_str = start_date_dt.strftime("%Y-%m-%d")
 
+        # Agents query line items as of each simulated day, so fetch enough extra
+        # periods to cover every report filed between start_date and end_date
+        backtest_days = (end_date_dt - datetime.strptime(self.start_date, "%Y-%m-%d")).days
+        extra_periods = {"annual": backtest_days // 365 + 1, "quarterly": backtest_days // 90 + 1, "ttm": backtest_days // 90 + 1}
+
+        # (ticker, description, fetch function, args, kwargs)
+        tasks = []
         for ticker in self.tickers:
             # Fetch price data for the entire period, plus 1 year
-            get_prices(ticker, start_date_str, self.end_date)
-
-            # Fetch financial metrics
-            get_financial_metrics(ticker, self.end_date, limit=10)
+            tasks.append((ticker, "prices", get_prices, (ticker, start_date_str, self.end_date), {}))
 
             # Fetch insider trades
-            get_insider_trades(ticker, self.end_date, start_date=self.start_date, limit=1000)
+            tasks.append((ticker, "insider trades", get_insider_trades, (ticker, self.end_date), {"start_date": self.start_date, "limit": 1000}))
 
             # Fetch company news
-            get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000)
+            tasks.append((ticker, "company news", get_company_news, (ticker, self.end_date), {"start_date": self.start_date, "limit": 1000}))
 
-        print("Data pre-fetch complete.")
+            # Fetch the market cap the selected analysts will ask for
+            tasks.append((ticker, "market cap", get_market_cap, (ticker, self.end_date), {}))
+
+        # Fetch financial metrics for every period the selected analysts ask for, deep enough for the earliest simulated day
+        metrics_limits = {}
+        for request in get_financial_metrics_requests(self.selected_analysts):
+            metrics_limits[request["period"]] = max(metrics_limits.get(request["period"], 0), request["limit"] + extra_periods.get(request["period"], 0))
+        for ticker in self.tickers:
+            for period, limit in metrics_limits.items():
+                tasks.append((ticker, f"financial metrics ({period})", get_financial_metrics, (ticker, self.end_date), {"period": period, "limit": limit}))
+
+        # Fetch the union of the selected analysts' line items per period, batching US tickers into shared requests
+        line_item_requests = {}
+        for request in get_line_item_requests(self.selected_analysts):
+            union = line_item_requests.setdefault(request["period"], {"line_items": {}, "limit": 0})
+            union["line_items"].update(dict.fromkeys(request["line_items"]))
+            union["limit"] = max(union["limit"], request["limit"] + extra_periods.get(request["period"], 0))
+        us_tickers = [ticker for ticker in self.tickers if not is_ashare_ticker(ticker)]
+        for period, union in line_item_requests.items():
+            kwargs = {"period": period, "limit": union["limit"]}
+            if us_tickers:
+                tasks.append((f"{len(us_tickers)} US tickers", f"line items ({period})", search_line_items_many, (us_tickers, list(union["line_items"]), self.end_date), kwargs))
+            for ticker in self.tickers:
+                if is_ashare_ticker(ticker):
+                    tasks.append((ticker, f"line items ({period})", search_line_items, (ticker, list(union["line_items"]), self.end_date), kwargs))
+
+        failures = []
+        empty = []
+        # One task may send many requests (line-item chunks, trade and news pages), so the HTTP client limits each request
+        http_client = get_http_client()
+        previous_limiter, http_client.rate_limiter = http_client.rate_limiter, self._rate_limiters["financialdatasets"]
+        try:
+            with Progress(TextColumn("{task.description}"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn(), transient=True) as progress_bar, ThreadPoolExecutor(max_workers=self.prefetch_workers) as executor:
+                progress_task = progress_bar.add_task("Pre-fetching", total=len(tasks))
+                futures = {executor.submit(self._prefetch_one, ticker, fetch, args, kwargs): (ticker, description) for ticker, description, fetch, args, kwargs in tasks}
+                for future in as_completed(futures):
+                    ticker, description = futures[future]
+                    try:
+                        result = future.result()
+                        # Batched fetches return a dict of per-ticker results
+                        if not result or (isinstance(result, dict) and not any(result.values())):
+                            empty.append((ticker, description))
+                    except Exception as e:
+                        failures.append((ticker, description, str(e)))
+                    progress_bar.advance(progress_task)
+        finally:
+            http_client.rate_limiter = previous_limiter
+
+        print(f"Data pre-fetch complete: {len(tasks) - len(failures)}/{len(tasks)} requests succeeded.")
+        if empty:
+            print(f"{Fore.YELLOW}No data returned for: {', '.join(f'{ticker} {description}' for ticker, description in sorted(empty))}{Style.RESET_ALL}")
+        for ticker, description, error in sorted(failures):
+            print(f"{Fore.RED}Failed to pre-fetch {description} for {ticker}: {error}{Style.RESET_ALL}")
+        # The akshare wrappers return empty results on errors, so report the endpoints that failed
+        for endpoint, stats in get_akshare_client().stats().items():
+            if stats["failures"]:
+                print(f"{Fore.RED}akshare {endpoint}: {stats['failures']}/{stats['calls']} calls failed ({stats['retries']} retries), last error: {stats['last_error']}{Style.RESET_ALL}")
+
+    def _prefetch_one(self, ticker: str, fetch: Callable, args: tuple, kwargs: dict):
+        """Run a single pre-fetch call; akshare calls are limited per task, financialdatasets per HTTP request."""
+        if ticker.startswith("^") or is_ashare_ticker(ticker):
+            self._rate_limiters["akshare"].acquire()
+        return fetch(*args, **kwargs)
 
     def parse_agent_response(self, agent_output):
         """Parse JSON output from the agent (fallback to 'hold' if invalid)."""
@@ -650,8 +743,28 @@ if __name__ == "__main__":
         help="Margin ratio for short positions, e.g. 0.5 for 50% (default: 0.0)",
     )
 
+    parser.add_argument(
+        "--prefetch-workers",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent data pre-fetch requests (default: 8)",
+    )
+    parser.add_argument(
+        "--export-data",
+        type=str,
+        help="Write the fetched data to this archive directory after the backtest (see src/cache_cli.py)",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Always call the LLM instead of replaying cached responses to identical prompts",
+    )
+
     args = parser.parse_args()
 
+    if args.no_llm_cache and (llm_cache := get_llm_cache()) is not None:
+        llm_cache.enabled = False
+
     # Parse tickers from comma-separated string
     tickers = [ticker.strip() for ticker in args.tickers.split(",")] if args.tickers else []
 
@@ -717,7 +830,26 @@ if __name__ == "__main__":
         model_provider=model_provider,
         selected_analysts=selected_analysts,
         initial_margin_requirement=args.margin_requirement,
+        prefetch_workers=args.prefetch_workers,
     )
 
     performance_metrics = backtester.run_backtest()
     performance_df = backtester.analyze_performance()
+
+    if (llm_cache := get_llm_cache()) is not None and llm_cache.enabled:
+        stats = llm_cache.stats()
+        print(f"\nLLM response cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+    # Failed LLM calls fall back to neutral signals, which would otherwise pass unnoticed in the results
+    for agent_name, models in get_retry_stats().stats().items():
+        for model_name, counters in models.items():
+            if counters["fallbacks"]:
+                print(
+                    f"{Fore.RED}{agent_name} ({model_name}): {counters['fallbacks']}/{counters['calls']} LLM calls fell back to default responses "
+                    f"({counters['rate_limit']} rate limits, {counters['timeout']} timeouts, {counters['transient']} transient, "
+                    f"{counters['parse']} parse, {counters['fatal']} fatal errors){Style.RESET_ALL}"
+                )
+
+    if args.export_data:
+        counts = get_cache().export(args.export_data)
+        print(f"\nExported {sum(counts.values())} rows of fetched data to {args.export_data}")
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+
+from colorama import Fore, Style, init
+from dotenv import load_dotenv
+
+from src.data.cache import get_cache
+
+load_dotenv()
+init(autoreset=True)
+
+
+def print_counts(action: str, path: str, counts: dict[str, int]):
+    if not counts:
+        print(f"{Fore.YELLOW}Nothing to {action}: {path}{Style.RESET_ALL}")
+        return
+    for dataset, count in counts.items():
+        print(f"  {dataset:<20} {count:>10,} rows")
+    print(f"{Fore.GREEN}{action.capitalize()}ed {sum(counts.values()):,} rows: {path}{Style.RESET_ALL}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the data cache to a columnar archive, or import one")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write the persistent data cache to an archive directory (usable as DATA_SNAPSHOT_DIR)")
+    export_parser.add_argument("path", type=str, help="Archive directory")
+
+    import_parser = subparsers.add_parser("import", help="Load an archive directory into the persistent data cache")
+    import_parser.add_argument("path", type=str, help="Archive directory")
+
+    args = parser.parse_args()
+    cache = get_cache()
+    path = os.path.expanduser(args.path)
+
+    if cache.store is None:
+        print(f"{Fore.RED}The persistent data cache is disabled (DATA_CACHE_DIR is empty){Style.RESET_ALL}")
+        sys.exit(1)
+
+    if args.command == "export":
+        print_counts("export", path, cache.export(path, include_store=True))
+    else:
+        if not os.path.isdir(path):
+            print(f"{Fore.RED}No such archive directory: {path}{Style.RESET_ALL}")
+            sys.exit(1)
+        print_counts("import", path, cache.import_(path))
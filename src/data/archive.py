@@ -0,0 +1,151 @@
+"""
+Export the data cache to a columnar archive directory and load it back.
+
+The layout matches snapshot mode (src/data/snapshot.py): one <dataset>.parquet per dataset with a
+`ticker` column, zstd-compressed, plus coverage.parquet recording which date ranges were fetched.
+Without pyarrow the same files are written as CSV. An archive can be replayed with Cache.import_()
+or read directly by pointing DATA_SNAPSHOT_DIR at it.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data.price_series import PriceSeries
+from src.data.snapshot import DATE_COLUMNS, load_csv, pa, pq
+
+COVERAGE_COLUMNS = ["dataset", "ticker", "scope", "start_date", "end_date"]
+
+
+def _path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.parquet" if pq is not None else f"{name}.csv")
+
+
+def _write(table, directory: str, name: str):
+    """Write a pyarrow Table (or DataFrame when pyarrow is missing)."""
+    if pq is not None:
+        pq.write_table(table, _path(directory, name), compression="zstd")
+    else:
+        table.to_csv(_path(directory, name), index=False)
+
+
+def _find(directory: str, name: str) -> str | None:
+    for path in (os.path.join(directory, f"{name}.parquet"), os.path.join(directory, f"{name}.csv")):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _prices_table(cache, tickers: list[str]):
+    """All cached price series as one table, sorted by ticker then date, built from the columns directly."""
+    series = [(ticker, s) for ticker in tickers if (s := cache.get_price_series(ticker)) is not None and len(s)]
+    if not series:
+        return None
+    columns = {
+        "ticker": np.concatenate([np.full(len(s), ticker, dtype=object) for ticker, s in series]),
+        "time": np.concatenate([s.dates for _, s in series]),
+    }
+    for name in ("open", "close", "high", "low", "volume"):
+        columns[name] = np.concatenate([getattr(s, name) for _, s in series])
+    if pa is not None:
+        return pa.table(columns)
+    frame = pd.DataFrame(columns)
+    frame["time"] = frame["time"].dt.strftime("%Y-%m-%d")
+    return frame
+
+
+def _rows_table(cache, dataset: str, tickers: list[str]):
+    rows = [{**row, "ticker": ticker} for ticker in tickers for row in getattr(cache, f"get_{dataset}")(ticker) or []]
+    if not rows:
+        return None
+    # A DataFrame takes the union of keys, so sparse line item rows keep all their fields
+    frame = pd.DataFrame(rows).sort_values(["ticker", DATE_COLUMNS[dataset]], kind="stable")
+    return pa.Table.from_pandas(frame, preserve_index=False) if pa is not None else frame
+
+
+def export_cache(cache, directory: str, include_store: bool = False) -> dict[str, int]:
+    """Write every dataset in the cache (and optionally the persistent store) to `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    coverage = []
+    for dataset in DATE_COLUMNS:
+        tickers = cache.tickers(dataset, include_store=include_store)
+        table = _prices_table(cache, tickers) if dataset == "prices" else _rows_table(cache, dataset, tickers)
+        if table is not None:
+            _write(table, directory, dataset)
+            counts[dataset] = len(table)
+        for ticker in tickers:
+            for scope, intervals in cache.get_coverage(dataset, ticker).items():
+                coverage.extend((dataset, ticker, scope, start, end) for start, end in intervals)
+
+    if coverage:
+        frame = pd.DataFrame(coverage, columns=COVERAGE_COLUMNS)
+        _write(pa.Table.from_pandas(frame, preserve_index=False) if pa is not None else frame, directory, "coverage")
+    return counts
+
+
+def _read_frame(path: str):
+    """Memory-mapped Arrow table for Parquet, DataFrame for CSV."""
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise ImportError(f"Reading {path} needs pyarrow (pip install pyarrow)")
+        return pq.read_table(path, memory_map=True).combine_chunks()
+    return load_csv(path)
+
+
+def _column(table, name: str) -> np.ndarray:
+    if isinstance(table, pd.DataFrame):
+        return table[name].to_numpy()
+    # Zero-copy for single-chunk numeric columns without nulls
+    return table.column(name).to_numpy(zero_copy_only=False)
+
+
+def _import_prices(cache, table) -> int:
+    tickers = _column(table, "ticker").astype(str)
+    dates = _column(table, "time")
+    if dates.dtype.kind != "M":
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    dates = dates.astype("datetime64[D]")
+    values = {name: _column(table, name) for name in ("open", "close", "high", "low", "volume")}
+
+    # Group rows by ticker with one stable sort instead of a per-ticker scan
+    order = np.argsort(tickers, kind="stable")
+    unique, starts = np.unique(tickers[order], return_index=True)
+    for ticker, rows in zip(unique, np.split(order, starts[1:])):
+        cache.set_price_series(ticker, PriceSeries.from_arrays(dates[rows], *(values[name][rows] for name in ("open", "close", "high", "low", "volume"))))
+    return len(tickers)
+
+
+def _import_rows(cache, dataset: str, table) -> int:
+    rows = table.to_dict("records") if isinstance(table, pd.DataFrame) else table.to_pylist()
+    by_ticker: dict[str, list[dict]] = {}
+    date_column = DATE_COLUMNS[dataset]
+    for row in rows:
+        if not isinstance(row[date_column], str):
+            row[date_column] = pd.Timestamp(row[date_column]).strftime("%Y-%m-%d")
+        if dataset == "line_items":
+            # Line item rows only carry the fields that were fetched for them
+            row = {key: value for key, value in row.items() if value is not None}
+        by_ticker.setdefault(row["ticker"], []).append(row)
+    for ticker, ticker_rows in by_ticker.items():
+        getattr(cache, f"set_{dataset}")(ticker, ticker_rows)
+    return len(rows)
+
+
+def import_archive(cache, directory: str) -> dict[str, int]:
+    """Load every dataset file found in `directory` into the cache."""
+    counts = {}
+    for dataset in DATE_COLUMNS:
+        if (path := _find(directory, dataset)) is None:
+            continue
+        table = _read_frame(path)
+        counts[dataset] = _import_prices(cache, table) if dataset == "prices" else _import_rows(cache, dataset, table)
+
+    if (path := _find(directory, "coverage")) is not None:
+        table = _read_frame(path)
+        rows = table.to_dict("records") if isinstance(table, pd.DataFrame) else table.to_pylist()
+        # Intervals were already clamped (or deliberately not, for line items) when first recorded
+        for row in rows:
+            cache.add_coverage(row["dataset"], row["ticker"], row["start_date"], row["end_date"], scope=row["scope"] or "", settled_only=False)
+    return counts
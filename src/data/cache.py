@@ -1,65 +1,276 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from operator import itemgetter
+
+from src.data.archive import export_cache, import_archive
+from src.data.intervals import clamp_to_settled, first_unsettled_date, merge_intervals, missing_intervals
+from src.data.price_series import PriceSeries
+from src.data.sorted_rows import SortedRows
+from src.data.store import SQLiteStore, get_ttl, open_default_store
+
+# Dataset name -> field(s) used to dedupe rows
+DATASET_KEYS = {
+    "prices": "time",
+    "financial_metrics": ("period", "report_period"),
+    "line_items": ("period", "report_period"),
+    # Many trades and announcements share a day, so these are keyed per record rather than per date
+    "insider_trades": ("filing_date", "name", "transaction_date", "transaction_shares"),
+    "company_news": ("date", "title", "url"),
+}
+
+# Dataset name -> date rows are kept sorted and range-sliced by (prices use a PriceSeries instead)
+DATASET_DATES = {
+    "financial_metrics": itemgetter("report_period"),
+    "line_items": itemgetter("report_period"),
+    # Trades are ordered by when they happened, falling back to the filing date
+    "insider_trades": lambda row: row.get("transaction_date") or row["filing_date"],
+    "company_news": itemgetter("date"),
+}
+
+_UNSET = object()
+
+# Default in-memory budget in rows (price bars, metrics, trades...) across all tickers and datasets
+DEFAULT_MAX_ROWS = 500_000
+
+
+def get_max_rows() -> int | None:
+    """In-memory row budget, overridable via DATA_CACHE_MAX_ROWS (<= 0 means unbounded)."""
+    value = os.environ.get("DATA_CACHE_MAX_ROWS")
+    if value is None or value.strip() == "":
+        return DEFAULT_MAX_ROWS
+    max_rows = int(value)
+    return max_rows if max_rows > 0 else None
+
+
 class Cache:
-    """In-memory cache for API responses."""
+    """In-memory cache for API responses, backed by an optional persistent store."""
+
+    def __init__(self, store: SQLiteStore | None | object = _UNSET, max_rows: int | None | object = _UNSET):
+        # dataset -> ticker -> date-sorted rows (prices are held as a date-indexed PriceSeries)
+        self._data: dict[str, dict[str, SortedRows | PriceSeries]] = {dataset: {} for dataset in DATASET_KEYS}
+        # (dataset, ticker) -> time the oldest row was fetched
+        self._fetched_at: dict[tuple[str, str], float] = {}
+        # (dataset, ticker) -> scope -> merged [start_date, end_date] intervals already fetched
+        self._coverage: dict[tuple[str, str], dict[str, list[tuple[str, str]]]] = {}
+        # (dataset, ticker) pairs already warm-loaded from the persistent store
+        self._loaded: set[tuple[str, str]] = set()
+        # (dataset, ticker) -> rows held in memory, least recently used first
+        self._sizes: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._rows = 0
+        # Row budget; None (or <= 0) means unbounded
+        self._max_rows = get_max_rows() if max_rows is _UNSET else (max_rows if max_rows and max_rows > 0 else None)
+        self._hits = 0
+        self._store_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._store = store
+        self._lock = threading.RLock()
+
+    @property
+    def store(self) -> SQLiteStore | None:
+        """The persistent store, opened lazily so .env settings are honoured."""
+        if self._store is _UNSET:
+            self._store = open_default_store()
+        return self._store
+
+    def _merge(self, dataset: str, existing, new_data: list[dict] | PriceSeries) -> tuple[any, list[dict]]:
+        """Merge new rows into a dataset entry, returning (merged entry, rows that were added or changed)."""
+        if dataset == "prices":
+            existing = existing if existing is not None else PriceSeries.empty()
+            incoming = new_data if isinstance(new_data, PriceSeries) else PriceSeries.from_records(new_data)
+            # Bars from today onwards may be partial (intraday), so a refetched bar replaces the cached one
+            unsettled = first_unsettled_date()
+            added = [row for row, is_new in zip(incoming.to_records(), existing.new_dates_mask(incoming, unsettled)) if is_new]
+            return existing.merge(incoming, unsettled), added
+
+        # Rows are merged in place; line items gain new fields on rows already cached
+        rows = existing if existing is not None else SortedRows(DATASET_KEYS[dataset], DATASET_DATES[dataset])
+        return rows, rows.merge(new_data, merge_fields=dataset == "line_items")
+
+    def _is_expired(self, dataset: str, ticker: str) -> bool:
+        ttl = get_ttl(dataset)
+        fetched_at = self._fetched_at.get((dataset, ticker))
+        return ttl is not None and fetched_at is not None and time.time() - fetched_at > ttl
 
-    def __init__(self):
-        self._prices_cache: dict[str, list[dict[str, any]]] = {}
-        self._financial_metrics_cache: dict[str, list[dict[str, any]]] = {}
-        self._line_items_cache: dict[str, list[dict[str, any]]] = {}
-        self._insider_trades_cache: dict[str, list[dict[str, any]]] = {}
-        self._company_news_cache: dict[str, list[dict[str, any]]] = {}
+    def _drop(self, dataset: str, ticker: str):
+        """Forget everything held in memory for a ticker; it is warm-loaded again from the store on next use."""
+        self._data[dataset].pop(ticker, None)
+        self._fetched_at.pop((dataset, ticker), None)
+        self._coverage.pop((dataset, ticker), None)
+        self._loaded.discard((dataset, ticker))
+        self._rows -= self._sizes.pop((dataset, ticker), 0)
 
-    def _merge_data(self, existing: list[dict] | None, new_data: list[dict], key_field: str) -> list[dict]:
-        """Merge existing and new data, avoiding duplicates based on a key field."""
-        if not existing:
-            return new_data
+    def _touch(self, dataset: str, ticker: str):
+        """Mark an entry as most recently used, re-count its rows and evict others past the budget."""
+        key = (dataset, ticker)
+        entry = self._data[dataset].get(ticker)
+        size = len(entry) if entry is not None else 0
+        if not size and not self._coverage.get(key):
+            # Nothing is held for a miss, so lookups of unknown tickers don't grow the cache
+            self._drop(dataset, ticker)
+            return
+        # Coverage-only entries count as one row so they can be evicted too
+        size = max(size, 1)
+        self._rows += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        self._sizes.move_to_end(key)
 
-        # Create a set of existing keys for O(1) lookup
-        existing_keys = {item[key_field] for item in existing}
+        # The entry just used is never evicted, even if it alone exceeds the budget
+        while self._max_rows is not None and self._rows > self._max_rows and len(self._sizes) > 1:
+            oldest = next(iter(self._sizes))
+            self._drop(*oldest)
+            self._evictions += 1
 
-        # Only add items that don't exist yet
-        merged = existing.copy()
-        merged.extend([item for item in new_data if item[key_field] not in existing_keys])
-        return merged
+    def _get(self, dataset: str, ticker: str, record: bool = False):
+        with self._lock:
+            if self._is_expired(dataset, ticker):
+                self._drop(dataset, ticker)
+
+            in_memory = ticker in self._data[dataset]
+            if (dataset, ticker) not in self._loaded:
+                # Warm-load lazily from disk the first time a ticker is requested
+                self._loaded.add((dataset, ticker))
+                if self.store is not None:
+                    rows, fetched_at = self.store.load(dataset, ticker, get_ttl(dataset))
+                    if rows:
+                        self._data[dataset][ticker], _ = self._merge(dataset, self._data[dataset].get(ticker), rows)
+                        self._fetched_at[(dataset, ticker)] = min(fetched_at, self._fetched_at.get((dataset, ticker), fetched_at))
+                    for scope, start_date, end_date in self.store.load_coverage(dataset, ticker, get_ttl(dataset)):
+                        coverage = self._coverage.setdefault((dataset, ticker), {})
+                        coverage[scope] = merge_intervals(coverage.get(scope, []) + [(start_date, end_date)])
+
+            entry = self._data[dataset].get(ticker)
+            if record:
+                if entry is None:
+                    self._misses += 1
+                elif in_memory:
+                    self._hits += 1
+                else:
+                    self._store_hits += 1
+            self._touch(dataset, ticker)
+            return entry
+
+    def _set(self, dataset: str, ticker: str, data: list[dict[str, any]]):
+        with self._lock:
+            self._data[dataset][ticker], added = self._merge(dataset, self._get(dataset, ticker), data)
+            self._fetched_at.setdefault((dataset, ticker), time.time())
+            # Persist before releasing the lock, so an eviction and reload can't miss these rows
+            if added and self.store is not None:
+                self.store.save(dataset, ticker, added, DATASET_KEYS[dataset])
+            self._touch(dataset, ticker)
+
+    def get_missing_ranges(self, dataset: str, ticker: str, start_date: str, end_date: str, scope: str = "") -> list[tuple[str, str]]:
+        """Sub-intervals of [start_date, end_date] that have not been fetched yet (within an optional scope)."""
+        with self._lock:
+            self._get(dataset, ticker)
+            return missing_intervals(self._coverage.get((dataset, ticker), {}).get(scope, []), start_date, end_date)
+
+    def add_coverage(self, dataset: str, ticker: str, start_date: str, end_date: str, scope: str = "", settled_only: bool = True):
+        """
+        Mark [start_date, end_date] as fetched. Days from today onwards are not marked, as their data may still
+        change, unless settled_only is False (for datasets keyed by report period, which rely on their TTL instead).
+        """
+        settled = clamp_to_settled(start_date, end_date) if settled_only else (start_date[:10], end_date[:10])
+        if settled is None:
+            return
+        with self._lock:
+            self._get(dataset, ticker)
+            coverage = self._coverage.setdefault((dataset, ticker), {})
+            coverage[scope] = merge_intervals(coverage.get(scope, []) + [settled])
+            self._fetched_at.setdefault((dataset, ticker), time.time())
+            self._touch(dataset, ticker)
+
+        if self.store is not None:
+            self.store.add_coverage(dataset, ticker, *settled, scope=scope)
 
     def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached price data if available."""
-        return self._prices_cache.get(ticker)
+        series = self._get("prices", ticker, record=True)
+        return series.to_records() if series is not None else None
+
+    def get_price_series(self, ticker: str) -> PriceSeries | None:
+        """Get the cached date-indexed price series if available."""
+        return self._get("prices", ticker, record=True)
 
     def set_prices(self, ticker: str, data: list[dict[str, any]]):
         """Append new price data to cache."""
-        self._prices_cache[ticker] = self._merge_data(self._prices_cache.get(ticker), data, key_field="time")
+        self._set("prices", ticker, data)
 
-    def get_financial_metrics(self, ticker: str) -> list[dict[str, any]]:
+    def set_price_series(self, ticker: str, series: PriceSeries):
+        """Append a price series to cache without going through per-row dicts."""
+        self._set("prices", ticker, series)
+
+    def get_financial_metrics(self, ticker: str) -> SortedRows | None:
         """Get cached financial metrics if available."""
-        return self._financial_metrics_cache.get(ticker)
+        return self._get("financial_metrics", ticker, record=True)
 
     def set_financial_metrics(self, ticker: str, data: list[dict[str, any]]):
         """Append new financial metrics to cache."""
-        self._financial_metrics_cache[ticker] = self._merge_data(self._financial_metrics_cache.get(ticker), data, key_field="report_period")
+        self._set("financial_metrics", ticker, data)
 
-    def get_line_items(self, ticker: str) -> list[dict[str, any]] | None:
+    def get_line_items(self, ticker: str) -> SortedRows | None:
         """Get cached line items if available."""
-        return self._line_items_cache.get(ticker)
+        return self._get("line_items", ticker, record=True)
 
     def set_line_items(self, ticker: str, data: list[dict[str, any]]):
-        """Append new line items to cache."""
-        self._line_items_cache[ticker] = self._merge_data(self._line_items_cache.get(ticker), data, key_field="report_period")
+        """Append new line items to cache, adding new fields to rows already cached."""
+        self._set("line_items", ticker, data)
 
-    def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
+    def get_insider_trades(self, ticker: str) -> SortedRows | None:
         """Get cached insider trades if available."""
-        return self._insider_trades_cache.get(ticker)
+        return self._get("insider_trades", ticker, record=True)
 
     def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
         """Append new insider trades to cache."""
-        self._insider_trades_cache[ticker] = self._merge_data(self._insider_trades_cache.get(ticker), data, key_field="filing_date")  # Could also use transaction_date if preferred
+        self._set("insider_trades", ticker, data)
 
-    def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
+    def get_company_news(self, ticker: str) -> SortedRows | None:
         """Get cached company news if available."""
-        return self._company_news_cache.get(ticker)
+        return self._get("company_news", ticker, record=True)
 
     def set_company_news(self, ticker: str, data: list[dict[str, any]]):
         """Append new company news to cache."""
-        self._company_news_cache[ticker] = self._merge_data(self._company_news_cache.get(ticker), data, key_field="date")
+        self._set("company_news", ticker, data)
+
+    def tickers(self, dataset: str, include_store: bool = False) -> list[str]:
+        """Tickers cached for a dataset, optionally including those only in the persistent store."""
+        with self._lock:
+            tickers = set(self._data[dataset]) | {ticker for (name, ticker) in self._coverage if name == dataset}
+        if include_store and self.store is not None:
+            tickers.update(self.store.tickers(dataset))
+        return sorted(tickers)
+
+    def get_coverage(self, dataset: str, ticker: str) -> dict[str, list[tuple[str, str]]]:
+        """Fetched date intervals for a ticker, by scope."""
+        with self._lock:
+            self._get(dataset, ticker)
+            return {scope: list(intervals) for scope, intervals in self._coverage.get((dataset, ticker), {}).items()}
+
+    def stats(self) -> dict[str, any]:
+        """Size, hit rate and eviction counters for the in-memory tier."""
+        with self._lock:
+            lookups = self._hits + self._store_hits + self._misses
+            return {
+                "entries": len(self._sizes),
+                "rows": self._rows,
+                "max_rows": self._max_rows,
+                "rows_by_dataset": {dataset: sum(size for (name, _), size in self._sizes.items() if name == dataset) for dataset in DATASET_KEYS},
+                "hits": self._hits,
+                "store_hits": self._store_hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+    def export(self, path: str, include_store: bool = False) -> dict[str, int]:
+        """Write every dataset to a columnar archive directory (usable as DATA_SNAPSHOT_DIR). Returns rows written per dataset."""
+        return export_cache(self, path, include_store)
+
+    def import_(self, path: str) -> dict[str, int]:
+        """Load an archive written by export() into the cache. Returns rows read per dataset."""
+        return import_archive(self, path)
 
 
 # Global cache instance
@@ -0,0 +1,40 @@
+"""
+Canonical day representations for the data layer.
+Dates arrive as "%Y-%m-%d" strings, ISO timestamps, date/datetime objects or numpy/pandas values;
+they are converted once, at ingestion, to day ordinals (row storage, intervals) or datetime64[D]
+(columnar price series), so filtering and range slicing compare integers instead of parsing strings.
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+
+
+def to_ordinal(value) -> int:
+    """Proleptic Gregorian day ordinal of a date-like value; timestamps are truncated to their day."""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10]).toordinal()
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(np.datetime64(value, "D"))).toordinal()
+
+
+def to_iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def to_day(value) -> np.datetime64:
+    """Convert a date string/date/datetime to numpy day precision."""
+    if isinstance(value, str):
+        return np.datetime64(value[:10], "D")
+    return np.datetime64(value, "D")
+
+
+def to_days(values) -> np.ndarray:
+    """Vectorised to_day: strings are truncated to their day and parsed by numpy in one pass."""
+    values = list(values)
+    if all(isinstance(value, str) for value in values):
+        return np.array([value[:10] for value in values], dtype="datetime64[D]")
+    return np.array([to_day(value) for value in values], dtype="datetime64[D]")
@@ -0,0 +1,48 @@
+"""
+Column-wise conversion of vendor DataFrames into cache records and pydantic models.
+Renames and dtype coercion happen once per column instead of once per row.
+"""
+
+import pandas as pd
+from pydantic import BaseModel
+
+
+def _coerce(column: pd.Series, dtype: str) -> pd.Series:
+    """Coerce a whole column to one of "float", "int", "date" ("%Y-%m-%d" strings) or "str"."""
+    if dtype == "date":
+        return pd.to_datetime(column).dt.strftime("%Y-%m-%d")
+    if dtype in ("float", "int"):
+        if not pd.api.types.is_numeric_dtype(column):
+            # Vendors sometimes send numbers as strings with thousands separators
+            column = column.astype(str).str.replace(",", "", regex=False)
+        column = pd.to_numeric(column, errors="coerce")
+        if dtype == "int" and not column.isna().any():
+            return column.astype("int64")
+        return column.astype("float64")
+    if dtype == "str":
+        return column.astype(str)
+    raise ValueError(f"Unknown dtype: {dtype}")
+
+
+def normalize_frame(df: pd.DataFrame, columns: dict[str, str], dtypes: dict[str, str] | None = None) -> pd.DataFrame:
+    """Select and rename `columns` (source -> target) and coerce the renamed columns listed in `dtypes`."""
+    out = df[list(columns)].rename(columns=columns)
+    for name, dtype in (dtypes or {}).items():
+        out[name] = _coerce(out[name], dtype)
+    return out
+
+
+def frame_to_records(df: pd.DataFrame, constants: dict | None = None) -> list[dict]:
+    """Emit rows as dicts of plain Python values, with NaN as None and `constants` added to every row."""
+    if constants:
+        df = df.assign(**constants)
+    if df.isna().to_numpy().any():
+        df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
+
+
+def records_to_models(records: list[dict], model: type[BaseModel], validate: bool = False) -> list[BaseModel]:
+    """Build models from trusted records, skipping pydantic validation unless asked for."""
+    if validate:
+        return [model.model_validate(record) for record in records]
+    return [model.model_construct(**record) for record in records]
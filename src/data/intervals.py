@@ -0,0 +1,52 @@
+"""
+Helpers for tracking which closed date intervals a cache already covers.
+Intervals are (start, end) pairs of "%Y-%m-%d" strings, inclusive on both ends.
+"""
+
+from datetime import date, timedelta
+
+from src.data.dates import to_iso, to_ordinal
+
+
+def merge_intervals(intervals: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Sort intervals and merge any that overlap or touch."""
+    merged: list[list[int]] = []
+    for start, end in sorted((to_ordinal(s), to_ordinal(e)) for s, e in intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(to_iso(s), to_iso(e)) for s, e in merged]
+
+
+def missing_intervals(covered: list[tuple[str, str]], start_date: str, end_date: str) -> list[tuple[str, str]]:
+    """Sub-intervals of [start_date, end_date] not contained in the (merged) covered intervals."""
+    start, end = to_ordinal(start_date), to_ordinal(end_date)
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in merge_intervals(covered):
+        s, e = to_ordinal(covered_start), to_ordinal(covered_end)
+        if e < cursor:
+            continue
+        if s > end:
+            break
+        if s > cursor:
+            gaps.append((to_iso(cursor), to_iso(s - 1)))
+        cursor = max(cursor, e + 1)
+    if cursor <= end:
+        gaps.append((to_iso(cursor), to_iso(end)))
+    return gaps
+
+
+def first_unsettled_date() -> str:
+    """The first day whose data may still change (today); data for it and later days is always refetched."""
+    return date.today().isoformat()
+
+
+def clamp_to_settled(start_date: str, end_date: str) -> tuple[str, str] | None:
+    """Clamp an interval to days that are fully settled (before today); None if nothing remains."""
+    last_settled = (date.today() - timedelta(days=1)).isoformat()
+    end_date = min(end_date[:10], last_settled)
+    if start_date[:10] > end_date:
+        return None
+    return start_date[:10], end_date
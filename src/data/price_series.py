@@ -0,0 +1,136 @@
+"""
+Columnar, date-indexed storage for daily price bars.
+Bars are kept sorted by date so range queries are binary-search slices.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data.dates import to_day, to_days
+from src.data.records import Bar
+
+PRICE_FIELDS = ("open", "close", "high", "low", "volume")
+
+
+class PriceSeries:
+    """Struct-of-arrays price history for a single ticker."""
+
+    __slots__ = ("dates", "open", "close", "high", "low", "volume")
+
+    def __init__(self, dates: np.ndarray, open: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray):
+        self.dates = dates
+        self.open = open
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+
+    @classmethod
+    def empty(cls) -> "PriceSeries":
+        return cls(np.array([], dtype="datetime64[D]"), *(np.array([], dtype=np.float64) for _ in range(4)), np.array([], dtype=np.int64))
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "PriceSeries":
+        """Build a sorted series from price dicts (as produced by Price.model_dump() or Bar.as_dict())."""
+        if not records:
+            return cls.empty()
+        dates = to_days(r["time"] for r in records)
+        series = cls(
+            dates,
+            np.array([r["open"] for r in records], dtype=np.float64),
+            np.array([r["close"] for r in records], dtype=np.float64),
+            np.array([r["high"] for r in records], dtype=np.float64),
+            np.array([r["low"] for r in records], dtype=np.float64),
+            np.array([r["volume"] for r in records], dtype=np.int64),
+        )
+        return series._dedupe()
+
+    @classmethod
+    def from_arrays(cls, dates, open, close, high, low, volume) -> "PriceSeries":
+        """Build a sorted series from column arrays (e.g. read from a columnar file)."""
+        series = cls(
+            np.asarray(dates, dtype="datetime64[D]"),
+            np.asarray(open, dtype=np.float64),
+            np.asarray(close, dtype=np.float64),
+            np.asarray(high, dtype=np.float64),
+            np.asarray(low, dtype=np.float64),
+            np.asarray(volume, dtype=np.int64),
+        )
+        return series._dedupe()
+
+    def _take(self, index) -> "PriceSeries":
+        return PriceSeries(self.dates[index], self.open[index], self.close[index], self.high[index], self.low[index], self.volume[index])
+
+    def _dedupe(self) -> "PriceSeries":
+        """Sort by date, keeping the first bar seen for each date."""
+        _, first = np.unique(self.dates, return_index=True)
+        return self._take(first)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def merge(self, other: "PriceSeries", replace_from=None) -> "PriceSeries":
+        """
+        Union of both series. Bars already in self win on duplicate dates, except from replace_from
+        onwards, where other's (fresher) bar replaces them.
+        """
+        if not len(other):
+            return self
+        if not len(self):
+            return other
+        if other.dates[0] > self.dates[-1]:
+            # Newer bars only: append without re-sorting
+            return PriceSeries(*(np.concatenate((getattr(self, name), getattr(other, name))) for name in self.__slots__))
+        if replace_from is not None:
+            stale = (self.dates >= to_day(replace_from)) & np.isin(self.dates, other.dates)
+            if stale.any():
+                self = self._take(~stale)
+        combined = PriceSeries(*(np.concatenate((getattr(self, name), getattr(other, name))) for name in self.__slots__))
+        return combined._dedupe()
+
+    def new_dates_mask(self, other: "PriceSeries", replace_from=None) -> np.ndarray:
+        """Boolean mask over other marking bars whose date is not in self, or is on or after replace_from."""
+        if not len(self) or not len(other) or other.dates[0] > self.dates[-1]:
+            return np.ones(len(other), dtype=bool)
+        mask = ~np.isin(other.dates, self.dates)
+        if replace_from is not None:
+            mask |= other.dates >= to_day(replace_from)
+        return mask
+
+    def slice(self, start_date, end_date) -> "PriceSeries":
+        """Bars with start_date <= date <= end_date, via binary search."""
+        lo = np.searchsorted(self.dates, to_day(start_date), side="left")
+        hi = np.searchsorted(self.dates, to_day(end_date), side="right")
+        return self._take(slice(lo, hi))
+
+    def time_strings(self) -> list[str]:
+        return np.datetime_as_string(self.dates, unit="D").tolist()
+
+    def to_records(self) -> list[dict]:
+        """Convert to a list of price dicts."""
+        return [
+            {"open": o, "close": c, "high": h, "low": l, "volume": v, "time": t}
+            for o, c, h, l, v, t in zip(self.open.tolist(), self.close.tolist(), self.high.tolist(), self.low.tolist(), self.volume.tolist(), self.time_strings())
+        ]
+
+    def to_bars(self) -> list[Bar]:
+        """Materialise compact bar records, one per date."""
+        return [
+            Bar(o, c, h, l, v, t)
+            for o, c, h, l, v, t in zip(self.open.tolist(), self.close.tolist(), self.high.tolist(), self.low.tolist(), self.volume.tolist(), self.time_strings())
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Convert to a DataFrame indexed by Date, matching prices_to_df()."""
+        df = pd.DataFrame(
+            {
+                "open": self.open,
+                "close": self.close,
+                "high": self.high,
+                "low": self.low,
+                "volume": self.volume,
+                "time": self.time_strings(),
+            },
+            index=pd.DatetimeIndex(self.dates.astype("datetime64[ns]"), name="Date"),
+        )
+        return df
@@ -0,0 +1,102 @@
+"""
+Compact in-process records for daily bars and insider trades.
+These are plain __slots__ classes with the same fields as Price and InsiderTrade in src/data/models.py,
+without per-instance dicts or validation. Pydantic models are only built at the HTTP API boundary, via to_model().
+"""
+
+from pydantic import BaseModel
+
+from src.data.models import InsiderTrade, Price
+
+
+class _Record:
+    __slots__ = ()
+    model: type[BaseModel]
+
+    @classmethod
+    def from_dict(cls, row: dict) -> "_Record":
+        """Build from a cache row or API payload, ignoring unknown keys and defaulting missing ones to None."""
+        return cls(**{field: row.get(field) for field in cls.__slots__})
+
+    @classmethod
+    def from_records(cls, rows) -> list:
+        return [cls.from_dict(row) for row in rows]
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def to_model(self) -> BaseModel:
+        """Materialise (and validate) the pydantic model, for API responses."""
+        return self.model.model_validate(self.as_dict())
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{field}={getattr(self, field)!r}' for field in self.__slots__)})"
+
+
+class Bar(_Record):
+    """One daily price bar; time is a "%Y-%m-%d" string."""
+
+    __slots__ = ("open", "close", "high", "low", "volume", "time")
+    model = Price
+
+    def __init__(self, open: float, close: float, high: float, low: float, volume: int, time: str):
+        self.open = open
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.time = time
+
+
+class Trade(_Record):
+    """One insider trade filing."""
+
+    __slots__ = (
+        "ticker",
+        "issuer",
+        "name",
+        "title",
+        "is_board_director",
+        "transaction_date",
+        "transaction_shares",
+        "transaction_price_per_share",
+        "transaction_value",
+        "shares_owned_before_transaction",
+        "shares_owned_after_transaction",
+        "security_title",
+        "filing_date",
+    )
+    model = InsiderTrade
+
+    def __init__(
+        self,
+        ticker: str,
+        filing_date: str,
+        issuer: str | None = None,
+        name: str | None = None,
+        title: str | None = None,
+        is_board_director: bool | None = None,
+        transaction_date: str | None = None,
+        transaction_shares: float | None = None,
+        transaction_price_per_share: float | None = None,
+        transaction_value: float | None = None,
+        shares_owned_before_transaction: float | None = None,
+        shares_owned_after_transaction: float | None = None,
+        security_title: str | None = None,
+    ):
+        self.ticker = ticker
+        self.issuer = issuer
+        self.name = name
+        self.title = title
+        self.is_board_director = is_board_director
+        self.transaction_date = transaction_date
+        self.transaction_shares = transaction_shares
+        self.transaction_price_per_share = transaction_price_per_share
+        self.transaction_value = transaction_value
+        self.shares_owned_before_transaction = shares_owned_before_transaction
+        self.shares_owned_after_transaction = shares_owned_after_transaction
+        self.security_title = security_title
+        self.filing_date = filing_date
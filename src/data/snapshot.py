@@ -0,0 +1,133 @@
+"""
+Read-only local snapshot of the datasets for offline, deterministic backtests.
+
+Point DATA_SNAPSHOT_DIR at a directory holding one file (or Parquet directory) per dataset:
+    prices.parquet  financial_metrics.parquet  line_items.parquet  insider_trades.parquet  company_news.parquet
+CSV files with the same names are used when a Parquet file is absent. Every file has a `ticker`
+column plus the dataset's date column; Parquet reads are memory-mapped and push the ticker/date
+filters down to row groups. Parquet support needs the optional pyarrow package.
+"""
+
+import os
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+# Dataset name -> column the date filters apply to
+DATE_COLUMNS = {
+    "prices": "time",
+    "financial_metrics": "report_period",
+    "line_items": "report_period",
+    "insider_trades": "filing_date",
+    "company_news": "date",
+}
+
+
+def _to_iso(value):
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def load_csv(path: str, date_column: str | None = None) -> pd.DataFrame:
+    """Read a snapshot CSV with plain Python values: dates as "%Y-%m-%d" strings and nulls as None."""
+    df = pd.read_csv(path, dtype={"ticker": str})
+    if date_column:
+        df[date_column] = pd.to_datetime(df[date_column]).dt.strftime("%Y-%m-%d")
+    # Empty cells in text columns are empty strings (as the APIs return them), elsewhere null
+    text_columns = [name for name in df.columns if not pd.api.types.is_numeric_dtype(df[name])]
+    df[text_columns] = df[text_columns].fillna("")
+    return df.astype(object).where(df.notna(), None)
+
+
+class SnapshotStore:
+    """Reads rows for one ticker and date range from the snapshot files in a directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        # CSV files can't be filtered while reading, so each is parsed once and split by ticker
+        self._csv_frames: dict[str, dict[str, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def _parquet_path(self, dataset: str) -> str | None:
+        for path in (os.path.join(self.directory, f"{dataset}.parquet"), os.path.join(self.directory, dataset)):
+            if os.path.exists(path):
+                if pq is None:
+                    print(f"Snapshot {path} needs pyarrow to be read (pip install pyarrow)")
+                    return None
+                return path
+        return None
+
+    def _bound(self, field_type, value: str):
+        """Convert an ISO date bound to the type of the Parquet column it is compared against."""
+        if pa.types.is_timestamp(field_type):
+            return pa.scalar(datetime.fromisoformat(value), type=field_type)
+        if pa.types.is_date(field_type):
+            return pa.scalar(date.fromisoformat(value), type=field_type)
+        return value
+
+    def _read_parquet(self, path: str, dataset: str, ticker: str, start_date: str | None, end_date: str | None) -> list[dict]:
+        column = DATE_COLUMNS[dataset]
+        schema = pq.read_schema(path) if os.path.isfile(path) else pq.ParquetDataset(path).schema
+        filters = [("ticker", "=", ticker)]
+        if start_date:
+            filters.append((column, ">=", self._bound(schema.field(column).type, start_date)))
+        if end_date:
+            filters.append((column, "<=", self._bound(schema.field(column).type, end_date)))
+        table = pq.read_table(path, filters=filters, memory_map=True)
+        rows = table.to_pylist()
+        for row in rows:
+            row[column] = _to_iso(row[column])
+        return rows
+
+    def _read_csv(self, path: str, dataset: str, ticker: str, start_date: str | None, end_date: str | None) -> list[dict]:
+        with self._lock:
+            if path not in self._csv_frames:
+                column = DATE_COLUMNS[dataset]
+                df = load_csv(path, column)
+                self._csv_frames[path] = {key: group.sort_values(column) for key, group in df.groupby("ticker")}
+            df = self._csv_frames[path].get(ticker)
+        if df is None:
+            return []
+
+        column = DATE_COLUMNS[dataset]
+        mask = pd.Series(True, index=df.index)
+        if start_date:
+            mask &= df[column] >= start_date
+        if end_date:
+            mask &= df[column] <= end_date
+        return df[mask].to_dict("records")
+
+    def read(self, dataset: str, ticker: str, start_date: str | None = None, end_date: str | None = None) -> list[dict]:
+        """Rows of a dataset for a ticker with the dataset's date column in [start_date, end_date]."""
+        if (path := self._parquet_path(dataset)) is not None:
+            return self._read_parquet(path, dataset, ticker, start_date, end_date)
+        if os.path.exists(path := os.path.join(self.directory, f"{dataset}.csv")):
+            return self._read_csv(path, dataset, ticker, start_date, end_date)
+        return []
+
+
+_snapshots: dict[str, SnapshotStore] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot() -> SnapshotStore | None:
+    """The snapshot under DATA_SNAPSHOT_DIR, or None when snapshot mode is off."""
+    directory = os.environ.get("DATA_SNAPSHOT_DIR")
+    if not directory:
+        return None
+    directory = os.path.expanduser(directory)
+    with _snapshots_lock:
+        if directory not in _snapshots:
+            _snapshots[directory] = SnapshotStore(directory)
+        return _snapshots[directory]
@@ -0,0 +1,99 @@
+"""
+Date-sorted row storage for one ticker's cached records (financial metrics, line items, trades, news).
+Rows stay sorted by their date and are indexed by key, so merging costs time in the new rows
+and date-range reads are binary-search slices over day ordinals computed once per row at insertion.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable
+from heapq import merge as heap_merge
+from operator import itemgetter
+
+from src.data.dates import to_ordinal
+from src.data.store import row_key
+
+# Below this many out-of-order rows, insert one by one instead of rebuilding the list
+_INSORT_THRESHOLD = 32
+
+
+class SortedRows:
+    """Rows kept oldest first by `date_of(row)`, deduplicated by `key_field`."""
+
+    __slots__ = ("key_field", "date_of", "_rows", "_dates", "_index", "_lock")
+
+    def __init__(self, key_field: str | tuple[str, ...], date_of: Callable[[dict], str], rows: list[dict] | None = None):
+        self.key_field = key_field
+        self.date_of = date_of
+        self._rows: list[dict] = []
+        # Day ordinal of each row's date, parallel to _rows
+        self._dates: list[int] = []
+        # row key -> row, for O(1) dedupe
+        self._index: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if rows:
+            self.merge(rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(self._rows[:])
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def merge(self, rows: list[dict], merge_fields: bool = False) -> list[dict]:
+        """Add rows with unseen keys and return the rows added or changed.
+
+        With merge_fields, a row whose key is already present gains any new or updated fields instead of being skipped.
+        """
+        with self._lock:
+            added = []
+            changed = []
+            for row in rows:
+                key = row_key(row, self.key_field)
+                current = self._index.get(key)
+                if current is None:
+                    # Rows are copied when they may be updated later, so callers' dicts are never mutated
+                    row = dict(row) if merge_fields else row
+                    self._index[key] = row
+                    added.append(row)
+                    changed.append(row)
+                elif merge_fields and any(field not in current or current[field] != value for field, value in row.items()):
+                    current.update(row)
+                    changed.append(current)
+            self._insert(added)
+            return changed
+
+    def _insert(self, added: list[dict]):
+        if not added:
+            return
+        entries = sorted(((to_ordinal(self.date_of(row)), row) for row in added), key=itemgetter(0))
+        if not self._dates or entries[0][0] >= self._dates[-1]:
+            # The common case: newer rows are appended at the end
+            self._dates.extend(day for day, _ in entries)
+            self._rows.extend(row for _, row in entries)
+        elif len(entries) <= _INSORT_THRESHOLD:
+            for day, row in entries:
+                i = bisect_right(self._dates, day)
+                self._dates.insert(i, day)
+                self._rows.insert(i, row)
+        else:
+            # Linear merge of two sorted runs
+            merged = list(heap_merge(zip(self._dates, self._rows), entries, key=itemgetter(0)))
+            self._dates = [day for day, _ in merged]
+            self._rows = [row for _, row in merged]
+
+    def between(self, start_date: str | None = None, end_date: str | None = None, newest_first: bool = False) -> list[dict]:
+        """Rows whose day is in [start_date, end_date], via binary search. Bounds are converted once, not per row."""
+        lo_day = to_ordinal(start_date) if start_date else None
+        hi_day = to_ordinal(end_date) if end_date else None
+        with self._lock:
+            lo = bisect_left(self._dates, lo_day) if lo_day is not None else 0
+            hi = bisect_right(self._dates, hi_day) if hi_day is not None else len(self._dates)
+            rows = self._rows[lo:hi]
+        if newest_first:
+            rows.reverse()
+        return rows
@@ -0,0 +1,166 @@
+"""
+SQLite-backed persistent tier for the data cache.
+Rows survive process restarts so repeated runs don't refetch the same data.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default time-to-live (seconds) per dataset. None means the rows never expire.
+DEFAULT_TTLS: dict[str, float | None] = {
+    "prices": None,
+    "financial_metrics": 24 * 3600,
+    "line_items": 24 * 3600,
+    "insider_trades": 24 * 3600,
+    "company_news": 6 * 3600,
+    # Raw A-share statements held in memory by akshare_api
+    "ashare_fundamentals": 24 * 3600,
+}
+
+
+def row_key(row: dict, key_field: str | tuple[str, ...]) -> str:
+    """The key a row is stored under; composite key fields are joined with '|' (missing fields count as None)."""
+    if isinstance(key_field, tuple):
+        return "|".join(str(row.get(field)) for field in key_field)
+    return str(row[key_field])
+
+
+def get_ttl(dataset: str) -> float | None:
+    """Get the TTL for a dataset, overridable via DATA_CACHE_TTL_<DATASET> (seconds, <= 0 means never expire)."""
+    value = os.environ.get(f"DATA_CACHE_TTL_{dataset.upper()}")
+    if value is None or value.strip() == "":
+        return DEFAULT_TTLS.get(dataset)
+    ttl = float(value)
+    return ttl if ttl > 0 else None
+
+
+class SQLiteStore:
+    """Persistent row store keyed by (dataset, ticker, row key). Row keys must identify a record, not just its date."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                dataset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (dataset, ticker, key)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS coverage (
+                dataset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                scope TEXT NOT NULL DEFAULT '',
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, dataset: str, ticker: str, ttl: float | None = None) -> tuple[list[dict], float | None]:
+        """Load unexpired rows for a ticker, returning (rows, oldest fetched_at)."""
+        with self._lock:
+            if ttl is not None:
+                expired = self._conn.execute(
+                    "DELETE FROM records WHERE dataset = ? AND ticker = ? AND fetched_at < ?",
+                    (dataset, ticker, time.time() - ttl),
+                ).rowcount
+                if expired:
+                    # Coverage may describe the rows just dropped, so it can no longer be trusted
+                    self._conn.execute("DELETE FROM coverage WHERE dataset = ? AND ticker = ?", (dataset, ticker))
+                self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT data, fetched_at FROM records WHERE dataset = ? AND ticker = ? ORDER BY key",
+                (dataset, ticker),
+            ).fetchall()
+
+        if not rows:
+            return [], None
+        return [json.loads(data) for data, _ in rows], min(fetched_at for _, fetched_at in rows)
+
+    def save(self, dataset: str, ticker: str, rows: list[dict], key_field: str | tuple[str, ...]):
+        """Insert or replace rows for a ticker."""
+        if not rows:
+            return
+        now = time.time()
+        params = [(dataset, ticker, row_key(row, key_field), json.dumps(row, default=str), now) for row in rows]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (dataset, ticker, key, data, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                params,
+            )
+            self._conn.commit()
+
+    def load_coverage(self, dataset: str, ticker: str, ttl: float | None = None) -> list[tuple[str, str, str]]:
+        """Load unexpired (scope, start_date, end_date) intervals already fetched for a ticker."""
+        with self._lock:
+            if ttl is not None:
+                self._conn.execute(
+                    "DELETE FROM coverage WHERE dataset = ? AND ticker = ? AND fetched_at < ?",
+                    (dataset, ticker, time.time() - ttl),
+                )
+                self._conn.commit()
+            return self._conn.execute(
+                "SELECT scope, start_date, end_date FROM coverage WHERE dataset = ? AND ticker = ?",
+                (dataset, ticker),
+            ).fetchall()
+
+    def add_coverage(self, dataset: str, ticker: str, start_date: str, end_date: str, scope: str = ""):
+        """Record that [start_date, end_date] has been fetched for a ticker (within an optional scope)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO coverage (dataset, ticker, scope, start_date, end_date, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (dataset, ticker, scope, start_date, end_date, time.time()),
+            )
+            self._conn.commit()
+
+    def tickers(self, dataset: str) -> list[str]:
+        """Tickers with rows or coverage stored for a dataset."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker FROM records WHERE dataset = ? UNION SELECT ticker FROM coverage WHERE dataset = ?",
+                (dataset, dataset),
+            ).fetchall()
+        return sorted(ticker for (ticker,) in rows)
+
+    def delete(self, dataset: str, ticker: str):
+        """Drop all rows and coverage for a ticker."""
+        with self._lock:
+            self._conn.execute("DELETE FROM records WHERE dataset = ? AND ticker = ?", (dataset, ticker))
+            self._conn.execute("DELETE FROM coverage WHERE dataset = ? AND ticker = ?", (dataset, ticker))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_default_store() -> SQLiteStore | None:
+    """Open the store under DATA_CACHE_DIR (default ~/.cache/ai-hedge-fund). Set DATA_CACHE_DIR to an empty string to disable."""
+    directory = os.environ.get("DATA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-hedge-fund"))
+    if not directory:
+        return None
+    directory = os.path.expanduser(directory)
+    try:
+        return SQLiteStore(os.path.join(directory, "data_cache.sqlite3"))
+    except (OSError, sqlite3.Error) as e:
+        print(f"Persistent data cache disabled: {e}")
+        return None
@@ -0,0 +1,129 @@
+"""
+Disk-backed, content-addressed cache of parsed LLM responses.
+Entries are keyed by a hash of (model, provider, rendered prompt, output schema), so re-running a backtest
+over unchanged data replays the same decisions without calling the provider.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from pydantic import BaseModel
+
+
+def render_prompt(prompt: Any) -> Any:
+    """A JSON-serialisable form of a prompt: a ChatPromptValue, a list of messages or a string."""
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, (list, tuple)):
+        return [[message.type, message.content] if hasattr(message, "content") else str(message) for message in prompt]
+    return str(prompt)
+
+
+def cache_key(model_name: str, model_provider: str, prompt: Any, pydantic_model: type[BaseModel]) -> str:
+    """SHA-256 over the model, provider, rendered prompt and the schema the response is parsed into."""
+    payload = json.dumps(
+        [model_name, str(getattr(model_provider, "value", model_provider)), render_prompt(prompt), pydantic_model.model_json_schema()],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """Parsed LLM responses stored as JSON in SQLite, with hit/miss counters."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                schema TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key: str, pydantic_model: type[BaseModel]) -> BaseModel | None:
+        """The cached response for a key, or None. Entries that no longer fit the schema count as misses."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            try:
+                result = pydantic_model.model_validate_json(row[0])
+                self._count("hits")
+                return result
+            except ValueError:
+                pass
+        self._count("misses")
+        return None
+
+    def put(self, key: str, model_name: str, result: BaseModel):
+        """Store a parsed response. A failed write only costs a future cache miss, so it is reported and ignored."""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, schema, data, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, type(result).__name__, result.model_dump_json(), time.time()),
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing LLM response cache: {e}")
+            return
+        self._count("writes")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = counters["hits"] + counters["misses"]
+        return {**counters, "hit_rate": counters["hits"] / lookups if lookups else 0.0, "entries": entries}
+
+
+_UNSET = object()
+_llm_cache: LLMCache | None | object = _UNSET
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache | None:
+    """
+    The response cache under LLM_CACHE_DIR (default ~/.cache/ai-hedge-fund), opened on first use so .env
+    settings are honoured. Set LLM_CACHE_DIR to an empty string to disable it.
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is _UNSET:
+            directory = os.environ.get("LLM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-hedge-fund"))
+            _llm_cache = None
+            if directory:
+                try:
+                    _llm_cache = LLMCache(os.path.join(os.path.expanduser(directory), "llm_cache.sqlite3"))
+                except (OSError, sqlite3.Error) as e:
+                    print(f"LLM response cache disabled: {e}")
+        return _llm_cache
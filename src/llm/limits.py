@@ -0,0 +1,80 @@
+"""
+Process-wide LLM request limits per provider.
+Every LLM call takes a concurrency slot and draws from request-per-minute and token-per-minute
+budgets; a rate-limited response pauses the whole provider for the wait it asked for.
+
+    LLM_MAX_CONCURRENCY    concurrent requests per provider (default 4)
+    LLM_RPM / LLM_TPM      requests / prompt tokens per minute per provider (default 0 = unlimited)
+
+Each can be set for one provider by appending its name, e.g. LLM_RPM_OPENAI=500 or LLM_MAX_CONCURRENCY_GROQ=2.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+
+from src.llm.cache import render_prompt
+from src.utils.rate_limiter import RateLimiter
+
+
+def _env_number(name: str, provider: str, default: float) -> float:
+    value = os.environ.get(f"{name}_{provider.upper()}") or os.environ.get(name)
+    return float(value) if value else default
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """Rough prompt size in tokens (about four characters per token), enough to pace a TPM budget."""
+    return max(1, len(json.dumps(render_prompt(prompt), default=str)) // 4)
+
+
+class ProviderLimits:
+    """Concurrency cap plus RPM/TPM token buckets shared by all calls to one provider."""
+
+    def __init__(self, max_concurrency: int, rpm: float, tpm: float):
+        self.max_concurrency = max(1, max_concurrency)
+        # All LLM calls run on one event loop, so slots are an asyncio semaphore created on first use there
+        self._slots: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+        # While throttled, new requests wait until this monotonic time
+        self.cooldown_until = 0.0
+        # Budgets refill continuously, so a full minute's worth can be spent in a burst
+        self.requests = RateLimiter(rpm / 60, burst=rpm) if rpm > 0 else RateLimiter(0)
+        self.tokens = RateLimiter(tpm / 60, burst=tpm) if tpm > 0 else RateLimiter(0)
+
+    def pause(self, seconds: float):
+        """Hold back every new request to the provider for a while, e.g. after a 429."""
+        with self._lock:
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    @asynccontextmanager
+    async def aslot(self, prompt: Any):
+        """Hold a concurrency slot and spend the request's budget for the duration of a call."""
+        while (wait := self.cooldown_until - time.monotonic()) > 0:
+            await asyncio.sleep(wait)
+        await self.requests.aacquire()
+        await self.tokens.aacquire(estimate_tokens(prompt))
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            yield
+
+
+_limits: dict[str, ProviderLimits] = {}
+_limits_lock = threading.Lock()
+
+
+def get_provider_limits(model_provider: str) -> ProviderLimits:
+    """The shared limits for a provider, configured from the environment on first use."""
+    provider = str(getattr(model_provider, "value", model_provider))
+    with _limits_lock:
+        if provider not in _limits:
+            _limits[provider] = ProviderLimits(
+                max_concurrency=int(_env_number("LLM_MAX_CONCURRENCY", provider, 4)),
+                rpm=_env_number("LLM_RPM", provider, 0),
+                tpm=_env_number("LLM_TPM", provider, 0),
+            )
+        return _limits[provider]
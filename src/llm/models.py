@@ -1,4 +1,5 @@
 import os
+import threading
 from langchain_anthropic import ChatAnthropic
 from langchain_deepseek import ChatDeepSeek
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -146,4 +147,17 @@ def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | Ch
         if not api_key:
             print(f"API Key Error: Please make sure GOOGLE_API_KEY is set in your .env file.")
             raise ValueError("Google API key not found.  Please make sure GOOGLE_API_KEY is set in your .env file.")
-        return ChatGoogleGenerativeAI(model=model_name, api_key=api_key)
\ No newline at end of file
+        return ChatGoogleGenerativeAI(model=model_name, api_key=api_key)
+
+# (provider, model_name) -> long-lived chat model; each keeps its HTTP connection pool alive between calls
+_model_pool: dict[tuple[str, str], ChatOpenAI | ChatGroq] = {}
+_model_pool_lock = threading.Lock()
+
+
+def get_pooled_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | ChatGroq | None:
+    """Get the shared client for a model, creating it on first use instead of on every call"""
+    key = (ModelProvider(model_provider).value, model_name)
+    with _model_pool_lock:
+        if key not in _model_pool:
+            _model_pool[key] = get_model(model_name, model_provider)
+        return _model_pool[key]
@@ -0,0 +1,151 @@
+"""
+Retry policy and retry metrics for LLM calls.
+Failures are classified so each kind is handled on its own terms: rate limits wait for the provider's
+Retry-After (and pause the whole provider), transient network/server errors and timeouts back off
+exponentially, malformed responses are re-asked straight away, and request errors that can't succeed
+(bad request, auth, unknown model) stop immediately.
+
+    LLM_TIMEOUT        seconds allowed per attempt (default 120)
+    LLM_BACKOFF        base backoff seconds, doubled on every retry (default 1)
+    LLM_BACKOFF_MAX    cap on a single backoff or Retry-After wait (default 60)
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from pydantic import ValidationError
+
+RATE_LIMIT = "rate_limit"
+TIMEOUT = "timeout"
+TRANSIENT = "transient"
+PARSE = "parse"
+FATAL = "fatal"
+
+# Provider SDK exception class names, for errors that carry no HTTP status
+_RATE_LIMIT_NAMES = ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+_TIMEOUT_NAMES = ("APITimeoutError", "ReadTimeout", "ConnectTimeout", "DeadlineExceeded")
+_FATAL_NAMES = ("AuthenticationError", "PermissionDeniedError", "NotFoundError", "BadRequestError", "InvalidArgument", "PermissionDenied")
+
+
+class ResponseParseError(ValueError):
+    """The model answered, but not with JSON that fits the response schema."""
+
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error: Exception) -> str:
+    """One of RATE_LIMIT, TIMEOUT, TRANSIENT, PARSE or FATAL. Unrecognised errors count as transient."""
+    names = {cls.__name__ for cls in type(error).__mro__}
+    status = _status_code(error)
+    if status == 429 or names.intersection(_RATE_LIMIT_NAMES):
+        return RATE_LIMIT
+    if isinstance(error, TimeoutError) or names.intersection(_TIMEOUT_NAMES) or status == 408:
+        return TIMEOUT
+    if isinstance(error, (ResponseParseError, ValidationError, json.JSONDecodeError)) or "OutputParserException" in names:
+        return PARSE
+    # Programming errors fail the same way every time
+    if isinstance(error, (TypeError, AttributeError, NameError)) or names.intersection(_FATAL_NAMES) or status in (400, 401, 403, 404, 422):
+        return FATAL
+    return TRANSIENT
+
+
+def retry_after(error: Exception) -> float | None:
+    """Seconds the provider asked us to wait (Retry-After / retry-after-ms headers), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if value := headers.get("retry-after-ms"):
+            return float(value) / 1000
+        if value := headers.get("retry-after"):
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class RetryPolicy:
+    """Per-attempt timeout and the wait before the next attempt for each kind of failure."""
+
+    def __init__(self, timeout: float | None = None, backoff_base: float | None = None, backoff_max: float | None = None):
+        self.timeout = timeout if timeout is not None else _env_number("LLM_TIMEOUT", 120.0)
+        self.backoff_base = backoff_base if backoff_base is not None else _env_number("LLM_BACKOFF", 1.0)
+        self.backoff_max = backoff_max if backoff_max is not None else _env_number("LLM_BACKOFF_MAX", 60.0)
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def delay(self, kind: str, attempt: int, error: Exception) -> float:
+        """Seconds to wait before retrying after a failure of this kind."""
+        if kind == PARSE:
+            return 0.0
+        if kind == RATE_LIMIT:
+            # Honour the provider's hint; without one wait at least the full (unjittered) backoff
+            wait = retry_after(error)
+            return min(self.backoff_max, wait if wait is not None else self.backoff_base * 2 ** (attempt + 1))
+        return self.backoff(attempt)
+
+
+_COUNTERS = ("calls", "attempts", "successes", "retries", RATE_LIMIT, TIMEOUT, TRANSIENT, PARSE, FATAL, "fallbacks")
+
+
+class RetryStats:
+    """Attempt, error and fallback counters per (agent, model)."""
+
+    def __init__(self):
+        self._counters: dict[tuple[str, str], dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent_name: str | None, model_name: str, **increments):
+        key = (agent_name or "unknown", model_name)
+        with self._lock:
+            counters = self._counters.setdefault(key, dict.fromkeys(_COUNTERS, 0))
+            for name, value in increments.items():
+                counters[name] += value
+
+    def stats(self) -> dict[str, dict[str, dict[str, int]]]:
+        """{agent: {model: counters}}; "fallbacks" counts default responses returned after every attempt failed."""
+        with self._lock:
+            stats: dict[str, dict[str, dict[str, int]]] = {}
+            for (agent_name, model_name), counters in self._counters.items():
+                stats.setdefault(agent_name, {})[model_name] = dict(counters)
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+# Global instances
+_retry_policy: RetryPolicy | None = None
+_retry_stats = RetryStats()
+_retry_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """The shared retry policy, configured from the environment on first use."""
+    global _retry_policy
+    with _retry_policy_lock:
+        if _retry_policy is None:
+            _retry_policy = RetryPolicy()
+        return _retry_policy
+
+
+def get_retry_stats() -> RetryStats:
+    return _retry_stats
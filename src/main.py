@@ -18,6 +18,8 @@ from src.agents.valuation import valuation_agent
 from src.utils.display import print_trading_output
 from src.utils.analysts import ANALYST_ORDER, get_analyst_nodes
 from src.utils.progress import progress
+from src.data.cache import get_cache
+from src.llm.cache import get_llm_cache
 from src.llm.models import LLM_ORDER, get_model_info
 
 import argparse
@@ -189,9 +191,14 @@ if __name__ == "__main__":
     parser.add_argument(
         "--show-agent-graph", action="store_true", help="Show the agent graph"
     )
+    parser.add_argument("--export-data", type=str, help="Write the fetched data to this archive directory after the run (see src/cache_cli.py)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Always call the LLM instead of replaying cached responses to identical prompts")
 
     args = parser.parse_args()
 
+    if args.no_llm_cache and (llm_cache := get_llm_cache()) is not None:
+        llm_cache.enabled = False
+
     if args.tickers:
         tickers = [ticker.strip() for ticker in args.tickers.split(",")]
         invalid_tickers = [ticker for ticker in tickers if not validate_ticker(ticker)]
@@ -319,3 +326,7 @@ if __name__ == "__main__":
         model_provider=model_provider,
     )
     print_trading_output(result)
+
+    if args.export_data:
+        counts = get_cache().export(args.export_data)
+        print(f"\nExported {sum(counts.values())} rows of fetched data to {args.export_data}")
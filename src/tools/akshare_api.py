@@ -3,24 +3,112 @@ AKShare API wrappers for fetching A-share market data.
 Provides functions compatible with the existing API structure.
 """
 
-import akshare as ak
+import os
 import pandas as pd
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
 from datetime import datetime, timedelta
 import numpy as np
 from src.data.models import (
-    Price, 
     FinancialMetrics, 
     LineItem, 
     CompanyNews, 
-    InsiderTrade,
     PriceResponse,
     CompanyNewsResponse
 )
+from src.data.records import Bar, Trade
 from src.data.cache import get_cache
+from src.data.dates import to_iso, to_ordinal
+from src.data.frames import frame_to_records, normalize_frame, records_to_models
+from src.data.intervals import first_unsettled_date
+from src.data.price_series import PriceSeries
+from src.data.store import get_ttl
+from src.tools.akshare_client import get_akshare_client
+from src.utils.singleflight import coalesce
 
 # Global cache instance
 _cache = get_cache()
 
+# Rate-limited, retrying access to the akshare endpoints
+_ak = get_akshare_client()
+
+
+class AshareFundamentals:
+    """Financial statements and indicators of one A-share ticker, each downloaded once on first use."""
+
+    def __init__(self, code: str):
+        self.code = code
+        self.fetched_at = time.time()
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _frame(self, name: str, fetch) -> pd.DataFrame:
+        # Failed downloads are not cached, so the next caller retries
+        with self._lock:
+            if name not in self._frames:
+                self._frames[name] = fetch()
+            return self._frames[name]
+
+    @property
+    def income(self) -> pd.DataFrame:
+        """利润表"""
+        return self._frame("income", lambda: _ak.call("stock_financial_report_sina", symbol=self.code, report_type="利润表"))
+
+    @property
+    def balance(self) -> pd.DataFrame:
+        """资产负债表"""
+        return self._frame("balance", lambda: _ak.call("stock_financial_report_sina", symbol=self.code, report_type="资产负债表"))
+
+    @property
+    def cashflow(self) -> pd.DataFrame:
+        """现金流量表"""
+        return self._frame("cashflow", lambda: _ak.call("stock_financial_report_sina", symbol=self.code, report_type="现金流量表"))
+
+    @property
+    def market(self) -> pd.DataFrame:
+        """Market indicators such as 总市值, 市盈率 and 市净率"""
+        return self._frame("market", lambda: _ak.call("stock_a_lg_indicator", symbol=self.code))
+
+    @property
+    def shares(self) -> pd.DataFrame:
+        """Share structure (总股本)"""
+        return self._frame("shares", lambda: _ak.call("stock_zh_a_structure", symbol=self.code))
+
+
+# akshare column names -> Price fields
+ASHARE_PRICE_COLUMNS = {"开盘": "open", "收盘": "close", "最高": "high", "最低": "low", "成交量": "volume", "日期": "time"}
+INDEX_PRICE_COLUMNS = {"open": "open", "close": "close", "high": "high", "low": "low", "volume": "volume", "date": "time"}
+PRICE_DTYPES = {"open": "float", "close": "float", "high": "float", "low": "float", "volume": "int", "time": "date"}
+
+# ticker -> fundamentals bundle shared by metrics, line items and market cap, least recently used first
+_fundamentals: OrderedDict[str, AshareFundamentals] = OrderedDict()
+_fundamentals_lock = threading.Lock()
+
+
+def _max_fundamentals() -> int:
+    """How many tickers' bundles are kept in memory, from ASHARE_FUNDAMENTALS_MAX_TICKERS (default 200)."""
+    return max(1, int(os.environ.get("ASHARE_FUNDAMENTALS_MAX_TICKERS") or 200))
+
+
+def get_fundamentals(ticker: str) -> AshareFundamentals:
+    """Get the fundamentals bundle for a ticker, starting a fresh one once DATA_CACHE_TTL_ASHARE_FUNDAMENTALS has passed."""
+    ttl = get_ttl("ashare_fundamentals")
+    now = time.time()
+    with _fundamentals_lock:
+        # Expired bundles are dropped whichever ticker they belong to, so tickers no longer requested don't linger
+        if ttl is not None:
+            for key in [key for key, bundle in _fundamentals.items() if now - bundle.fetched_at > ttl]:
+                del _fundamentals[key]
+        bundle = _fundamentals.get(ticker)
+        if bundle is None:
+            bundle = _fundamentals[ticker] = AshareFundamentals(ticker.split(".")[0])
+        _fundamentals.move_to_end(ticker)
+        while len(_fundamentals) > _max_fundamentals():
+            _fundamentals.popitem(last=False)
+        return bundle
+
 def is_ashare_ticker(ticker: str) -> bool:
     """Check if a ticker is an A-share stock code."""
     if "." not in ticker:
@@ -28,8 +116,62 @@ def is_ashare_ticker(ticker: str) -> bool:
     code, exchange = ticker.split(".")
     return (exchange in ["SH", "SZ"] and code.isdigit() and len(code) == 6)
 
-def get_ashare_index_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+def get_ashare_index_prices(ticker: str, start_date: str, end_date: str) -> list[Bar]:
     """获取A股指数价格数据"""
+    return get_ashare_index_price_series(ticker, start_date, end_date).to_bars()
+
+def _report_periods(statement: pd.DataFrame, end_date: str, limit: int) -> list[tuple[str, str]]:
+    """
+    The newest `limit` (statement column, ISO report date) pairs reported up to end_date. Vendor periods
+    may be compact ("20231231") or ISO, so they are compared as day ordinals rather than as text.
+    """
+    end = to_ordinal(end_date)
+    periods = []
+    for column in statement.columns:
+        try:
+            day = to_ordinal(pd.Timestamp(str(column)))
+        except ValueError:
+            continue
+        if day <= end:
+            periods.append((day, column))
+    periods.sort(key=lambda period: period[0], reverse=True)
+    return [(column, to_iso(day)) for day, column in periods[:limit]]
+
+
+# Index histories are only available as a full download, so remember when each was last fetched
+_index_refreshed_at: dict[str, float] = {}
+# Everything up to the download date is covered by a full-history download
+_EARLIEST_INDEX_DATE = "1900-01-01"
+
+
+def get_index_price_series(ticker: str, start_date: str, end_date: str, download) -> PriceSeries:
+    """
+    Serve index prices from the cached full history. `download` returns the whole history as a
+    normalized price frame; it is only called for days not covered yet, at most once per
+    INDEX_REFRESH_SECONDS, and only rows newer than the cached history are converted and appended.
+    """
+    refresh_seconds = float(os.environ.get("INDEX_REFRESH_SECONDS", 3600))
+    refreshed_recently = time.time() - _index_refreshed_at.get(ticker, 0.0) < refresh_seconds
+    if _cache.get_missing_ranges("prices", ticker, start_date, end_date) and not refreshed_recently:
+        history = download()
+        cached_series = _cache.get_price_series(ticker)
+        if cached_series is not None and len(cached_series):
+            # Incremental refresh: only the trailing days after the cached history, plus bars from today
+            # onwards, which may have been cached mid-session and are replaced by the fresh download
+            history = history[(history["time"] > cached_series.time_strings()[-1]) | (history["time"] >= first_unsettled_date())]
+        if not history.empty:
+            _cache.set_prices(ticker, frame_to_records(history))
+        _cache.add_coverage("prices", ticker, _EARLIEST_INDEX_DATE, datetime.now().strftime("%Y-%m-%d"))
+        _index_refreshed_at[ticker] = time.time()
+
+    # 按日期二分查找切片
+    cached_series = _cache.get_price_series(ticker)
+    return cached_series.slice(start_date, end_date) if cached_series is not None else PriceSeries.empty()
+
+
+@coalesce
+def get_ashare_index_price_series(ticker: str, start_date: str, end_date: str) -> PriceSeries:
+    """获取A股指数价格数据（按日期索引的序列）"""
     try:
         # 指数代码映射
         index_mapping = {
@@ -43,101 +185,57 @@ def get_ashare_index_prices(ticker: str, start_date: str, end_date: str) -> list
         if not ak_symbol:
             raise Exception(f"不支持的A股指数: {ticker}")
         
-        # 获取指数数据
-        df = ak.stock_zh_index_daily(symbol=ak_symbol)
+        # 获取完整的指数历史数据，按列转换为价格记录
+        def download() -> pd.DataFrame:
+            return normalize_frame(_ak.call("stock_zh_index_daily", symbol=ak_symbol), INDEX_PRICE_COLUMNS, PRICE_DTYPES)
         
-        # 将字符串日期转换为datetime.date对象
-        start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-        
-        # 确保日期列是datetime类型
-        df['date'] = pd.to_datetime(df['date']).dt.date
-        
-        # 过滤日期范围
-        filtered_df = df[(df['date'] >= start_date_obj) & (df['date'] <= end_date_obj)]
-        
-        # 转换为Price对象列表
-        prices = []
-        for _, row in filtered_df.iterrows():
-            date_str = row['date'].strftime("%Y-%m-%d") if hasattr(row['date'], 'strftime') else str(row['date'])
-            prices.append(Price(
-                open=float(row['open']),
-                close=float(row['close']),
-                high=float(row['high']),
-                low=float(row['low']),
-                volume=int(row['volume']),
-                time=date_str
-            ))
-        
-        # 缓存数据
-        _cache.set_prices(ticker, [p.model_dump() for p in prices])
-        return prices
+        return get_index_price_series(ticker, start_date, end_date, download)
     except Exception as e:
         print(f"获取A股指数数据失败: {ticker} - {str(e)}")
-        return []
+        return PriceSeries.empty()
 
-def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+def get_prices(ticker: str, start_date: str, end_date: str) -> list[Bar]:
     """Fetch A-share price data using akshare"""
+    return get_price_series(ticker, start_date, end_date).to_bars()
+
+@coalesce
+def get_price_series(ticker: str, start_date: str, end_date: str) -> PriceSeries:
+    """Fetch A-share prices as a date-indexed series using akshare"""
     # 检查是否是指数
     if ticker in ["000001.SH", "399001.SZ", "399006.SZ", "000300.SH"]:
-        return get_ashare_index_prices(ticker, start_date, end_date)
-        
-    # 将字符串日期转换为datetime.date对象
-    start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
-    end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
+        return get_ashare_index_price_series(ticker, start_date, end_date)
     
-    # Check cache first
-    if cached_data := _cache.get_prices(ticker):
-        # Filter cached data by date range and convert to Price objects
-        filtered_data = []
-        for price in cached_data:
-            # 将price["time"]转换为datetime.date对象进行比较
-            if isinstance(price["time"], str):
-                price_date = datetime.strptime(price["time"], "%Y-%m-%d").date()
-            else:
-                price_date = price["time"]
-                
-            if start_date_obj <= price_date <= end_date_obj:
-                filtered_data.append(Price(**price))
-                
-        if filtered_data:
-            return filtered_data
-            
     try:
         code = ticker.split(".")[0]
         
-        # Get daily price data - akshare uses different date format
-        start_date_formatted = datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y%m%d")
-        end_date_formatted = datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y%m%d")
-        
-        df = ak.stock_zh_a_hist(
-            symbol=code, 
-            period="daily", 
-            start_date=start_date_formatted, 
-            end_date=end_date_formatted,
-            adjust="qfq"  # Using front-adjusted prices
-        )
-        
-        # Convert to our Price model format
-        prices = []
-        for _, row in df.iterrows():
-            # Handle column name mapping from Chinese to English
-            prices.append(Price(
-                open=float(row['开盘']),  # Open
-                close=float(row['收盘']),  # Close 
-                high=float(row['最高']),  # High
-                low=float(row['最低']),  # Low
-                volume=int(row['成交量']),  # Volume
-                time=row['日期'].strftime("%Y-%m-%d") if isinstance(row['日期'], datetime) else row['日期']
-            ))
-        
-        # Cache the results as dicts
-        _cache.set_prices(ticker, [p.model_dump() for p in prices])
-        return prices
+        # Only fetch the date intervals the cache has not covered yet
+        for gap_start, gap_end in _cache.get_missing_ranges("prices", ticker, start_date, end_date):
+            # Get daily price data - akshare uses different date format
+            df = _ak.call(
+                "stock_zh_a_hist",
+                symbol=code, 
+                period="daily", 
+                start_date=gap_start.replace("-", ""), 
+                end_date=gap_end.replace("-", ""),
+                adjust="qfq"  # Using front-adjusted prices
+            )
+            
+            # Map the Chinese columns to price records column-wise
+            prices = frame_to_records(normalize_frame(df, ASHARE_PRICE_COLUMNS, PRICE_DTYPES)) if not df.empty else []
+            
+            # Cache the results as dicts
+            if prices:
+                _cache.set_prices(ticker, prices)
+            _cache.add_coverage("prices", ticker, gap_start, gap_end)
+
+        # The series is sorted by date so this is a binary-search slice
+        cached_series = _cache.get_price_series(ticker)
+        return cached_series.slice(start_date, end_date) if cached_series is not None else PriceSeries.empty()
     except Exception as e:
         print(f"Error fetching A-share price data for {ticker}: {e}")
-        return []
+        return PriceSeries.empty()
 
+@coalesce
 def get_financial_metrics(
     ticker: str,
     end_date: str,
@@ -145,61 +243,39 @@ def get_financial_metrics(
     limit: int = 10,
 ) -> list[FinancialMetrics]:
     """Fetch A-share financial metrics using akshare"""
-    # 将字符串日期转换为datetime.date对象
-    end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-    
     # Check cache first
     if cached_data := _cache.get_financial_metrics(ticker):
-        # Filter cached data by date and limit
-        filtered_data = []
-        for metric in cached_data:
-            # 将metric["report_period"]转换为datetime.date对象进行比较
-            if isinstance(metric["report_period"], str):
-                report_date = datetime.strptime(metric["report_period"], "%Y-%m-%d").date()
-            else:
-                report_date = metric["report_period"]
-                
-            if report_date <= end_date_obj:
-                filtered_data.append(FinancialMetrics(**metric))
-                
-        filtered_data.sort(key=lambda x: x.report_period, reverse=True)
+        # 缓存按报告期排序，可能混有不同 period（ttm、annual 等）
+        rows = (metric for metric in cached_data.between(end_date=end_date, newest_first=True) if metric["period"] == period)
+        filtered_data = [FinancialMetrics(**metric) for metric in islice(rows, limit)]
         if filtered_data:
-            return filtered_data[:limit]
+            return filtered_data
     
     try:
-        code = ticker.split(".")[0]
-        
-        # Get financial indicators
-        # Note: akshare provides financial data through different functions
-        # based on what metrics you want
+        # Statements are shared with search_line_items and get_market_cap
+        fundamentals = get_fundamentals(ticker)
         
         # Income statement
-        income_df = ak.stock_financial_report_sina(symbol=code, report_type="利润表")
+        income_df = fundamentals.income
         
         # Balance sheet
-        balance_df = ak.stock_financial_report_sina(symbol=code, report_type="资产负债表")
+        balance_df = fundamentals.balance
         
         # Cash flow statement
-        cashflow_df = ak.stock_financial_report_sina(symbol=code, report_type="现金流量表")
-        
-        # Financial ratios
-        ratio_df = ak.stock_financial_analysis_indicator(symbol=code)
+        cashflow_df = fundamentals.cashflow
         
         # Market data for current metrics like P/E ratio
-        market_df = ak.stock_a_lg_indicator(symbol=code)
+        market_df = fundamentals.market
         
         # Merge data by report period
         # This requires careful alignment of dates across datasets
         
         # Get available report periods
-        report_periods = sorted(income_df.columns.tolist(), reverse=True)[:limit]
+        report_periods = _report_periods(income_df, end_date, limit)
         
         # Create metrics for each period
         financial_metrics = []
-        for report_period in report_periods:
-            if report_period > end_date:
-                continue
-
+        for report_period, report_date in report_periods:
             # Extract data for this period
             income_data = income_df[report_period] if report_period in income_df.columns else pd.Series()
             balance_data = balance_df[report_period] if report_period in balance_df.columns else pd.Series()
@@ -244,7 +320,7 @@ def get_financial_metrics(
             # Create FinancialMetrics object
             metric = FinancialMetrics(
                 ticker=ticker,
-                report_period=report_period,
+                report_period=report_date,
                 period=period,
                 currency="CNY",  # Chinese Yuan
                 market_cap=market_cap,
@@ -299,6 +375,7 @@ def get_financial_metrics(
         print(f"Error fetching A-share financial metrics for {ticker}: {e}")
         return []
 
+@coalesce
 def search_line_items(
     ticker: str,
     line_items: list[str],
@@ -308,7 +385,7 @@ def search_line_items(
 ) -> list[LineItem]:
     """Fetch A-share financial line items using akshare"""
     try:
-        code = ticker.split(".")[0]
+        fundamentals = get_fundamentals(ticker)
         
         # Map line item names to their Chinese equivalents in akshare
         line_item_map = {
@@ -336,30 +413,28 @@ def search_line_items(
             "issuance_or_purchase_of_equity_shares": None,  # May need another source
         }
         
-        # Get financial statements
-        income_df = ak.stock_financial_report_sina(symbol=code, report_type="利润表")
-        balance_df = ak.stock_financial_report_sina(symbol=code, report_type="资产负债表")
-        cashflow_df = ak.stock_financial_report_sina(symbol=code, report_type="现金流量表")
+        # Get financial statements (downloaded once per ticker and shared with get_financial_metrics)
+        income_df = fundamentals.income
+        balance_df = fundamentals.balance
+        cashflow_df = fundamentals.cashflow
         
         # Get share info if needed
         shares_df = None
         if "outstanding_shares" in line_items:
             # This is a different call to get share structure
-            shares_df = ak.stock_zh_a_structure(symbol=code)
+            shares_df = fundamentals.shares
         
         # Get available report periods
-        report_periods = sorted(income_df.columns.tolist(), reverse=True)[:limit]
+        report_periods = _report_periods(income_df, end_date, limit)
         
         # Create line items for each period
         all_line_items = []
-        for report_period in report_periods:
-            if report_period > end_date:
-                continue
+        for report_period, report_date in report_periods:
                 
             # Create base line item with required fields
             line_item = LineItem(
                 ticker=ticker,
-                report_period=report_period,
+                report_period=report_date,
                 period=period,
                 currency="CNY",  # Chinese Yuan
             )
@@ -439,61 +514,54 @@ def search_line_items(
         print(f"Error fetching A-share line items for {ticker}: {e}")
         return []
 
+@coalesce
 def get_insider_trades(
     ticker: str,
     end_date: str,
     start_date: str = None,
     limit: int = 1000,
-) -> list[InsiderTrade]:
+) -> list[Trade]:
     """Fetch A-share insider trades using akshare"""
     try:
         code = ticker.split(".")[0]
         
         # Get insider trading data
         # Using executive increase/decrease in holdings as a proxy
-        df = ak.stock_em_executive_hold(symbol=code)
+        df = _ak.call("stock_em_executive_hold", symbol=code)
         
-        # Convert to our InsiderTrade model
-        trades = []
-        for _, row in df.iterrows():
-            # Convert date format if needed
-            filing_date = row["变动截止日"].strftime("%Y-%m-%d") if isinstance(row["变动截止日"], datetime) else row["变动截止日"]
-            
-            # Skip if outside date range
-            if start_date and filing_date < start_date:
-                continue
-            if filing_date > end_date:
-                continue
-                
-            # Determine if it's a buy or sell based on change
-            shares_change = row["变动数量"]
-            
-            trades.append(InsiderTrade(
-                ticker=ticker,
-                issuer=ticker,
-                name=row["高管姓名"],
-                title=row["职务"],
-                is_board_director="董事" in row["职务"] if "职务" in row else None,
-                transaction_date=filing_date,
-                transaction_shares=float(shares_change) if pd.notna(shares_change) else None,
-                transaction_price_per_share=None,  # Not always available
-                transaction_value=None,  # Calculated if price is available
-                shares_owned_before_transaction=None,
-                shares_owned_after_transaction=row["变动后持股数"],
-                security_title="A股",
-                filing_date=filing_date,
-            ))
-            
-            if len(trades) >= limit:
-                break
+        # Convert to our insider trade records column-wise
+        trades_df = normalize_frame(
+            df,
+            {"高管姓名": "name", "职务": "title", "变动截止日": "filing_date", "变动数量": "transaction_shares", "变动后持股数": "shares_owned_after_transaction"},
+            {"filing_date": "date", "transaction_shares": "float", "shares_owned_after_transaction": "float"},
+        )
+        
+        # Skip if outside date range
+        in_range = trades_df["filing_date"] <= end_date
+        if start_date:
+            in_range &= trades_df["filing_date"] >= start_date
+        trades_df = trades_df[in_range].head(limit)
+        
+        trades_df = trades_df.assign(
+            ticker=ticker,
+            issuer=ticker,
+            is_board_director=trades_df["title"].astype(str).str.contains("董事", regex=False),
+            transaction_date=trades_df["filing_date"],
+            transaction_price_per_share=None,  # Not always available
+            transaction_value=None,  # Calculated if price is available
+            shares_owned_before_transaction=None,
+            security_title="A股",
+        )
+        records = frame_to_records(trades_df)
         
         # Cache the results
-        _cache.set_insider_trades(ticker, [trade.model_dump() for trade in trades])
-        return trades
+        _cache.set_insider_trades(ticker, records)
+        return Trade.from_records(records)
     except Exception as e:
         print(f"Error fetching A-share insider trades for {ticker}: {e}")
         return []
 
+@coalesce
 def get_company_news(
     ticker: str,
     end_date: str,
@@ -505,61 +573,54 @@ def get_company_news(
         code = ticker.split(".")[0]
         
         # Get company announcements
-        df = ak.stock_notice_report(symbol=code)
-        
-        # Convert to our CompanyNews model
-        news = []
-        for _, row in df.iterrows():
-            news_date = row["日期"] if isinstance(row["日期"], str) else row["日期"].strftime("%Y-%m-%d")
-            
-            # Skip if outside date range
-            if start_date and news_date < start_date:
-                continue
-            if news_date > end_date:
-                continue
-                
-            # Simple sentiment analysis based on title
-            # This is very basic - in production you would use a proper NLP model
-            positive_words = ["增长", "盈利", "利好", "上涨", "突破", "提升"]
-            negative_words = ["下跌", "亏损", "风险", "下降", "违规", "处罚"]
-            
-            sentiment = "neutral"
-            title = row["标题"]
-            if any(word in title for word in positive_words):
-                sentiment = "positive"
-            elif any(word in title for word in negative_words):
-                sentiment = "negative"
-                
-            news.append(CompanyNews(
-                ticker=ticker,
-                title=title,
-                author="公司公告",  # Company announcement
-                source="上海证券交易所" if ticker.endswith(".SH") else "深圳证券交易所",  # Exchange based on ticker
-                date=news_date,
-                url=row["URL"] if "URL" in row else "",
-                sentiment=sentiment,
-            ))
-            
-            if len(news) >= limit:
-                break
+        df = _ak.call("stock_notice_report", symbol=code)
+        
+        # Convert to our CompanyNews model column-wise
+        columns = {"标题": "title", "日期": "date"}
+        if "URL" in df.columns:
+            columns["URL"] = "url"
+        news_df = normalize_frame(df, columns, {"title": "str", "date": "date"})
+        
+        # Skip if outside date range
+        in_range = news_df["date"] <= end_date
+        if start_date:
+            in_range &= news_df["date"] >= start_date
+        news_df = news_df[in_range].head(limit)
+        
+        # Simple sentiment analysis based on title
+        # This is very basic - in production you would use a proper NLP model
+        positive_words = ["增长", "盈利", "利好", "上涨", "突破", "提升"]
+        negative_words = ["下跌", "亏损", "风险", "下降", "违规", "处罚"]
+        is_positive = news_df["title"].str.contains("|".join(positive_words))
+        is_negative = news_df["title"].str.contains("|".join(negative_words))
+        sentiment = np.where(is_positive, "positive", np.where(is_negative, "negative", "neutral"))
+        
+        news_df = news_df.assign(
+            ticker=ticker,
+            author="公司公告",  # Company announcement
+            source="上海证券交易所" if ticker.endswith(".SH") else "深圳证券交易所",  # Exchange based on ticker
+            sentiment=sentiment,
+        )
+        if "url" not in news_df.columns:
+            news_df["url"] = ""
+        records = frame_to_records(news_df)
         
         # Cache the results
-        _cache.set_company_news(ticker, [n.model_dump() for n in news])
-        return news
+        _cache.set_company_news(ticker, records)
+        return records_to_models(records, CompanyNews)
     except Exception as e:
         print(f"Error fetching A-share company news for {ticker}: {e}")
         return []
 
+@coalesce
 def get_market_cap(
     ticker: str,
     end_date: str,
 ) -> float:
     """Fetch A-share market cap using akshare"""
     try:
-        code = ticker.split(".")[0]
-        
-        # Get market data
-        df = ak.stock_a_lg_indicator(symbol=code)
+        # Get market data, shared with get_financial_metrics
+        df = get_fundamentals(ticker).market
         
         # Extract market cap
         if "总市值" in df.index:
@@ -0,0 +1,129 @@
+"""
+Scheduler for akshare endpoints.
+Every ak.* call goes through a per-endpoint token bucket and concurrency cap, is retried with backoff
+when the upstream site throttles or drops the connection, and is counted so failures are visible
+instead of disappearing into the wrappers' `except Exception: return []`.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+import akshare as ak
+import requests
+
+from src.utils.rate_limiter import RateLimiter
+
+# Errors that usually mean throttling or a flaky connection (a blocked request often returns an HTML page,
+# which fails to decode as JSON); anything else is a real error and is raised straight away
+RETRYABLE_ERRORS = (requests.RequestException, ConnectionError, TimeoutError, json.JSONDecodeError)
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class _Endpoint:
+    """Token bucket, concurrency cap, shared cooldown and counters for one akshare function."""
+
+    def __init__(self, rate: float, max_concurrency: int):
+        self.limiter = RateLimiter(rate)
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        # While throttled, every caller of the endpoint waits until this monotonic time
+        self.cooldown_until = 0.0
+        self.counters = {"calls": 0, "retries": 0, "failures": 0, "total_latency": 0.0}
+        self.last_error: str | None = None
+
+
+class AkshareClient:
+    """Calls akshare functions by name under per-endpoint rate limits, with retries and failure accounting."""
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        backoff_base: float | None = None,
+        backoff_max: float = 60.0,
+    ):
+        self.rate = rate if rate is not None else _env_number("AKSHARE_RATE_LIMIT", 2.0)
+        self.max_concurrency = max_concurrency or int(_env_number("AKSHARE_MAX_CONCURRENCY", 2))
+        self.max_retries = max_retries if max_retries is not None else int(_env_number("AKSHARE_MAX_RETRIES", 3))
+        self.backoff_base = backoff_base if backoff_base is not None else _env_number("AKSHARE_BACKOFF", 1.0)
+        self.backoff_max = backoff_max
+        self._endpoints: dict[str, _Endpoint] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, name: str) -> _Endpoint:
+        """The endpoint's state; AKSHARE_RATE_LIMIT_<NAME> overrides the rate for one function."""
+        with self._lock:
+            if name not in self._endpoints:
+                rate = _env_number(f"AKSHARE_RATE_LIMIT_{name.upper()}", self.rate)
+                self._endpoints[name] = _Endpoint(rate, self.max_concurrency)
+            return self._endpoints[name]
+
+    def _count(self, endpoint: _Endpoint, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                endpoint.counters[name] += value
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def call(self, name: str, *args, **kwargs):
+        """Call ak.<name>(*args, **kwargs), retrying throttled or dropped requests."""
+        func = getattr(ak, name)
+        endpoint = self._endpoint(name)
+        for attempt in range(self.max_retries + 1):
+            with endpoint.slots:
+                if (wait := endpoint.cooldown_until - time.monotonic()) > 0:
+                    time.sleep(wait)
+                endpoint.limiter.acquire()
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except RETRYABLE_ERRORS as e:
+                    self._count(endpoint, calls=1, total_latency=time.perf_counter() - start)
+                    endpoint.last_error = f"{type(e).__name__}: {e}"
+                    if attempt == self.max_retries:
+                        self._count(endpoint, failures=1)
+                        raise
+                    self._count(endpoint, retries=1)
+                    # Back the whole endpoint off, not just this caller, so parallel requests don't keep hitting a throttled site
+                    delay = self._backoff(attempt)
+                    with self._lock:
+                        endpoint.cooldown_until = max(endpoint.cooldown_until, time.monotonic() + delay)
+                    continue
+                except Exception as e:
+                    self._count(endpoint, calls=1, failures=1, total_latency=time.perf_counter() - start)
+                    endpoint.last_error = f"{type(e).__name__}: {e}"
+                    raise
+            self._count(endpoint, calls=1, total_latency=time.perf_counter() - start)
+            return result
+
+    def stats(self) -> dict[str, dict]:
+        """Per-endpoint call, retry and failure counters."""
+        with self._lock:
+            stats = {}
+            for name, endpoint in self._endpoints.items():
+                counters = dict(endpoint.counters)
+                total_latency = counters.pop("total_latency")
+                stats[name] = {
+                    **counters,
+                    "avg_latency_ms": (total_latency / counters["calls"] * 1000) if counters["calls"] else 0.0,
+                    "last_error": endpoint.last_error,
+                }
+            return stats
+
+
+# Global client instance
+_akshare_client = AkshareClient()
+
+
+def get_akshare_client() -> AkshareClient:
+    """Get the global akshare client instance."""
+    return _akshare_client
@@ -1,28 +1,35 @@
+import asyncio
 import os
 import pandas as pd
-import requests
-from datetime import datetime, timedelta
+from datetime import datetime
+from itertools import islice
 import numpy as np
-import akshare as ak
 
 from src.data.cache import get_cache
+from src.data.dates import to_iso, to_ordinal
+from src.data.frames import normalize_frame, records_to_models
+from src.data.price_series import PriceSeries
+from src.data.snapshot import SnapshotStore, get_snapshot
+from src.tools.akshare_client import get_akshare_client
+from src.tools.http_client import HTTPRequest, RequestFlow, get_http_client
+from src.utils.singleflight import coalesce
 from src.data.models import (
     CompanyNews,
     CompanyNewsResponse,
     FinancialMetrics,
     FinancialMetricsResponse,
-    Price,
-    PriceResponse,
     LineItem,
     LineItemResponse,
-    InsiderTrade,
-    InsiderTradeResponse,
 )
+from src.data.records import Bar, Trade
 
 # Import akshare wrapper
 from src.tools.akshare_api import (
+    INDEX_PRICE_COLUMNS,
+    PRICE_DTYPES,
+    get_index_price_series,
     is_ashare_ticker,
-    get_prices as get_ashare_prices,
+    get_price_series as get_ashare_price_series,
     get_financial_metrics as get_ashare_financial_metrics,
     search_line_items as search_ashare_line_items,
     get_insider_trades as get_ashare_insider_trades,
@@ -33,61 +40,64 @@ from src.tools.akshare_api import (
 # Global cache instance
 _cache = get_cache()
 
+# Shared keep-alive HTTP client for financialdatasets.ai
+_http = get_http_client()
 
-def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+# Rate-limited, retrying access to the akshare endpoints
+_ak = get_akshare_client()
+
+
+def _latest_snapshot_rows(snapshot: SnapshotStore, dataset: str, ticker: str, end_date: str, period: str, limit: int) -> list[dict]:
+    """The newest `limit` snapshot rows for a period reported up to end_date."""
+    rows = [row for row in snapshot.read(dataset, ticker, end_date=end_date) if row.get("period", period) == period]
+    rows.sort(key=lambda row: row["report_period"], reverse=True)
+    return rows[:limit]
+
+
+def get_prices(ticker: str, start_date: str, end_date: str) -> list[Bar]:
     """Fetch price data from cache or API, supporting both US stocks and A-shares."""
+    return get_price_series(ticker, start_date, end_date).to_bars()
+
+
+@coalesce
+def get_price_series(ticker: str, start_date: str, end_date: str) -> PriceSeries:
+    """Fetch a date-indexed price series from cache or API, without building Price objects."""
+    # Offline snapshot mode reads local files instead of calling any API
+    if (snapshot := get_snapshot()) is not None:
+        return PriceSeries.from_records(snapshot.read("prices", ticker, start_date, end_date))
+
     # 处理美股指数
     if ticker.startswith("^"):
-        return get_us_index_prices(ticker, start_date, end_date)
+        return get_us_index_price_series(ticker, start_date, end_date)
     
     # Determine if this is an A-share ticker
     if is_ashare_ticker(ticker):
-        return get_ashare_prices(ticker, start_date, end_date)
+        return get_ashare_price_series(ticker, start_date, end_date)
     
     # Original US stock implementation
-    # 将字符串日期转换为datetime.date对象
-    start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
-    end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-    
-    # Check cache first
-    if cached_data := _cache.get_prices(ticker):
-        # Filter cached data by date range and convert to Price objects
-        filtered_data = []
-        for price in cached_data:
-            # 将price["time"]转换为datetime.date对象进行比较
-            if isinstance(price["time"], str):
-                price_date = datetime.strptime(price["time"], "%Y-%m-%d").date()
-            else:
-                price_date = price["time"]
-                
-            if start_date_obj <= price_date <= end_date_obj:
-                filtered_data.append(Price(**price))
-                
-        if filtered_data:
-            return filtered_data
+    return _http.run(_price_series_flow(ticker, start_date, end_date))
 
-    # If not in cache or no data in range, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
 
-    url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+def _price_series_flow(ticker: str, start_date: str, end_date: str) -> RequestFlow:
+    # Only fetch the date intervals the cache has not covered yet
+    for gap_start, gap_end in _cache.get_missing_ranges("prices", ticker, start_date, end_date):
+        url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={gap_start}&end_date={gap_end}"
+        response = yield HTTPRequest("GET", url)
+        if response.status_code != 200:
+            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
 
-    # Parse response with Pydantic model
-    price_response = PriceResponse(**response.json())
-    prices = price_response.prices
+        # Bars go straight into the columnar series; no per-bar model is built
+        prices = response.json().get("prices") or []
+        if prices:
+            _cache.set_prices(ticker, prices)
+        _cache.add_coverage("prices", ticker, gap_start, gap_end)
 
-    if not prices:
-        return []
-
-    # Cache the results as dicts
-    _cache.set_prices(ticker, [p.model_dump() for p in prices])
-    return prices
+    # The series is sorted by date so this is a binary-search slice
+    cached_series = _cache.get_price_series(ticker)
+    return cached_series.slice(start_date, end_date) if cached_series is not None else PriceSeries.empty()
 
 
+@coalesce
 def get_financial_metrics(
     ticker: str,
     end_date: str,
@@ -95,26 +105,30 @@ def get_financial_metrics(
     limit: int = 10,
 ) -> list[FinancialMetrics]:
     """Fetch financial metrics from cache or API, supporting both US stocks and A-shares."""
+    # Offline snapshot mode reads local files instead of calling any API
+    if (snapshot := get_snapshot()) is not None:
+        return [FinancialMetrics(**row) for row in _latest_snapshot_rows(snapshot, "financial_metrics", ticker, end_date, period, limit)]
+
     # Determine if this is an A-share ticker
     if is_ashare_ticker(ticker):
         return get_ashare_financial_metrics(ticker, end_date, period, limit)
     
     # Original US stock implementation
+    return _http.run(_financial_metrics_flow(ticker, end_date, period, limit))
+
+
+def _financial_metrics_flow(ticker: str, end_date: str, period: str, limit: int) -> RequestFlow:
     # Check cache first
     if cached_data := _cache.get_financial_metrics(ticker):
-        # Filter cached data by date and limit
-        filtered_data = [FinancialMetrics(**metric) for metric in cached_data if metric["report_period"] <= end_date]
-        filtered_data.sort(key=lambda x: x.report_period, reverse=True)
+        # Cached rows are sorted by report period and may mix periods (ttm, annual...)
+        rows = (metric for metric in cached_data.between(end_date=end_date, newest_first=True) if metric["period"] == period)
+        filtered_data = [FinancialMetrics(**metric) for metric in islice(rows, limit)]
         if filtered_data:
-            return filtered_data[:limit]
+            return filtered_data
 
     # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
     url = f"https://api.financialdatasets.ai/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
-    response = requests.get(url, headers=headers)
+    response = yield HTTPRequest("GET", url)
     if response.status_code != 200:
         raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
 
@@ -131,6 +145,7 @@ def get_financial_metrics(
     return financial_metrics
 
 
+@coalesce
 def search_line_items(
     ticker: str,
     line_items: list[str],
@@ -139,106 +154,188 @@ def search_line_items(
     limit: int = 10,
 ) -> list[LineItem]:
     """Fetch line items, supporting both US stocks and A-shares."""
+    # Offline snapshot mode reads local files instead of calling any API
+    if (snapshot := get_snapshot()) is not None:
+        fields = set(_LINE_ITEM_BASE_FIELDS) | set(line_items)
+        rows = _latest_snapshot_rows(snapshot, "line_items", ticker, end_date, period, limit)
+        return [LineItem(**{field: value for field, value in row.items() if field in fields}) for row in rows]
+
     # Determine if this is an A-share ticker
     if is_ashare_ticker(ticker):
         return search_ashare_line_items(ticker, line_items, end_date, period, limit)
     
     # Original US stock implementation
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
+    return _http.run(_line_items_flow(ticker, line_items, end_date, period, limit))
 
-    url = "https://api.financialdatasets.ai/financials/search/line-items"
 
-    body = {
-        "tickers": [ticker],
-        "line_items": line_items,
-        "end_date": end_date,
-        "period": period,
-        "limit": limit,
-    }
-    response = requests.post(url, headers=headers, json=body)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-    data = response.json()
-    response_model = LineItemResponse(**data)
-    search_results = response_model.search_results
-    if not search_results:
+# Line item coverage starts here when the API returned every report period it has
+_EARLIEST_REPORT_PERIOD = "1900-01-01"
+
+# Fields every LineItem carries regardless of which line items were requested
+_LINE_ITEM_BASE_FIELDS = ("ticker", "report_period", "period", "currency")
+
+
+def _cached_line_item_rows(ticker: str, end_date: str, period: str, limit: int) -> list[dict]:
+    """The newest `limit` cached rows for a period, up to end_date."""
+    cached = _cache.get_line_items(ticker)
+    if cached is None:
         return []
+    return list(islice((row for row in cached.between(end_date=end_date, newest_first=True) if row["period"] == period), limit))
 
-    # Cache the results
-    return search_results[:limit]
+
+def _missing_line_items(ticker: str, line_items: list[str], end_date: str, period: str, limit: int) -> list[str]:
+    """Requested line item names not yet fetched for every report period the request needs."""
+    rows = _cached_line_item_rows(ticker, end_date, period, limit)
+    # With fewer than `limit` rows cached, anything back to the earliest period may still be missing
+    start_date = rows[-1]["report_period"] if len(rows) >= limit else _EARLIEST_REPORT_PERIOD
+    return [
+        name for name in line_items
+        if _cache.get_missing_ranges("line_items", ticker, start_date, end_date, scope=f"{period}:{name}")
+    ]
 
 
+def _line_items_flow(ticker: str, line_items: list[str], end_date: str, period: str, limit: int) -> RequestFlow:
+    results = yield from _line_items_many_flow([ticker], line_items, end_date, period, limit)
+    return results[ticker]
+
+
+@coalesce
+def search_line_items_many(
+    tickers: list[str],
+    line_items: list[str],
+    end_date: str,
+    period: str = "ttm",
+    limit: int = 10,
+) -> dict[str, list[LineItem]]:
+    """Fetch line items for several tickers, batching US tickers into shared requests."""
+    if get_snapshot() is not None:
+        return {ticker: search_line_items(ticker, line_items, end_date, period, limit) for ticker in tickers}
+
+    results = {ticker: search_ashare_line_items(ticker, line_items, end_date, period, limit) for ticker in tickers if is_ashare_ticker(ticker)}
+    us_tickers = [ticker for ticker in dict.fromkeys(tickers) if not is_ashare_ticker(ticker)]
+    if us_tickers:
+        results.update(_http.run(_line_items_many_flow(us_tickers, line_items, end_date, period, limit)))
+    return results
+
+
+def _line_items_many_flow(tickers: list[str], line_items: list[str], end_date: str, period: str, limit: int) -> RequestFlow:
+    # Only ask the API for line items the cache doesn't hold yet
+    missing = {ticker: names for ticker in tickers if (names := _missing_line_items(ticker, line_items, end_date, period, limit))}
+    pending = list(missing)
+    batch_size = max(1, int(os.environ.get("FD_LINE_ITEM_BATCH_SIZE", 10)))
+    chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    url = "https://api.financialdatasets.ai/financials/search/line-items"
+
+    while chunks:
+        chunk_fields = [list(dict.fromkeys(name for ticker in chunk for name in missing[ticker])) for chunk in chunks]
+        # The API may apply the limit to the whole batch, so ask for enough rows for every ticker in it
+        responses = yield [
+            HTTPRequest("POST", url, json={"tickers": chunk, "line_items": fields, "end_date": end_date, "period": period, "limit": limit * len(chunk)})
+            for chunk, fields in zip(chunks, chunk_fields)
+        ]
+
+        retry = []
+        for chunk, fields, response in zip(chunks, chunk_fields, responses):
+            if response.status_code != 200:
+                raise Exception(f"Error fetching data: {', '.join(chunk)} - {response.status_code} - {response.text}")
+            data = response.json()
+            response_model = LineItemResponse(**data)
+            search_results = response_model.search_results
+
+            # Split the results back out per ticker
+            by_ticker = {ticker: [] for ticker in chunk}
+            for item in search_results:
+                by_ticker.setdefault(item.ticker, []).append(item)
+
+            for ticker in chunk:
+                items = by_ticker[ticker]
+                # Cache the results; fields are merged into rows already cached for the same report period
+                if items:
+                    _cache.set_line_items(ticker, [item.model_dump() for item in items])
+                # A short response means the API has nothing older, otherwise coverage starts at the oldest period returned
+                if len(items) >= limit:
+                    covered_from = min(item.report_period for item in items)
+                elif len(search_results) < limit * len(chunk):
+                    covered_from = _EARLIEST_REPORT_PERIOD
+                elif len(chunk) > 1:
+                    # Other tickers used up the batch's shared limit, so ask for this one on its own
+                    retry.append(ticker)
+                    continue
+                elif items:
+                    covered_from = min(item.report_period for item in items)
+                else:
+                    continue
+                # Coverage spans report periods, not trading days, so it runs up to end_date even when that is today;
+                # the line_items TTL is what picks up newly filed reports
+                for name in fields:
+                    _cache.add_coverage("line_items", ticker, covered_from, end_date, scope=f"{period}:{name}", settled_only=False)
+        chunks = [[ticker] for ticker in retry]
+
+    fields = set(_LINE_ITEM_BASE_FIELDS) | set(line_items)
+    return {
+        ticker: [
+            LineItem(**{field: value for field, value in row.items() if field in fields})
+            for row in _cached_line_item_rows(ticker, end_date, period, limit)
+        ]
+        for ticker in tickers
+    }
+
+
+@coalesce
 def get_insider_trades(
     ticker: str,
     end_date: str,
     start_date: str | None = None,
     limit: int = 1000,
-) -> list[InsiderTrade]:
+) -> list[Trade]:
     """Fetch insider trades, supporting both US stocks and A-shares."""
+    # Offline snapshot mode reads local files instead of calling any API
+    if (snapshot := get_snapshot()) is not None:
+        rows = sorted(snapshot.read("insider_trades", ticker, start_date, end_date), key=lambda row: row["filing_date"], reverse=True)
+        return Trade.from_records(rows[:limit])
+
     # Determine if this is an A-share ticker
     if is_ashare_ticker(ticker):
         return get_ashare_insider_trades(ticker, end_date, start_date, limit)
     
     # Original US stock implementation
+    return _http.run(_insider_trades_flow(ticker, end_date, start_date, limit))
+
+
+def _insider_trades_flow(ticker: str, end_date: str, start_date: str | None, limit: int) -> RequestFlow:
     # Check cache first
     if cached_data := _cache.get_insider_trades(ticker):
-        # Filter cached data by date range
-        filtered_data = [InsiderTrade(**trade) for trade in cached_data 
-                        if (start_date is None or (trade.get("transaction_date") or trade["filing_date"]) >= start_date)
-                        and (trade.get("transaction_date") or trade["filing_date"]) <= end_date]
-        filtered_data.sort(key=lambda x: x.transaction_date or x.filing_date, reverse=True)
+        # Cached trades are ordered by transaction date (filing date when unknown), so the range is a slice
+        filtered_data = Trade.from_records(cached_data.between(start_date, end_date, newest_first=True))
         if filtered_data:
             return filtered_data
 
     # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    all_trades = []
-    current_end_date = end_date
-    
-    while True:
-        url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_lte={current_end_date}"
-        if start_date:
-            url += f"&filing_date_gte={start_date}"
-        url += f"&limit={limit}"
-        
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-        
-        data = response.json()
-        response_model = InsiderTradeResponse(**data)
-        insider_trades = response_model.insider_trades
-        
-        if not insider_trades:
-            break
-            
-        all_trades.extend(insider_trades)
-        
-        # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(insider_trades) < limit:
-            break
-            
-        # Update end_date to the oldest filing date from current batch for next iteration
-        current_end_date = min(trade.filing_date for trade in insider_trades).split('T')[0]
-        
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
-            break
+    def url_for(page_end_date: str, page_start_date: str | None) -> str:
+        url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_lte={page_end_date}"
+        if page_start_date:
+            url += f"&filing_date_gte={page_start_date}"
+        return url + f"&limit={limit}"
+
+    all_trades = yield from _sharded_pages_flow(
+        ticker,
+        url_for,
+        lambda data: [Trade.from_dict(trade).as_dict() for trade in data["insider_trades"]],
+        lambda trade: trade["filing_date"],
+        end_date,
+        start_date,
+        limit,
+    )
 
     if not all_trades:
         return []
 
     # Cache the results
-    _cache.set_insider_trades(ticker, [trade.model_dump() for trade in all_trades])
-    return all_trades
+    _cache.set_insider_trades(ticker, all_trades)
+    return Trade.from_records(all_trades)
 
 
+@coalesce
 def get_company_news(
     ticker: str,
     end_date: str,
@@ -246,78 +343,127 @@ def get_company_news(
     limit: int = 1000,
 ) -> list[CompanyNews]:
     """Fetch company news, supporting both US stocks and A-shares."""
+    # Offline snapshot mode reads local files instead of calling any API
+    if (snapshot := get_snapshot()) is not None:
+        rows = sorted(snapshot.read("company_news", ticker, start_date, end_date), key=lambda row: row["date"], reverse=True)
+        # A CSV column with no urls at all reads back as null
+        return [CompanyNews(**{**row, "url": row.get("url") or ""}) for row in rows[:limit]]
+
     # Determine if this is an A-share ticker
     if is_ashare_ticker(ticker):
         return get_ashare_company_news(ticker, end_date, start_date, limit)
     
     # Original US stock implementation
+    return _http.run(_company_news_flow(ticker, end_date, start_date, limit))
+
+
+def _company_news_flow(ticker: str, end_date: str, start_date: str | None, limit: int) -> RequestFlow:
     # Check cache first
     if cached_data := _cache.get_company_news(ticker):
-        # Filter cached data by date range
-        filtered_data = [CompanyNews(**news) for news in cached_data 
-                        if (start_date is None or news["date"] >= start_date)
-                        and news["date"] <= end_date]
-        filtered_data.sort(key=lambda x: x.date, reverse=True)
+        # Cached news is sorted by date, so the range is a slice
+        filtered_data = [CompanyNews(**news) for news in cached_data.between(start_date, end_date, newest_first=True)]
         if filtered_data:
             return filtered_data
 
     # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    all_news = []
-    current_end_date = end_date
-    
-    while True:
-        url = f"https://api.financialdatasets.ai/news/?ticker={ticker}&end_date={current_end_date}"
-        if start_date:
-            url += f"&start_date={start_date}"
-        url += f"&limit={limit}"
-        
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-        
-        data = response.json()
-        response_model = CompanyNewsResponse(**data)
-        company_news = response_model.news
-        
-        if not company_news:
-            break
-            
-        all_news.extend(company_news)
-        
-        # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(company_news) < limit:
-            break
-            
-        # Update end_date to the oldest date from current batch for next iteration
-        current_end_date = min(news.date for news in company_news).split('T')[0]
-        
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
-            break
+    def url_for(page_end_date: str, page_start_date: str | None) -> str:
+        url = f"https://api.financialdatasets.ai/news/?ticker={ticker}&end_date={page_end_date}"
+        if page_start_date:
+            url += f"&start_date={page_start_date}"
+        return url + f"&limit={limit}"
+
+    all_news = yield from _sharded_pages_flow(
+        ticker,
+        url_for,
+        lambda data: [news.model_dump() for news in CompanyNewsResponse(**data).news],
+        lambda news: news["date"],
+        end_date,
+        start_date,
+        limit,
+    )
 
     if not all_news:
         return []
 
     # Cache the results
-    _cache.set_company_news(ticker, [news.model_dump() for news in all_news])
-    return all_news
-
-
+    _cache.set_company_news(ticker, all_news)
+    return records_to_models(all_news, CompanyNews)
+
+
+def _date_shards(start_date: str, end_date: str, count: int) -> list[tuple[str, str]]:
+    """Split [start_date, end_date] into up to `count` contiguous, non-overlapping shards of at least a month."""
+    start, end = to_ordinal(start_date), to_ordinal(end_date)
+    days = end - start + 1
+    count = max(1, min(count, days // 30))
+    return [(to_iso(start + days * i // count), to_iso(start + days * (i + 1) // count - 1)) for i in range(count)]
+
+
+def _sharded_pages_flow(ticker, url_for, parse_page, item_date, end_date: str, start_date: str | None, limit: int) -> RequestFlow:
+    """
+    Fetch a backwards-paginated endpoint as record dicts. Without a start_date only the first page is fetched.
+    Otherwise [start_date, end_date] is split into date shards whose pages are requested concurrently,
+    with at most FD_MAX_INFLIGHT_PAGES requests in flight. Identical records from overlapping page
+    boundaries are dropped.
+    """
+    if not start_date:
+        response = yield HTTPRequest("GET", url_for(end_date, None))
+        if response.status_code != 200:
+            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+        return parse_page(response.json())
+
+    max_in_flight = max(1, int(os.environ.get("FD_MAX_INFLIGHT_PAGES", 4)))
+    # Each pending shard is [shard_start, current page end]
+    pending = [list(shard) for shard in _date_shards(start_date, end_date, max_in_flight)]
+    items = []
+    seen = set()
+
+    while pending:
+        batch, pending = pending[:max_in_flight], pending[max_in_flight:]
+        responses = yield [HTTPRequest("GET", url_for(page_end, shard_start)) for shard_start, page_end in batch]
+
+        for (shard_start, page_end), response in zip(batch, responses):
+            if response.status_code != 200:
+                raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+            page = parse_page(response.json())
+            for item in page:
+                identity = tuple(item.items())
+                if identity not in seen:
+                    seen.add(identity)
+                    items.append(item)
+
+            # Only continue paginating a shard that returned a full page
+            if len(page) < limit:
+                continue
+            # Move the shard's end to the oldest date in this page; stop if it no longer advances
+            next_page_end = min(item_date(item) for item in page).split("T")[0]
+            if shard_start < next_page_end < page_end:
+                pending.append([shard_start, next_page_end])
+
+    items.sort(key=item_date, reverse=True)
+    return items
+
+
+@coalesce
 def get_market_cap(
     ticker: str,
     end_date: str,
 ) -> float | None:
     """Fetch market cap, supporting both US stocks and A-shares."""
+    # Offline snapshot mode reads local files instead of calling any API
+    if (snapshot := get_snapshot()) is not None:
+        rows = _latest_snapshot_rows(snapshot, "financial_metrics", ticker, end_date, "ttm", 1)
+        return rows[0].get("market_cap") if rows else None
+
     # Determine if this is an A-share ticker
     if is_ashare_ticker(ticker):
         return get_ashare_market_cap(ticker, end_date)
     
     # Original US stock implementation
-    financial_metrics = get_financial_metrics(ticker, end_date)
+    return _http.run(_market_cap_flow(ticker, end_date))
+
+
+def _market_cap_flow(ticker: str, end_date: str) -> RequestFlow:
+    financial_metrics = yield from _financial_metrics_flow(ticker, end_date, "ttm", 10)
     if not financial_metrics:
         return None
         
@@ -328,9 +474,120 @@ def get_market_cap(
     return market_cap
 
 
-def prices_to_df(prices: list[Price]) -> pd.DataFrame:
+# ----- Async variants -----
+# Same signatures and caching semantics as the functions above. US data is fetched over
+# the shared httpx client; akshare is blocking, so A-share and index calls run in a worker thread.
+
+@coalesce
+async def aget_price_series(ticker: str, start_date: str, end_date: str) -> PriceSeries:
+    """Async version of get_price_series."""
+    if ticker.startswith("^") or is_ashare_ticker(ticker) or get_snapshot() is not None:
+        return await asyncio.to_thread(get_price_series, ticker, start_date, end_date)
+    return await _http.arun(_price_series_flow(ticker, start_date, end_date))
+
+
+async def aget_prices(ticker: str, start_date: str, end_date: str) -> list[Bar]:
+    """Async version of get_prices."""
+    return (await aget_price_series(ticker, start_date, end_date)).to_bars()
+
+
+@coalesce
+async def aget_financial_metrics(
+    ticker: str,
+    end_date: str,
+    period: str = "ttm",
+    limit: int = 10,
+) -> list[FinancialMetrics]:
+    """Async version of get_financial_metrics."""
+    if get_snapshot() is not None:
+        return await asyncio.to_thread(get_financial_metrics, ticker, end_date, period, limit)
+    if is_ashare_ticker(ticker):
+        return await asyncio.to_thread(get_ashare_financial_metrics, ticker, end_date, period, limit)
+    return await _http.arun(_financial_metrics_flow(ticker, end_date, period, limit))
+
+
+@coalesce
+async def asearch_line_items(
+    ticker: str,
+    line_items: list[str],
+    end_date: str,
+    period: str = "ttm",
+    limit: int = 10,
+) -> list[LineItem]:
+    """Async version of search_line_items."""
+    if get_snapshot() is not None:
+        return await asyncio.to_thread(search_line_items, ticker, line_items, end_date, period, limit)
+    if is_ashare_ticker(ticker):
+        return await asyncio.to_thread(search_ashare_line_items, ticker, line_items, end_date, period, limit)
+    return await _http.arun(_line_items_flow(ticker, line_items, end_date, period, limit))
+
+
+@coalesce
+async def asearch_line_items_many(
+    tickers: list[str],
+    line_items: list[str],
+    end_date: str,
+    period: str = "ttm",
+    limit: int = 10,
+) -> dict[str, list[LineItem]]:
+    """Async version of search_line_items_many."""
+    if get_snapshot() is not None:
+        return await asyncio.to_thread(search_line_items_many, tickers, line_items, end_date, period, limit)
+    ashare_tickers = [ticker for ticker in tickers if is_ashare_ticker(ticker)]
+    us_tickers = [ticker for ticker in dict.fromkeys(tickers) if not is_ashare_ticker(ticker)]
+    ashare_results = await asyncio.gather(*(asyncio.to_thread(search_ashare_line_items, ticker, line_items, end_date, period, limit) for ticker in ashare_tickers))
+    results = dict(zip(ashare_tickers, ashare_results))
+    if us_tickers:
+        results.update(await _http.arun(_line_items_many_flow(us_tickers, line_items, end_date, period, limit)))
+    return results
+
+
+@coalesce
+async def aget_insider_trades(
+    ticker: str,
+    end_date: str,
+    start_date: str | None = None,
+    limit: int = 1000,
+) -> list[Trade]:
+    """Async version of get_insider_trades."""
+    if get_snapshot() is not None:
+        return await asyncio.to_thread(get_insider_trades, ticker, end_date, start_date, limit)
+    if is_ashare_ticker(ticker):
+        return await asyncio.to_thread(get_ashare_insider_trades, ticker, end_date, start_date, limit)
+    return await _http.arun(_insider_trades_flow(ticker, end_date, start_date, limit))
+
+
+@coalesce
+async def aget_company_news(
+    ticker: str,
+    end_date: str,
+    start_date: str | None = None,
+    limit: int = 1000,
+) -> list[CompanyNews]:
+    """Async version of get_company_news."""
+    if get_snapshot() is not None:
+        return await asyncio.to_thread(get_company_news, ticker, end_date, start_date, limit)
+    if is_ashare_ticker(ticker):
+        return await asyncio.to_thread(get_ashare_company_news, ticker, end_date, start_date, limit)
+    return await _http.arun(_company_news_flow(ticker, end_date, start_date, limit))
+
+
+@coalesce
+async def aget_market_cap(
+    ticker: str,
+    end_date: str,
+) -> float | None:
+    """Async version of get_market_cap."""
+    if get_snapshot() is not None:
+        return await asyncio.to_thread(get_market_cap, ticker, end_date)
+    if is_ashare_ticker(ticker):
+        return await asyncio.to_thread(get_ashare_market_cap, ticker, end_date)
+    return await _http.arun(_market_cap_flow(ticker, end_date))
+
+
+def prices_to_df(prices: list[Bar]) -> pd.DataFrame:
     """Convert prices to a DataFrame."""
-    df = pd.DataFrame([p.model_dump() for p in prices])
+    df = pd.DataFrame([p.as_dict() for p in prices])
     df["Date"] = pd.to_datetime(df["time"])
     df.set_index("Date", inplace=True)
     numeric_cols = ["open", "close", "high", "low", "volume"]
@@ -340,8 +597,14 @@ def prices_to_df(prices: list[Price]) -> pd.DataFrame:
     return df
 
 
-def get_us_index_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+def get_us_index_prices(ticker: str, start_date: str, end_date: str) -> list[Bar]:
     """获取美股指数数据"""
+    return get_us_index_price_series(ticker, start_date, end_date).to_bars()
+
+
+@coalesce
+def get_us_index_price_series(ticker: str, start_date: str, end_date: str) -> PriceSeries:
+    """获取美股指数数据（按日期索引的序列）"""
     # 指数代码映射
     index_mapping = {
         "^GSPC": ".INX",    # 标普500
@@ -350,89 +613,31 @@ def get_us_index_prices(ticker: str, start_date: str, end_date: str) -> list[Pri
         "^NDX": ".NDX",     # 纳斯达克100
     }
     
-    # 检查缓存
-    if cached_data := _cache.get_prices(ticker):
-        # 将字符串日期转换为datetime.date对象进行比较
-        start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-        
-        # 过滤缓存数据
-        filtered_data = []
-        for price in cached_data:
-            if isinstance(price["time"], str):
-                price_date = datetime.strptime(price["time"], "%Y-%m-%d").date()
-            else:
-                price_date = price["time"]
-                
-            if start_date_obj <= price_date <= end_date_obj:
-                filtered_data.append(Price(**price))
-                
-        if filtered_data:
-            return filtered_data
-    
     # 获取akshare使用的指数代码
     ak_symbol = index_mapping.get(ticker)
     if not ak_symbol:
         raise Exception(f"不支持的美股指数: {ticker}")
     
-    try:
-        # 获取指数数据
-        df = ak.index_us_stock_sina(symbol=ak_symbol)
+    # 获取完整的指数历史数据，按列转换为价格记录（volume 可能是带千分位的字符串）
+    def download() -> pd.DataFrame:
+        df = _ak.call("index_us_stock_sina", symbol=ak_symbol)
         
-        # 确保df有日期列并排序
+        # 确保df有日期列
         if 'date' not in df.columns:
             # 如果没有日期列，我们使用当前日期
             df['date'] = datetime.now().strftime("%Y-%m-%d")
         
-        # 按日期排序
-        df = df.sort_values(by='date')
-        
-        # 转换为Price对象列表
-        prices = []
-        for _, row in df.iterrows():
-            # 处理volume字段，确保能正确处理整数和字符串类型
-            volume_value = row["volume"]
-            if isinstance(volume_value, str):
-                volume = int(volume_value.replace(",", ""))
-            else:
-                volume = int(volume_value)
-            
-            # 创建Price对象
-            price_date = row['date']
-            if isinstance(price_date, str):
-                time_str = price_date
-            else:
-                time_str = price_date.strftime("%Y-%m-%d")
-                
-            prices.append(Price(
-                open=float(row["open"]),
-                close=float(row["close"]),
-                high=float(row["high"]),
-                low=float(row["low"]),
-                volume=volume,
-                time=time_str
-            ))
-        
-        # 过滤日期范围
-        start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-        
-        filtered_prices = []
-        for price in prices:
-            price_date = datetime.strptime(price.time, "%Y-%m-%d").date()
-            if start_date_obj <= price_date <= end_date_obj:
-                filtered_prices.append(price)
-        
-        # 缓存数据
-        _cache.set_prices(ticker, [price.model_dump() for price in prices])
-        
-        return filtered_prices
+        return normalize_frame(df, INDEX_PRICE_COLUMNS, PRICE_DTYPES)
+    
+    try:
+        # 整段历史只在未覆盖的日期出现时重新下载，且只追加新的交易日
+        return get_index_price_series(ticker, start_date, end_date, download)
     except Exception as e:
         print(f"获取美股指数数据失败: {ticker} - {str(e)}")
-        return []
+        return PriceSeries.empty()
 
 
 # Update the get_price_data function to use the new functions
 def get_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    prices = get_prices(ticker, start_date, end_date)
-    return prices_to_df(prices)
\ No newline at end of file
+    # Build the DataFrame straight from the columnar series, skipping Price construction
+    return get_price_series(ticker, start_date, end_date).to_frame()
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Shared HTTP client for the financialdatasets.ai API.
+Keeps pooled keep-alive connections and retries throttled or failed requests with backoff.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Generator, NamedTuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.rate_limiter import RateLimiter
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HTTPRequest(NamedTuple):
+    """A request yielded by a data-fetch flow; the client decides how to send it."""
+    method: str
+    url: str
+    json: dict | None = None
+
+
+# A flow yields HTTPRequests (or lists of them) and receives the matching responses,
+# so the same parsing and caching logic can be driven synchronously or asynchronously.
+RequestFlow = Generator[HTTPRequest | list[HTTPRequest], Any, Any]
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+class HTTPClient:
+    """Pooled sync (requests) and async (httpx) sessions with retry, backoff and connection reuse counters."""
+
+    def __init__(
+        self,
+        pool_size: int | None = None,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+        backoff_base: float | None = None,
+        backoff_max: float = 30.0,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        self.pool_size = pool_size or int(_env_number("FD_HTTP_POOL_SIZE", 20))
+        self.timeout = timeout or _env_number("FD_HTTP_TIMEOUT", 30.0)
+        self.max_retries = max_retries if max_retries is not None else int(_env_number("FD_HTTP_MAX_RETRIES", 3))
+        self.backoff_base = backoff_base if backoff_base is not None else _env_number("FD_HTTP_BACKOFF", 0.5)
+        self.backoff_max = backoff_max
+        # Optional token bucket acquired before every attempt, retries included (e.g. set by the backtester's pre-fetch)
+        self.rate_limiter = rate_limiter
+        self._session: requests.Session | None = None
+        self._adapter: HTTPAdapter | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        # httpx clients are bound to the event loop that created them
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "errors": 0, "total_latency": 0.0}
+
+    @property
+    def session(self) -> requests.Session:
+        """The shared session, created on first use so the API key is read after .env is loaded."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    self._adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount("https://", self._adapter)
+                    session.mount("http://", self._adapter)
+                    session.headers.update(self._auth_headers())
+                    self._session = session
+        return self._session
+
+    def _auth_headers(self) -> dict[str, str]:
+        headers = {}
+        if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+            headers["X-API-KEY"] = api_key
+        return headers
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """The httpx client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=self.timeout,
+                headers=self._auth_headers(),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._counters[name] += value
+
+    def _backoff(self, attempt: int, response: requests.Response | None = None) -> float:
+        """Exponential backoff with full jitter, honouring a numeric Retry-After header."""
+        if response is not None and (retry_after := response.headers.get("Retry-After")):
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request, retrying on connection errors and 429/5xx responses."""
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._count(requests=1, errors=1, total_latency=time.perf_counter() - start)
+                if attempt == self.max_retries:
+                    raise
+                self._count(retries=1)
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self._count(requests=1, total_latency=time.perf_counter() - start)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+            self._count(retries=1)
+            time.sleep(self._backoff(attempt, response))
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    async def arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Async counterpart of request(), sent over the loop's pooled httpx client."""
+        client = self._async_client()
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                self._count(requests=1, errors=1, total_latency=time.perf_counter() - start)
+                if attempt == self.max_retries:
+                    raise
+                self._count(retries=1)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            self._count(requests=1, total_latency=time.perf_counter() - start)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+            self._count(retries=1)
+            await asyncio.sleep(self._backoff(attempt, response))
+        return response
+
+    async def aclose(self):
+        """Close the httpx client of the running event loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _send(self, request: HTTPRequest | list[HTTPRequest]):
+        if isinstance(request, list):
+            # Send a batch concurrently over the shared connection pool
+            if len(request) <= 1:
+                return [self._send(r) for r in request]
+            if self._executor is None:
+                with self._lock:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="http")
+            return list(self._executor.map(self._send, request))
+        return self.request(request.method, request.url, json=request.json)
+
+    async def _asend(self, request: HTTPRequest | list[HTTPRequest]):
+        if isinstance(request, list):
+            return await asyncio.gather(*(self._asend(r) for r in request))
+        return await self.arequest(request.method, request.url, json=request.json)
+
+    def run(self, flow: RequestFlow):
+        """Drive a request flow to completion with blocking requests."""
+        try:
+            request = next(flow)
+            while True:
+                request = flow.send(self._send(request))
+        except StopIteration as stop:
+            return stop.value
+
+    async def arun(self, flow: RequestFlow):
+        """Drive a request flow to completion on the running event loop."""
+        try:
+            request = next(flow)
+            while True:
+                request = flow.send(await self._asend(request))
+        except StopIteration as stop:
+            return stop.value
+
+    def stats(self) -> dict[str, float]:
+        """Request, retry and connection reuse counters."""
+        connections = 0
+        pooled_requests = 0
+        if self._adapter is not None:
+            pools = self._adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+                    pooled_requests += pool.num_requests
+
+        with self._lock:
+            counters = dict(self._counters)
+        requests_sent = counters.pop("requests")
+        total_latency = counters.pop("total_latency")
+        return {
+            "requests": requests_sent,
+            **counters,
+            "connections_opened": connections,
+            "connections_reused": max(pooled_requests - connections, 0),
+            "avg_latency_ms": (total_latency / requests_sent * 1000) if requests_sent else 0.0,
+        }
+
+
+# Global client instance
+_http_client = HTTPClient()
+
+
+def get_http_client() -> HTTPClient:
+    """Get the global HTTP client instance."""
+    return _http_client
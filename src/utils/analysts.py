@@ -1,16 +1,16 @@
 """Constants and utilities related to analysts configuration."""
 
-from src.agents.ben_graham import ben_graham_agent
-from src.agents.bill_ackman import bill_ackman_agent
-from src.agents.cathie_wood import cathie_wood_agent
-from src.agents.charlie_munger import charlie_munger_agent
-from src.agents.fundamentals import fundamentals_agent
-from src.agents.phil_fisher import phil_fisher_agent
+from src.agents.ben_graham import ben_graham_agent, LINE_ITEM_REQUEST as BEN_GRAHAM_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as BEN_GRAHAM_METRICS
+from src.agents.bill_ackman import bill_ackman_agent, LINE_ITEM_REQUEST as BILL_ACKMAN_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as BILL_ACKMAN_METRICS
+from src.agents.cathie_wood import cathie_wood_agent, LINE_ITEM_REQUEST as CATHIE_WOOD_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as CATHIE_WOOD_METRICS
+from src.agents.charlie_munger import charlie_munger_agent, LINE_ITEM_REQUEST as CHARLIE_MUNGER_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as CHARLIE_MUNGER_METRICS
+from src.agents.fundamentals import fundamentals_agent, FINANCIAL_METRICS_REQUEST as FUNDAMENTALS_METRICS
+from src.agents.phil_fisher import phil_fisher_agent, LINE_ITEM_REQUEST as PHIL_FISHER_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as PHIL_FISHER_METRICS
 from src.agents.sentiment import sentiment_agent
-from src.agents.stanley_druckenmiller import stanley_druckenmiller_agent
+from src.agents.stanley_druckenmiller import stanley_druckenmiller_agent, LINE_ITEM_REQUEST as STANLEY_DRUCKENMILLER_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as STANLEY_DRUCKENMILLER_METRICS
 from src.agents.technicals import technical_analyst_agent
-from src.agents.valuation import valuation_agent
-from src.agents.warren_buffett import warren_buffett_agent
+from src.agents.valuation import valuation_agent, LINE_ITEM_REQUEST as VALUATION_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as VALUATION_METRICS
+from src.agents.warren_buffett import warren_buffett_agent, LINE_ITEM_REQUEST as WARREN_BUFFETT_LINE_ITEMS, FINANCIAL_METRICS_REQUEST as WARREN_BUFFETT_METRICS
 
 # Define analyst configuration - single source of truth
 ANALYST_CONFIG = {
@@ -18,36 +18,50 @@ ANALYST_CONFIG = {
         "display_name": "Ben Graham",
         "agent_func": ben_graham_agent,
         "order": 0,
+        "line_item_request": BEN_GRAHAM_LINE_ITEMS,
+        "financial_metrics_request": BEN_GRAHAM_METRICS,
     },
     "bill_ackman": {
         "display_name": "Bill Ackman",
         "agent_func": bill_ackman_agent,
         "order": 1,
+        "line_item_request": BILL_ACKMAN_LINE_ITEMS,
+        "financial_metrics_request": BILL_ACKMAN_METRICS,
     },
     "cathie_wood": {
         "display_name": "Cathie Wood",
         "agent_func": cathie_wood_agent,
         "order": 2,
+        "line_item_request": CATHIE_WOOD_LINE_ITEMS,
+        "financial_metrics_request": CATHIE_WOOD_METRICS,
     },
     "charlie_munger": {
         "display_name": "Charlie Munger",
         "agent_func": charlie_munger_agent,
         "order": 3,
+        "line_item_request": CHARLIE_MUNGER_LINE_ITEMS,
+        "financial_metrics_request": CHARLIE_MUNGER_METRICS,
     },
     "phil_fisher": {
         "display_name": "Phil Fisher",
         "agent_func": phil_fisher_agent,
         "order": 4,
+        "line_item_request": PHIL_FISHER_LINE_ITEMS,
+        "financial_metrics_request": PHIL_FISHER_METRICS,
     },
     "stanley_druckenmiller": {
         "display_name": "Stanley Druckenmiller",
         "agent_func": stanley_druckenmiller_agent,
         "order": 5,
+        "line_item_request": STANLEY_DRUCKENMILLER_LINE_ITEMS,
+        "financial_metrics_request": STANLEY_DRUCKENMILLER_METRICS,
     },
     "warren_buffett": {
         "display_name": "Warren Buffett",
         "agent_func": warren_buffett_agent,
         "order": 6,
+        "line_item_request": WARREN_BUFFETT_LINE_ITEMS,
+        "financial_metrics_request": WARREN_BUFFETT_METRICS,
     },
     "technical_analyst": {
         "display_name": "Technical Analyst",
@@ -58,6 +72,7 @@ ANALYST_CONFIG = {
         "display_name": "Fundamentals Analyst",
         "agent_func": fundamentals_agent,
         "order": 8,
+        "financial_metrics_request": FUNDAMENTALS_METRICS,
     },
     "sentiment_analyst": {
         "display_name": "Sentiment Analyst",
@@ -68,6 +83,8 @@ ANALYST_CONFIG = {
         "display_name": "Valuation Analyst",
         "agent_func": valuation_agent,
         "order": 10,
+        "line_item_request": VALUATION_LINE_ITEMS,
+        "financial_metrics_request": VALUATION_METRICS,
     },
 }
 
@@ -75,6 +92,18 @@ ANALYST_CONFIG = {
 ANALYST_ORDER = [(config["display_name"], key) for key, config in sorted(ANALYST_CONFIG.items(), key=lambda x: x[1]["order"])]
 
 
+def get_line_item_requests(selected_analysts: list[str] | None = None) -> list[dict]:
+    """Get the search_line_items requests made by the selected analysts (all analysts if None)."""
+    keys = selected_analysts if selected_analysts else ANALYST_CONFIG.keys()
+    return [ANALYST_CONFIG[key]["line_item_request"] for key in keys if "line_item_request" in ANALYST_CONFIG.get(key, {})]
+
+
+def get_financial_metrics_requests(selected_analysts: list[str] | None = None) -> list[dict]:
+    """Get the get_financial_metrics requests made by the selected analysts (all analysts if None)."""
+    keys = selected_analysts if selected_analysts else ANALYST_CONFIG.keys()
+    return [ANALYST_CONFIG[key]["financial_metrics_request"] for key in keys if "financial_metrics_request" in ANALYST_CONFIG.get(key, {})]
+
+
 def get_analyst_nodes():
     """Get the mapping of analyst keys to their (node_name, agent_func) tuples."""
     return {key: (f"{key}_agent", config["agent_func"]) for key, config in ANALYST_CONFIG.items()}
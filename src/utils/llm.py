@@ -1,12 +1,191 @@
 """Helper functions for LLM"""
 
+import asyncio
+import functools
 import json
+import os
+import threading
+from collections import OrderedDict
 from typing import TypeVar, Type, Optional, Any
-from pydantic import BaseModel
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, ConfigDict, Field, create_model
+from src.llm.cache import cache_key, get_llm_cache
+from src.llm.limits import get_provider_limits
+from src.llm.models import ModelProvider, get_model_info, get_pooled_model
+from src.llm.retry import FATAL, PARSE, RATE_LIMIT, ResponseParseError, classify_error, get_retry_policy, get_retry_stats
 from src.utils.progress import progress
 
 T = TypeVar('T', bound=BaseModel)
 
+# (provider, model_name, output schema) -> runnable, least recently used first. Packed prompts build a schema
+# per ticker tuple, so this is bounded; an evicted runnable is only a wrapper around the pooled client.
+_runnables: OrderedDict[tuple[str, str, type], Any] = OrderedDict()
+_runnables_lock = threading.Lock()
+_MAX_RUNNABLES = 512
+
+
+def get_llm_runnable(model_name: str, model_provider: str, pydantic_model: Type[T]):
+    """
+    The shared runnable for a model and output schema: the pooled client, wrapped with structured
+    output for models that support JSON mode. Reusing it keeps the client's connections alive.
+    """
+    key = (ModelProvider(model_provider).value, model_name, pydantic_model)
+    with _runnables_lock:
+        if key in _runnables:
+            _runnables.move_to_end(key)
+            return _runnables[key]
+
+    model_info = get_model_info(model_name)
+    llm = get_pooled_model(model_name, model_provider)
+    # For non-JSON support models, we can use structured output
+    if not (model_info and not model_info.has_json_mode()):
+        llm = llm.with_structured_output(
+            pydantic_model,
+            method="json_mode",
+        )
+
+    with _runnables_lock:
+        llm = _runnables.setdefault(key, llm)
+        _runnables.move_to_end(key)
+        while len(_runnables) > _MAX_RUNNABLES:
+            _runnables.popitem(last=False)
+        return llm
+
+
+def _cached_response(prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], use_cache: bool):
+    """Look a prompt up in the response cache, returning (cache, key, cached response); the cache is None when unused."""
+    llm_cache = get_llm_cache() if use_cache else None
+    if llm_cache is None or not llm_cache.enabled:
+        return None, None, None
+    key = cache_key(model_name, model_provider, prompt, pydantic_model)
+    return llm_cache, key, llm_cache.get(key, pydantic_model)
+
+
+def _parse_response(result: Any, model_info, pydantic_model: Type[T]) -> T:
+    """The structured response; raises ResponseParseError when a non-JSON-mode model's answer holds no JSON block."""
+    # For non-JSON support models, we need to extract and parse the JSON manually
+    if model_info and not model_info.has_json_mode():
+        parsed_result = extract_json_from_deepseek_response(result.content)
+        if not parsed_result:
+            raise ResponseParseError("No JSON found in model response")
+        return pydantic_model(**parsed_result)
+    return result
+
+
+def _default_response(pydantic_model: Type[T], default_factory) -> T:
+    # Use default_factory if provided, otherwise create a basic default
+    return default_factory() if default_factory else create_default_response(pydantic_model)
+
+
+class LLMCallError(Exception):
+    """Every attempt of an LLM call failed; `kind` classifies the last error (see src/llm/retry.py)."""
+
+    def __init__(self, error: Exception, kind: str, attempts: int):
+        super().__init__(f"{kind} error after {attempts} attempt(s): {type(error).__name__}: {error}")
+        self.error = error
+        self.kind = kind
+        self.attempts = attempts
+
+
+# Async LLM calls all run on one background event loop, so the pooled clients' async
+# connections are only ever used from the loop that opened them
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def _llm_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-loop", daemon=True).start()
+        return _loop
+
+
+async def _ainvoke_with_retries(
+    prompt: Any,
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str],
+    max_retries: int,
+    use_cache: bool,
+    retry_parse_errors: bool = True,
+) -> T:
+    """
+    The cached or freshly parsed response for a prompt. Each attempt runs under the provider's limits and
+    the policy's timeout; failures are retried according to their kind, and LLMCallError is raised once
+    the attempts run out or the error can't be fixed by retrying (including parse errors, when
+    retry_parse_errors is False).
+    """
+    # Identical prompts (e.g. a re-run backtest over unchanged data) replay the stored response
+    llm_cache, key, cached = _cached_response(prompt, model_name, model_provider, pydantic_model, use_cache)
+    if cached is not None:
+        return cached
+
+    model_info = get_model_info(model_name)
+    llm = get_llm_runnable(model_name, model_provider, pydantic_model)
+    limits = get_provider_limits(model_provider)
+    policy = get_retry_policy()
+    retry_stats = get_retry_stats()
+    retry_stats.record(agent_name, model_name, calls=1)
+
+    for attempt in range(max_retries):
+        retry_stats.record(agent_name, model_name, attempts=1)
+        try:
+            # Call the LLM within the provider's concurrency and rate budgets
+            async with limits.aslot(prompt):
+                result = await asyncio.wait_for(llm.ainvoke(prompt), policy.timeout)
+            result = _parse_response(result, model_info, pydantic_model)
+        except Exception as e:
+            kind = classify_error(e)
+            retry_stats.record(agent_name, model_name, **{kind: 1})
+            delay = policy.delay(kind, attempt, e)
+            # Throttle every caller of the provider, even when this call gives up
+            if kind == RATE_LIMIT:
+                limits.pause(delay)
+            if kind == FATAL or (kind == PARSE and not retry_parse_errors) or attempt == max_retries - 1:
+                raise LLMCallError(e, kind, attempt + 1) from e
+
+            retry_stats.record(agent_name, model_name, retries=1)
+            if agent_name:
+                progress.update_status(agent_name, None, f"{kind.replace('_', ' ').capitalize()} error - retry {attempt + 2}/{max_retries} in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        retry_stats.record(agent_name, model_name, successes=1)
+        # Only real responses are cached, never the defaults used after failures
+        if llm_cache is not None and isinstance(result, BaseModel):
+            llm_cache.put(key, model_name, result)
+        return result
+
+    raise LLMCallError(RuntimeError("no attempts made"), FATAL, 0)
+
+
+async def _acall_llm(
+    prompt: Any,
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str],
+    max_retries: int,
+    default_factory,
+    use_cache: bool,
+) -> T:
+    try:
+        return await _ainvoke_with_retries(prompt, model_name, model_provider, pydantic_model, agent_name, max_retries, use_cache)
+    except LLMCallError as e:
+        return _fallback(e, model_name, pydantic_model, agent_name, default_factory)
+
+
+def _fallback(error: LLMCallError, model_name: str, pydantic_model: Type[T], agent_name: Optional[str], default_factory, count: int = 1) -> T:
+    """The default response after a failed call, counted and reported."""
+    # Defaults are neutral signals, so make every one visible instead of letting them blend into results
+    get_retry_stats().record(agent_name, model_name, fallbacks=count)
+    print(f"Error in LLM call{f' for {agent_name}' if agent_name else ''} ({model_name}), using default response: {error}")
+    return _default_response(pydantic_model, default_factory)
+
+
 def call_llm(
     prompt: Any,
     model_name: str,
@@ -14,7 +193,8 @@ def call_llm(
     pydantic_model: Type[T],
     agent_name: Optional[str] = None,
     max_retries: int = 3,
-    default_factory = None
+    default_factory = None,
+    use_cache: bool = True,
 ) -> T:
     """
     Makes an LLM call with retry logic, handling both Deepseek and non-Deepseek models.
@@ -24,52 +204,157 @@ def call_llm(
         model_name: Name of the model to use
         model_provider: Provider of the model
         pydantic_model: The Pydantic model class to structure the output
-        agent_name: Optional name of the agent for progress updates
-        max_retries: Maximum number of retries (default: 3)
+        agent_name: Optional name of the agent for progress updates and retry metrics
+        max_retries: Maximum number of attempts (default: 3); see src/llm/retry.py for backoff and timeouts
         default_factory: Optional factory function to create default response on failure
+        use_cache: Look the response up in (and save it to) the LLM response cache (default: True)
         
     Returns:
         An instance of the specified Pydantic model
     """
-    from llm.models import get_model, get_model_info
-    
-    model_info = get_model_info(model_name)
-    llm = get_model(model_name, model_provider)
-    
-    # For non-JSON support models, we can use structured output
-    if not (model_info and not model_info.has_json_mode()):
-        llm = llm.with_structured_output(
-            pydantic_model,
-            method="json_mode",
+    return asyncio.run_coroutine_threadsafe(
+        _acall_llm(prompt, model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory, use_cache),
+        _llm_loop(),
+    ).result()
+
+
+async def acall_llm(
+    prompt: Any,
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None,
+    use_cache: bool = True,
+) -> T:
+    """Async version of call_llm, sharing its cache, retries and provider limits."""
+    future = asyncio.run_coroutine_threadsafe(
+        _acall_llm(prompt, model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory, use_cache),
+        _llm_loop(),
+    )
+    return await asyncio.wrap_future(future)
+
+
+def call_llm_batch(
+    prompts: list[Any],
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None,
+    use_cache: bool = True,
+) -> list[T]:
+    """
+    Makes one LLM call per prompt concurrently and returns the responses in prompt order.
+    Concurrency and request/token rates stay within the provider's limits (see src/llm/limits.py),
+    and each prompt is cached and retried independently as in call_llm.
+    """
+    async def run():
+        return await asyncio.gather(
+            *(_acall_llm(prompt, model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory, use_cache) for prompt in prompts)
         )
-    
-    # Call the LLM with retries
-    for attempt in range(max_retries):
+
+    return asyncio.run_coroutine_threadsafe(run(), _llm_loop()).result()
+
+
+@functools.lru_cache(maxsize=256)
+def _packed_model(pydantic_model: Type[T], keys: tuple[str, ...]) -> Type[BaseModel]:
+    """Response schema for a packed prompt: one required pydantic_model field per key (keys may not be identifiers)."""
+    fields = {f"item_{i}": (pydantic_model, Field(alias=key)) for i, key in enumerate(keys)}
+    return create_model(f"Packed{pydantic_model.__name__}", __config__=ConfigDict(populate_by_name=True), **fields)
+
+
+def pack_prompts(prompts: dict[str, Any]) -> list:
+    """
+    Merge per-ticker prompts into one: the shared system message once, then each ticker's request
+    under its own heading, answered as a single JSON object keyed by ticker.
+    """
+    sections = []
+    system = []
+    for key, prompt in prompts.items():
+        messages = prompt.to_messages() if hasattr(prompt, "to_messages") else [HumanMessage(content=str(prompt))]
+        system = [message for message in messages if message.type == "system"]
+        request = "\n".join(str(message.content) for message in messages if message.type != "system")
+        sections.append(f"=== {key} ===\n{request}")
+    instructions = (
+        f"Answer each of the following {len(prompts)} requests independently. "
+        f"Return one JSON object whose keys are exactly {json.dumps(list(prompts))} "
+        "and whose value for each key is the JSON answer to that request."
+    )
+    return system + [HumanMessage(content=instructions + "\n\n" + "\n\n".join(sections))]
+
+
+def _packable(prompts: dict[str, Any]) -> bool:
+    """Prompts can share one request only if their system messages are identical."""
+    systems = {
+        tuple(str(message.content) for message in prompt.to_messages() if message.type == "system") if hasattr(prompt, "to_messages") else ()
+        for prompt in prompts.values()
+    }
+    return len(systems) == 1
+
+
+def get_pack_size() -> int:
+    """Tickers per packed prompt, from LLM_PACK_SIZE (default 1, i.e. one prompt per ticker)."""
+    value = os.environ.get("LLM_PACK_SIZE")
+    return int(value) if value else 1
+
+
+def call_llm_packed(
+    prompts: dict[str, Any],
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None,
+    use_cache: bool = True,
+    pack_size: Optional[int] = None,
+) -> dict[str, T]:
+    """
+    Makes the LLM calls for a dict of per-ticker prompts and returns the responses by ticker.
+    With a pack size above 1 (LLM_PACK_SIZE), up to that many tickers share one request so the system
+    prompt is sent once per pack; a pack whose response fails validation is retried as per-ticker calls,
+    while other failures are retried on the whole pack.
+    Otherwise this is call_llm_batch over the prompts.
+    """
+    pack_size = pack_size if pack_size is not None else get_pack_size()
+    keys = list(prompts)
+    if pack_size <= 1 or len(keys) <= 1 or not _packable(prompts):
+        results = call_llm_batch(list(prompts.values()), model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory, use_cache)
+        return dict(zip(keys, results))
+
+    async def run_pack(pack: list[str]) -> dict[str, T]:
+        packed_model = _packed_model(pydantic_model, tuple(pack))
+        # Throttling and outages are retried on the pack as a whole; only a pack that doesn't validate is split up
         try:
-            # Call the LLM
-            result = llm.invoke(prompt)
-            
-            # For non-JSON support models, we need to extract and parse the JSON manually
-            if model_info and not model_info.has_json_mode():
-                parsed_result = extract_json_from_deepseek_response(result.content)
-                if parsed_result:
-                    return pydantic_model(**parsed_result)
-            else:
-                return result
-                
-        except Exception as e:
+            packed = await _ainvoke_with_retries(
+                pack_prompts({key: prompts[key] for key in pack}), model_name, model_provider, packed_model, agent_name, max_retries, use_cache,
+                retry_parse_errors=False,
+            )
+            return {key: getattr(packed, f"item_{i}") for i, key in enumerate(pack)}
+        except LLMCallError as e:
+            if e.kind != PARSE:
+                # Fanning out to one request per ticker would only add load to a provider that is already failing
+                default = _fallback(e, model_name, pydantic_model, agent_name, default_factory, count=len(pack))
+                return {key: default.model_copy() for key in pack}
             if agent_name:
-                progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
-            
-            if attempt == max_retries - 1:
-                print(f"Error in LLM call after {max_retries} attempts: {e}")
-                # Use default_factory if provided, otherwise create a basic default
-                if default_factory:
-                    return default_factory()
-                return create_default_response(pydantic_model)
-
-    # This should never be reached due to the retry logic above
-    return create_default_response(pydantic_model)
+                progress.update_status(agent_name, None, f"Packed response invalid - retrying {len(pack)} tickers separately")
+
+        results = await asyncio.gather(
+            *(_acall_llm(prompts[key], model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory, use_cache) for key in pack)
+        )
+        return dict(zip(pack, results))
+
+    async def run():
+        packs = [keys[i : i + pack_size] for i in range(0, len(keys), pack_size)]
+        return await asyncio.gather(*(run_pack(pack) for pack in packs))
+
+    results = {}
+    for pack_results in asyncio.run_coroutine_threadsafe(run(), _llm_loop()).result():
+        results.update(pack_results)
+    return {key: results[key] for key in keys}
 
 def create_default_response(model_class: Type[T]) -> T:
     """Creates a safe default response based on the model's fields."""
@@ -0,0 +1,43 @@
+"""Token-bucket rate limiting shared by data fetchers."""
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` acquisitions per second with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens if available, otherwise return how long to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available. A non-positive rate means unlimited."""
+        if self.rate <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        while (wait := self._reserve(tokens)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: float = 1.0):
+        """Async counterpart of acquire() that sleeps without blocking the event loop."""
+        if self.rate <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        while (wait := self._reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
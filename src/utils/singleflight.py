@@ -0,0 +1,147 @@
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key wait on one in-flight call and share its result.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    """An in-flight synchronous call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn list/dict arguments into hashable tuples so they can be part of a key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _share(result: Any) -> Any:
+    # Followers get their own list so sorting/appending in one caller doesn't leak into another
+    return list(result) if isinstance(result, list) else result
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls, with hit and coalesce counters per group (by default, per key)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        # Async calls are keyed per event loop since futures can't be awaited across loops
+        self._async_calls: dict[tuple[int, Hashable], asyncio.Future] = {}
+        # Counters are kept per group rather than per key, since keys include every argument and never repeat for long
+        self._stats: dict[Hashable, dict[str, int]] = defaultdict(lambda: {"hits": 0, "coalesced": 0})
+
+    def do(self, key: Hashable, fn: Callable[[], Any], group: Hashable | None = None) -> Any:
+        """
+        Run fn() unless an identical call is already in flight, in which case wait for its result.
+        Hits are counted under `group` (default: the key itself).
+        """
+        group = key if group is None else group
+        with self._lock:
+            self._stats[group]["hits"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats[group]["coalesced"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _share(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Any], group: Hashable | None = None) -> Any:
+        """Async counterpart of do(); fn returns an awaitable."""
+        group = key if group is None else group
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            self._stats[group]["hits"] += 1
+            future = self._async_calls.get(loop_key)
+            leader = future is None
+            if leader:
+                future = self._async_calls[loop_key] = asyncio.get_running_loop().create_future()
+            else:
+                self._stats[group]["coalesced"] += 1
+        if not leader:
+            return _share(await asyncio.shield(future))
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting on it
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_calls.pop(loop_key, None)
+
+    def stats(self) -> dict[Hashable, dict[str, int]]:
+        """Hit and coalesce counts per group; coalesced functions are grouped by their qualified name."""
+        with self._lock:
+            return {key: dict(counts) for key, counts in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Global single-flight group shared by the data fetchers
+_singleflight = SingleFlight()
+
+
+def get_singleflight() -> SingleFlight:
+    """Get the global single-flight instance."""
+    return _singleflight
+
+
+def coalesce(func):
+    """Decorator that coalesces concurrent calls to func with the same (bound) arguments."""
+    name = f"{func.__module__}.{func.__qualname__}"
+    signature = inspect.signature(func)
+
+    def make_key(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (name, _freeze(tuple(bound.arguments.values())))
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return await _singleflight.ado(make_key(args, kwargs), lambda: func(*args, **kwargs), group=name)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _singleflight.do(make_key(args, kwargs), lambda: func(*args, **kwargs), group=name)
+
+    return wrapper
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark: row-by-row iterrows conversion vs the column-wise path in src.data.frames.
+Run with: python tests/bench_frame_conversion.py [rows]
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.frames import frame_to_records, normalize_frame, records_to_models
+from src.data.models import Price
+from src.tools.akshare_api import ASHARE_PRICE_COLUMNS, PRICE_DTYPES
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """A stock_zh_a_hist-shaped daily history."""
+    rng = np.random.default_rng(0)
+    close = 10 + rng.random(rows).cumsum()
+    return pd.DataFrame({
+        "日期": pd.bdate_range("2000-01-03", periods=rows).date,
+        "开盘": close - 0.1,
+        "收盘": close,
+        "最高": close + 0.2,
+        "最低": close - 0.2,
+        "成交量": rng.integers(1_000, 1_000_000, rows),
+    })
+
+
+def iterrows_conversion(df: pd.DataFrame) -> list[dict]:
+    """The previous per-row loop: build a Price per row, then dump it for the cache."""
+    prices = []
+    for _, row in df.iterrows():
+        prices.append(Price(
+            open=float(row['开盘']),
+            close=float(row['收盘']),
+            high=float(row['最高']),
+            low=float(row['最低']),
+            volume=int(row['成交量']),
+            time=row['日期'].strftime("%Y-%m-%d") if isinstance(row['日期'], datetime) else str(row['日期'])
+        ))
+    return [p.model_dump() for p in prices]
+
+
+def columnar_conversion(df: pd.DataFrame) -> list[dict]:
+    return frame_to_records(normalize_frame(df, ASHARE_PRICE_COLUMNS, PRICE_DTYPES))
+
+
+def best_of(fn, df: pd.DataFrame, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    df = make_frame(rows)
+
+    expected = iterrows_conversion(df)
+    records = columnar_conversion(df)
+    assert [sorted(r.items()) for r in records] == [sorted(r.items()) for r in expected], "conversions disagree"
+
+    legacy = best_of(iterrows_conversion, df)
+    columnar = best_of(columnar_conversion, df)
+    validated = best_of(lambda frame: records_to_models(columnar_conversion(frame), Price, validate=True), df)
+
+    print(f"{rows} rows")
+    print(f"  iterrows + Price:          {legacy * 1000:8.1f} ms")
+    print(f"  column-wise records:       {columnar * 1000:8.1f} ms  ({legacy / columnar:.0f}x)")
+    print(f"  column-wise + validation:  {validated * 1000:8.1f} ms  ({legacy / validated:.0f}x)")
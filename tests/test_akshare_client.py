@@ -0,0 +1,48 @@
+"""
+Test module for the akshare endpoint scheduler.
+These tests patch the akshare functions and never touch the network.
+"""
+
+import sys
+import os
+
+import pytest
+import requests
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools import akshare_client
+from src.tools.akshare_client import AkshareClient
+
+
+def test_throttled_calls_are_retried_and_counted(monkeypatch):
+    """Connection errors are retried with backoff; the endpoint's counters record the attempts."""
+    attempts = []
+
+    def flaky(symbol):
+        attempts.append(symbol)
+        if len(attempts) < 3:
+            raise requests.ConnectionError("reset by peer")
+        return f"data for {symbol}"
+
+    monkeypatch.setattr(akshare_client.ak, "stock_notice_report", flaky, raising=False)
+    client = AkshareClient(rate=0, max_retries=3, backoff_base=0)
+    assert client.call("stock_notice_report", symbol="600519") == "data for 600519"
+
+    stats = client.stats()["stock_notice_report"]
+    assert (stats["calls"], stats["retries"], stats["failures"]) == (3, 2, 0)
+    assert "reset by peer" in stats["last_error"]
+
+
+def test_other_errors_fail_fast(monkeypatch):
+    """Errors that are not throttling are raised straight away and counted as failures."""
+    def broken(symbol):
+        raise KeyError("data")
+
+    monkeypatch.setattr(akshare_client.ak, "stock_em_executive_hold", broken, raising=False)
+    client = AkshareClient(rate=0, max_retries=3, backoff_base=0)
+    with pytest.raises(KeyError):
+        client.call("stock_em_executive_hold", symbol="600519")
+    assert client.stats()["stock_em_executive_hold"]["calls"] == 1
+    assert client.stats()["stock_em_executive_hold"]["failures"] == 1
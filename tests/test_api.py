@@ -0,0 +1,111 @@
+"""
+Test module for the financialdatasets.ai request flows.
+These tests run offline against a fake HTTP layer and an in-memory cache.
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.cache import Cache
+from src.tools import api
+
+
+class FakeResponse:
+    def __init__(self, payload: dict, status_code: int = 200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = str(payload)
+
+    def json(self) -> dict:
+        return self.payload
+
+
+@pytest.fixture
+def fake_http(monkeypatch):
+    """Route flow requests to a handler(request) -> payload and record what was sent."""
+    monkeypatch.delenv("DATA_SNAPSHOT_DIR", raising=False)
+    monkeypatch.setattr(api, "_cache", Cache(store=None))
+    sent = []
+
+    def install(handler):
+        def send(request):
+            if isinstance(request, list):
+                return [send(r) for r in request]
+            sent.append(request)
+            return FakeResponse(handler(request))
+
+        monkeypatch.setattr(api._http, "_send", send)
+        return sent
+
+    return install
+
+
+def line_item(ticker: str, report_period: str) -> dict:
+    return {"ticker": ticker, "report_period": report_period, "period": "annual", "currency": "USD", "revenue": 1.0}
+
+
+def test_batched_line_items_are_split_back_per_ticker(fake_http):
+    """A batch whose limit was used up by one ticker re-asks for the others on their own."""
+    periods = ["2024-12-31", "2023-12-31", "2022-12-31", "2021-12-31", "2020-12-31", "2019-12-31"]
+
+    def handler(request):
+        tickers, limit = request.json["tickers"], request.json["limit"]
+        # This API applies the limit to the whole batch, filling it from the first ticker
+        rows = [line_item(ticker, period) for ticker in tickers for period in periods]
+        return {"search_results": rows[:limit]}
+
+    sent = fake_http(handler)
+    results = api.search_line_items_many(["AAPL", "MSFT", "NVDA"], ["revenue"], "2025-01-31", period="annual", limit=2)
+
+    assert {ticker: len(items) for ticker, items in results.items()} == {"AAPL": 2, "MSFT": 2, "NVDA": 2}
+    assert sent[0].json["limit"] == 6
+    assert sorted(request.json["tickers"][0] for request in sent[1:]) == ["MSFT", "NVDA"]
+
+    # Everything is covered now, so a repeat call doesn't hit the API
+    api.search_line_items_many(["AAPL", "MSFT", "NVDA"], ["revenue"], "2025-01-31", period="annual", limit=2)
+    assert len(sent) == 3
+
+
+def test_date_shards_are_contiguous():
+    """Shards cover the range exactly, with no gaps or overlaps, and are at least a month long."""
+    shards = api._date_shards("2024-01-01", "2024-04-30", 4)
+    assert shards[0][0] == "2024-01-01" and shards[-1][1] == "2024-04-30" and len(shards) == 4
+    assert all(api.to_ordinal(prev_end) + 1 == api.to_ordinal(start) for (_, prev_end), (start, _) in zip(shards, shards[1:]))
+    assert api._date_shards("2024-01-01", "2024-01-20", 4) == [("2024-01-01", "2024-01-20")]
+
+
+def test_sharded_news_pages_stop_and_dedupe(fake_http, monkeypatch):
+    """Each shard pages backwards until a short page; records repeated across page boundaries are kept once."""
+    monkeypatch.setenv("FD_MAX_INFLIGHT_PAGES", "4")
+    # One article a day, except none in March
+    days = [api.to_iso(day) for day in range(api.to_ordinal("2024-01-01"), api.to_ordinal("2024-04-30") + 1)]
+    articles = [
+        {"ticker": "AAPL", "title": f"news {day}", "author": "a", "source": "s", "date": day, "url": f"https://x/{day}"}
+        for day in reversed(days) if not day.startswith("2024-03")
+    ]
+
+    def handler(request):
+        params = dict(part.split("=") for part in request.url.split("?")[1].split("&"))
+        # Both bounds are inclusive, so the next page repeats the previous page's oldest day
+        page = [news for news in articles if params["start_date"] <= news["date"] <= params["end_date"]]
+        return {"news": page[:int(params["limit"])]}
+
+    sent = fake_http(handler)
+    news = api.get_company_news("AAPL", "2024-04-30", start_date="2024-01-01", limit=10)
+
+    assert len(news) == len(articles) and len({item.url for item in news}) == len(articles)
+    assert [item.date for item in news] == sorted((item.date for item in news), reverse=True)
+    requests_by_shard = {}
+    for request in sent:
+        start = request.url.split("start_date=")[1].split("&")[0]
+        requests_by_shard[start] = requests_by_shard.get(start, 0) + 1
+    shards = api._date_shards("2024-01-01", "2024-04-30", 4)
+    assert set(requests_by_shard) == {start for start, _ in shards}
+    # The shard with no news stops after its first (empty) page
+    march = next(start for start, end in shards if start <= "2024-03-15" <= end)
+    assert requests_by_shard[march] == 1 and len(sent) < 30
@@ -39,8 +39,8 @@ def test_prices():
     
     if prices:
         print(f"✓ Successfully retrieved {len(prices)} price records")
-        print(f"First record: {prices[0].model_dump()}")
-        print(f"Last record: {prices[-1].model_dump()}")
+        print(f"First record: {prices[0].as_dict()}")
+        print(f"Last record: {prices[-1].as_dict()}")
     else:
         print(f"✗ Failed to retrieve prices for {ASHARE_TICKER}")
 
@@ -135,6 +135,15 @@ def test_market_cap():
         print(f"✗ Failed to retrieve market cap for {ASHARE_TICKER}")
 
 
+def test_report_periods_compare_days():
+    """Compact vendor periods are compared with ISO end dates as days, not as text"""
+    from src.tools.akshare_api import _report_periods
+
+    statement = pd.DataFrame(columns=["20221231", "20231231", "20240331", "20240630", "选项"])
+    # As text, "20240331" > "2024-03-31", so the period ending on end_date would be dropped
+    assert _report_periods(statement, "2024-03-31", 2) == [("20240331", "2024-03-31"), ("20231231", "2023-12-31")]
+
+
 def run_all_tests():
     """Run all A-share tests"""
     print(f"Running A-share tests for {ASHARE_TICKER}")
@@ -0,0 +1,236 @@
+"""
+Test module for the data cache.
+These tests run offline against a temporary SQLite store.
+"""
+
+import sys
+import os
+from datetime import date, timedelta
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data import archive
+from src.data.cache import Cache
+from src.data.store import SQLiteStore
+
+
+def make_price(day: str, close: float = 10.0) -> dict:
+    return {"open": close, "close": close, "high": close, "low": close, "volume": 100, "time": day}
+
+
+def test_persistent_tier_survives_restart(tmp_path):
+    """Rows written by one Cache are warm-loaded by a fresh one."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = Cache(store=SQLiteStore(path))
+    cache.set_prices("AAPL", [make_price("2024-01-02"), make_price("2024-01-03")])
+    cache.set_prices("AAPL", [make_price("2024-01-03"), make_price("2024-01-04")])
+
+    restarted = Cache(store=SQLiteStore(path))
+    assert [p["time"] for p in restarted.get_prices("AAPL")] == ["2024-01-02", "2024-01-03", "2024-01-04"]
+    assert restarted.get_prices("MSFT") is None
+
+
+def test_same_day_trades_survive_restart(tmp_path):
+    """Trades filed on the same day are stored as separate rows, not overwritten on disk."""
+    path = str(tmp_path / "cache.sqlite3")
+    trade = lambda name: {"ticker": "AAPL", "name": name, "filing_date": "2024-03-01", "transaction_date": "2024-02-28", "transaction_shares": 100.0}
+    Cache(store=SQLiteStore(path)).set_insider_trades("AAPL", [trade("Tim"), trade("Jeff"), trade("Luca")])
+
+    restarted = Cache(store=SQLiteStore(path))
+    assert sorted(row["name"] for row in restarted.get_insider_trades("AAPL")) == ["Jeff", "Luca", "Tim"]
+
+
+def test_ttl_expires_news_but_not_prices(tmp_path, monkeypatch):
+    """Datasets with a TTL are dropped once stale, prices are kept."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = Cache(store=SQLiteStore(path))
+    cache.set_prices("AAPL", [make_price("2024-01-02")])
+    cache.set_company_news("AAPL", [{"ticker": "AAPL", "title": "t", "author": "a", "source": "s", "date": "2024-01-02", "url": "", "sentiment": None}])
+
+    monkeypatch.setenv("DATA_CACHE_TTL_COMPANY_NEWS", "0.000001")
+    restarted = Cache(store=SQLiteStore(path))
+    assert restarted.get_company_news("AAPL") is None
+    assert len(restarted.get_prices("AAPL")) == 1
+
+
+def test_price_series_range_slice(tmp_path):
+    """Cached prices are date-sorted and range queries slice by date."""
+    cache = Cache(store=SQLiteStore(str(tmp_path / "cache.sqlite3")))
+    cache.set_prices("AAPL", [make_price("2024-01-04", 3), make_price("2024-01-02", 1)])
+    cache.set_prices("AAPL", [make_price("2024-01-03", 2), make_price("2024-01-02", 99)])
+
+    series = cache.get_price_series("AAPL")
+    assert series.time_strings() == ["2024-01-02", "2024-01-03", "2024-01-04"]
+    assert series.close.tolist() == [1.0, 2.0, 3.0]
+
+    window = series.slice("2024-01-03", "2024-01-10")
+    assert [p.close for p in window.to_bars()] == [2.0, 3.0]
+    df = window.to_frame()
+    assert df.index.name == "Date" and df["close"].tolist() == [2.0, 3.0]
+    assert not len(series.slice("2023-01-01", "2023-12-31"))
+
+
+def test_unsettled_bars_are_replaced_when_refetched(tmp_path):
+    """Today's (possibly intraday) bar is replaced by a refetch, in memory and on disk; settled bars are kept."""
+    path = str(tmp_path / "cache.sqlite3")
+    today = date.today().isoformat()
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    cache = Cache(store=SQLiteStore(path))
+    cache.set_prices("AAPL", [make_price(yesterday, 99), make_price(today, 100)])
+    cache.set_prices("AAPL", [make_price(yesterday, 1), make_price(today, 105)])
+
+    assert [p["close"] for p in cache.get_prices("AAPL")] == [99.0, 105.0]
+    assert [p["close"] for p in Cache(store=SQLiteStore(path)).get_prices("AAPL")] == [99.0, 105.0]
+    assert cache.get_missing_ranges("prices", "AAPL", today, today) == [(today, today)]
+
+
+def test_missing_ranges_track_coverage(tmp_path):
+    """Only date intervals not fetched before are reported missing, across restarts."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = Cache(store=SQLiteStore(path))
+    assert cache.get_missing_ranges("prices", "AAPL", "2024-01-01", "2024-01-31") == [("2024-01-01", "2024-01-31")]
+
+    cache.add_coverage("prices", "AAPL", "2024-01-05", "2024-01-10")
+    cache.add_coverage("prices", "AAPL", "2024-01-11", "2024-01-15")
+    restarted = Cache(store=SQLiteStore(path))
+    assert restarted.get_missing_ranges("prices", "AAPL", "2024-01-01", "2024-01-31") == [("2024-01-01", "2024-01-04"), ("2024-01-16", "2024-01-31")]
+    assert restarted.get_missing_ranges("prices", "AAPL", "2024-01-06", "2024-01-12") == []
+
+
+def test_line_items_merge_fields_per_report_period(tmp_path):
+    """Line item rows gain newly fetched fields, and field coverage is scoped and persisted."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = Cache(store=SQLiteStore(path))
+    base = {"ticker": "AAPL", "report_period": "2023-12-31", "currency": "USD"}
+    cache.set_line_items("AAPL", [{**base, "period": "annual", "revenue": 1.0}, {**base, "period": "ttm", "revenue": 2.0}])
+    cache.set_line_items("AAPL", [{**base, "period": "annual", "capex": 3.0}])
+    cache.add_coverage("line_items", "AAPL", "2023-01-01", "2023-12-31", scope="annual:capex")
+
+    restarted = Cache(store=SQLiteStore(path))
+    rows = {row["period"]: row for row in restarted.get_line_items("AAPL")}
+    assert rows["annual"] == {**base, "period": "annual", "revenue": 1.0, "capex": 3.0}
+    assert rows["ttm"]["revenue"] == 2.0 and "capex" not in rows["ttm"]
+    assert restarted.get_missing_ranges("line_items", "AAPL", "2023-06-30", "2023-12-31", scope="annual:capex") == []
+    assert restarted.get_missing_ranges("line_items", "AAPL", "2023-06-30", "2023-12-31", scope="annual:revenue") == [("2023-06-30", "2023-12-31")]
+
+    # Report-period coverage may run up to today, so live runs don't refetch on every call
+    today = date.today().isoformat()
+    restarted.add_coverage("line_items", "AAPL", "2023-01-01", today, scope="annual:revenue", settled_only=False)
+    assert restarted.get_missing_ranges("line_items", "AAPL", "2023-06-30", today, scope="annual:revenue") == []
+
+
+def test_financial_metrics_keep_each_period(tmp_path):
+    """ttm and annual metrics for the same report period are cached side by side."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = Cache(store=SQLiteStore(path))
+    base = {"ticker": "AAPL", "report_period": "2023-12-31", "currency": "USD"}
+    cache.set_financial_metrics("AAPL", [{**base, "period": "ttm", "market_cap": 1.0}])
+    cache.set_financial_metrics("AAPL", [{**base, "period": "annual", "market_cap": 2.0}])
+
+    restarted = Cache(store=SQLiteStore(path))
+    rows = {row["period"]: row["market_cap"] for row in restarted.get_financial_metrics("AAPL")}
+    assert rows == {"ttm": 1.0, "annual": 2.0}
+
+
+@pytest.mark.parametrize("columnar", [True, False])
+def test_export_import_round_trip(tmp_path, monkeypatch, columnar):
+    """An exported archive reloads into an empty cache with the same rows and coverage."""
+    if columnar:
+        pytest.importorskip("pyarrow")
+    else:
+        # Without pyarrow the archive falls back to CSV
+        monkeypatch.setattr(archive, "pa", None)
+        monkeypatch.setattr(archive, "pq", None)
+
+    cache = Cache(store=SQLiteStore(str(tmp_path / "cache.sqlite3")))
+    cache.set_prices("AAPL", [make_price("2024-01-03", 2), make_price("2024-01-02", 1)])
+    cache.set_prices("600519.SH", [make_price("2024-01-02", 5)])
+    cache.add_coverage("prices", "AAPL", "2024-01-01", "2024-01-05")
+    base = {"ticker": "AAPL", "report_period": "2023-12-31", "period": "annual", "currency": "USD"}
+    cache.set_line_items("AAPL", [{**base, "revenue": 1.0}, {**base, "period": "ttm", "capex": 2.0}])
+
+    counts = cache.export(str(tmp_path / "archive"))
+    assert counts == {"prices": 3, "line_items": 2}
+
+    restored = Cache(store=None)
+    assert restored.import_(str(tmp_path / "archive")) == counts
+    assert restored.get_price_series("AAPL").close.tolist() == [1.0, 2.0]
+    assert restored.get_prices("600519.SH") == [make_price("2024-01-02", 5)]
+    assert restored.get_missing_ranges("prices", "AAPL", "2024-01-01", "2024-01-05") == []
+    rows = {row["period"]: row for row in restored.get_line_items("AAPL")}
+    assert rows["annual"] == {**base, "revenue": 1.0}
+    assert rows["ttm"] == {**base, "period": "ttm", "capex": 2.0}
+
+
+def test_lru_evicts_least_recently_used_ticker(tmp_path):
+    """The in-memory tier stays within its row budget and evicted tickers reload from the store."""
+    cache = Cache(store=SQLiteStore(str(tmp_path / "cache.sqlite3")), max_rows=4)
+    cache.set_prices("AAPL", [make_price("2024-01-02"), make_price("2024-01-03")])
+    cache.set_prices("MSFT", [make_price("2024-01-02"), make_price("2024-01-03")])
+    cache.get_prices("AAPL")
+    cache.set_prices("NVDA", [make_price("2024-01-02"), make_price("2024-01-03")])
+
+    stats = cache.stats()
+    assert stats["rows"] == 4 and stats["evictions"] == 1
+    assert cache.get_prices("AAPL") is not None and cache.stats()["hits"] == 2
+    # MSFT was least recently used, so it comes back from disk
+    assert len(cache.get_prices("MSFT")) == 2
+    assert cache.stats()["store_hits"] == 1
+    assert cache.stats()["rows"] <= 4
+
+
+def test_lookups_of_unknown_tickers_hold_no_memory(tmp_path):
+    """Misses leave no bookkeeping behind, and coverage-only entries are evicted like any other."""
+    cache = Cache(store=SQLiteStore(str(tmp_path / "cache.sqlite3")), max_rows=10)
+    for i in range(5000):
+        assert cache.get_insider_trades(f"T{i}") is None
+        cache.get_missing_ranges("company_news", f"T{i}", "2024-01-01", "2024-01-31")
+    assert cache.stats()["entries"] == 0 and not cache._loaded and not cache._coverage
+
+    for i in range(50):
+        cache.add_coverage("company_news", f"T{i}", "2024-01-01", "2024-01-31")
+    assert cache.stats()["entries"] <= 10 and len(cache._coverage) <= 10
+    # Evicted coverage is warm-loaded again from disk
+    assert cache.get_missing_ranges("company_news", "T0", "2024-01-01", "2024-01-31") == []
+
+
+def test_rows_stay_sorted_and_deduplicated(tmp_path):
+    """Incremental inserts keep rows sorted by date so reads are slices, whatever order they arrive in."""
+    cache = Cache(store=SQLiteStore(str(tmp_path / "cache.sqlite3")))
+    news = lambda day: {"ticker": "AAPL", "title": day, "author": "a", "source": "s", "date": day, "url": "", "sentiment": None}
+    cache.set_company_news("AAPL", [news("2024-01-05"), news("2024-01-02")])
+    cache.set_company_news("AAPL", [news("2024-01-03"), news("2024-01-05"), news("2024-01-09")])
+    cache.set_company_news("AAPL", [news(f"2023-12-{day:02d}") for day in range(1, 32)] + [news("2024-01-02")])
+
+    cached = cache.get_company_news("AAPL")
+    dates = [row["date"] for row in cached]
+    assert dates == sorted(dates) and len(dates) == len(set(dates)) == 35
+    assert [row["date"] for row in cached.between("2024-01-01", "2024-01-05", newest_first=True)] == ["2024-01-05", "2024-01-03", "2024-01-02"]
+
+
+def test_same_day_trades_and_news_are_all_kept(tmp_path):
+    """Rows sharing a date are distinct records, within a batch and across batches."""
+    cache = Cache(store=SQLiteStore(str(tmp_path / "cache.sqlite3")))
+    trade = lambda name, shares: {"ticker": "AAPL", "name": name, "filing_date": "2024-03-01", "transaction_date": "2024-02-28", "transaction_shares": shares}
+    cache.set_insider_trades("AAPL", [trade("Tim", 100.0), trade("Tim", -50.0), trade("Jeff", 100.0)])
+    cache.set_insider_trades("AAPL", [trade("Tim", 100.0), trade("Luca", 10.0)])
+    assert len(cache.get_insider_trades("AAPL")) == 4
+
+    news = lambda title, url: {"ticker": "AAPL", "title": title, "author": "a", "source": "s", "date": "2024-03-01", "url": url, "sentiment": None}
+    cache.set_company_news("AAPL", [news("a", "https://x/1"), news("b", "https://x/2"), news("b", "https://x/3"), news("a", "https://x/1")])
+    assert len(cache.get_company_news("AAPL")) == 3
+
+
+def test_range_reads_compare_days_not_strings(tmp_path):
+    """Timestamped dates fall on their day, and trades are ordered by when they happened."""
+    cache = Cache(store=SQLiteStore(str(tmp_path / "cache.sqlite3")))
+    news = {"ticker": "AAPL", "title": "t", "author": "a", "source": "s", "date": "2024-01-09T15:30:00Z", "url": "", "sentiment": None}
+    cache.set_company_news("AAPL", [news])
+    assert cache.get_company_news("AAPL").between("2024-01-09", "2024-01-09") == [news]
+
+    trade = lambda filed, traded: {"ticker": "AAPL", "filing_date": filed, "transaction_date": traded}
+    cache.set_insider_trades("AAPL", [trade("2024-02-01", "2024-01-05"), trade("2024-01-20", "2024-01-18"), trade("2024-01-10", None)])
+    assert [t["filing_date"] for t in cache.get_insider_trades("AAPL").between("2024-01-01", "2024-01-31", newest_first=True)] == ["2024-01-20", "2024-01-10", "2024-02-01"]
@@ -0,0 +1,79 @@
+"""
+Test module for the pooled, retrying HTTP client.
+These tests run against a local keep-alive HTTP server.
+"""
+
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools import http_client
+from src.tools.http_client import HTTPClient
+
+
+@pytest.fixture
+def server():
+    """A local server answering each request with the next scripted (status, headers), then 200."""
+    script = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            status, headers = script.pop(0) if script else (200, {})
+            body = b"{}"
+            self.send_response(status)
+            for name, value in {**headers, "Content-Length": str(len(body))}.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/", script
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_retries_throttled_and_failed_requests(server, monkeypatch):
+    """429 and 5xx are retried, honouring Retry-After; other statuses are returned as is."""
+    url, script = server
+    waits = []
+    monkeypatch.setattr(http_client.time, "sleep", waits.append)
+    client = HTTPClient(max_retries=3, backoff_base=0.0)
+
+    script.extend([(429, {"Retry-After": "7"}), (503, {})])
+    assert client.get(url).status_code == 200
+    assert waits == [7.0, 0.0]
+
+    script.append((404, {}))
+    assert client.get(url).status_code == 404
+
+    # Retries are bounded; the last response is returned
+    script.extend([(500, {})] * 4)
+    assert client.get(url).status_code == 500
+
+    stats = client.stats()
+    assert stats["requests"] == 8 and stats["retries"] == 5 and stats["errors"] == 0
+    # Every request went over one kept-alive connection
+    assert stats["connections_opened"] == 1 and stats["connections_reused"] == 7
+
+
+def test_retry_after_is_capped(server, monkeypatch):
+    url, script = server
+    waits = []
+    monkeypatch.setattr(http_client.time, "sleep", waits.append)
+    client = HTTPClient(max_retries=1, backoff_base=0.0, backoff_max=5.0)
+
+    script.append((429, {"Retry-After": "600"}))
+    assert client.get(url).status_code == 200
+    assert waits == [5.0]
@@ -0,0 +1,63 @@
+"""
+Test module for index prices served from a cached full history.
+These tests use a fake download and never touch the network.
+"""
+
+import sys
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.cache import Cache
+from src.data.frames import normalize_frame
+from src.tools import akshare_api
+from src.tools.akshare_api import INDEX_PRICE_COLUMNS, PRICE_DTYPES, get_index_price_series
+
+TODAY = date.today()
+DAYS = [(TODAY - timedelta(days=offset)).isoformat() for offset in (3, 2, 1, 0)]
+
+
+def history(closes: list[float]) -> pd.DataFrame:
+    """A full-history download as akshare returns it, one row per day in DAYS."""
+    df = pd.DataFrame({"date": DAYS[:len(closes)], "open": closes, "close": closes, "high": closes, "low": closes, "volume": [100] * len(closes)})
+    return normalize_frame(df, INDEX_PRICE_COLUMNS, PRICE_DTYPES)
+
+
+def test_index_refresh_appends_trailing_days_and_replaces_today(monkeypatch):
+    cache = Cache(store=None)
+    monkeypatch.setattr(akshare_api, "_cache", cache)
+    monkeypatch.setattr(akshare_api, "_index_refreshed_at", {})
+    monkeypatch.setenv("INDEX_REFRESH_SECONDS", "3600")
+    saved = []
+    set_prices = cache.set_prices
+    monkeypatch.setattr(cache, "set_prices", lambda ticker, rows: (saved.append([row["time"] for row in rows]), set_prices(ticker, rows)))
+
+    downloads = []
+
+    def download(closes):
+        def fetch():
+            downloads.append(closes)
+            return history(closes)
+        return fetch
+
+    # First call downloads everything up to yesterday
+    series = get_index_price_series("^GSPC", DAYS[0], DAYS[-1], download([1.0, 2.0, 3.0]))
+    assert series.close.tolist() == [1.0, 2.0, 3.0]
+
+    # Today isn't covered yet, but the throttle holds the next download back
+    get_index_price_series("^GSPC", DAYS[0], DAYS[-1], download([1.0, 2.0, 3.0, 4.0]))
+    assert len(downloads) == 1
+
+    # Once the throttle lapses only rows after the cached history are converted and appended
+    monkeypatch.setenv("INDEX_REFRESH_SECONDS", "0")
+    series = get_index_price_series("^GSPC", DAYS[0], DAYS[-1], download([9.0, 9.0, 9.0, 4.0]))
+    assert saved[-1] == [DAYS[-1]] and series.close.tolist() == [1.0, 2.0, 3.0, 4.0]
+
+    # Today's bar may have been cached mid-session, so a later download replaces it; settled days are kept
+    series = get_index_price_series("^GSPC", DAYS[0], DAYS[-1], download([9.0, 9.0, 9.0, 5.0]))
+    assert saved[-1] == [DAYS[-1]] and series.close.tolist() == [1.0, 2.0, 3.0, 5.0]
+    assert len(downloads) == 3
@@ -0,0 +1,63 @@
+"""
+Test module for the LLM response cache.
+The LLM runnable is replaced with a fake, so no provider is called.
+"""
+
+import sys
+import os
+
+from pydantic import BaseModel
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm import cache as llm_cache_module
+from src.llm.cache import LLMCache
+from src.utils import llm
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+
+
+class FakeRunnable:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_identical_prompts_replay_from_disk(tmp_path, monkeypatch):
+    """A second identical call is served from the cache; a different prompt or opting out calls the model."""
+    runnable = FakeRunnable([Signal(signal="bullish", confidence=80.0), Signal(signal="bearish", confidence=60.0), Signal(signal="neutral", confidence=50.0)])
+    monkeypatch.setattr(llm, "get_llm_runnable", lambda *args: runnable)
+    monkeypatch.setattr(llm_cache_module, "_llm_cache", LLMCache(str(tmp_path / "llm_cache.sqlite3")))
+
+    first = llm.call_llm("analyze AAPL", "gpt-4o", "OpenAI", Signal)
+    again = llm.call_llm("analyze AAPL", "gpt-4o", "OpenAI", Signal)
+    assert again == first and runnable.calls == 1
+
+    assert llm.call_llm("analyze MSFT", "gpt-4o", "OpenAI", Signal).signal == "bearish"
+    assert llm.call_llm("analyze AAPL", "gpt-4o", "OpenAI", Signal, use_cache=False).signal == "neutral"
+    assert runnable.calls == 3
+
+    stats = llm_cache_module.get_llm_cache().stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_failed_calls_are_not_cached(tmp_path, monkeypatch):
+    """Defaults returned after errors are never stored, so the next run tries the model again."""
+    runnable = FakeRunnable([RuntimeError("rate limited"), Signal(signal="bullish", confidence=90.0)])
+    monkeypatch.setattr(llm, "get_llm_runnable", lambda *args: runnable)
+    monkeypatch.setattr(llm_cache_module, "_llm_cache", LLMCache(str(tmp_path / "llm_cache.sqlite3")))
+
+    default = llm.call_llm("analyze AAPL", "gpt-4o", "OpenAI", Signal, max_retries=1)
+    assert default.confidence == 0.0
+    assert llm.call_llm("analyze AAPL", "gpt-4o", "OpenAI", Signal, max_retries=1).signal == "bullish"
@@ -0,0 +1,92 @@
+"""
+Test module for batched and packed LLM calls and the per-provider concurrency limit.
+The LLM runnable is replaced with a fake, so no provider is called.
+"""
+
+import sys
+import os
+import asyncio
+
+from pydantic import BaseModel
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm import limits
+from src.llm.limits import ProviderLimits
+from src.utils import llm
+from langchain_core.prompts import ChatPromptTemplate
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+
+
+class SlowRunnable:
+    """Answers with the prompt's text after a short delay, recording how many calls overlap."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        if prompt == "fail":
+            raise RuntimeError("provider error")
+        return Signal(signal=prompt, confidence=50.0)
+
+
+def test_batch_runs_concurrently_within_provider_limit(monkeypatch):
+    """Responses come back in prompt order, at most max_concurrency requests are in flight, and failures fall back to defaults."""
+    runnable = SlowRunnable()
+    monkeypatch.setattr(llm, "get_llm_runnable", lambda *args: runnable)
+    monkeypatch.setattr(limits, "_limits", {"OpenAI": ProviderLimits(max_concurrency=3, rpm=0, tpm=0)})
+
+    prompts = ["AAPL", "MSFT", "fail", "NVDA", "TSLA", "AMZN"]
+    results = llm.call_llm_batch(prompts, "gpt-4o", "OpenAI", Signal, max_retries=1, use_cache=False)
+
+    assert [result.signal for result in results if result.confidence] == ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]
+    assert results[2].confidence == 0.0
+    assert runnable.peak == 3
+
+
+class PackedRunnable:
+    """Answers packed prompts from a fixed dict (or an invalid payload) and per-ticker prompts individually."""
+
+    def __init__(self, pydantic_model, packed_answer):
+        self.pydantic_model = pydantic_model
+        self.packed_answer = packed_answer
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.pydantic_model is Signal:
+            return Signal(signal="single", confidence=40.0)
+        return self.pydantic_model.model_validate(self.packed_answer)
+
+
+def test_packed_prompts_share_one_call_and_fall_back_per_ticker(monkeypatch):
+    """A pack is answered in one request; a pack whose answer fails validation is re-asked ticker by ticker."""
+    template = ChatPromptTemplate.from_messages([("system", "You are an investor."), ("human", "Analyze {ticker}")])
+    prompts = {ticker: template.invoke({"ticker": ticker}) for ticker in ["600519", "000001.SZ", "AAPL"]}
+    runnables = {}
+
+    def fake_runnable(model_name, model_provider, pydantic_model):
+        answer = {"600519": {"signal": "bullish", "confidence": 80.0}, "000001.SZ": {"signal": "bearish", "confidence": 70.0}}
+        return runnables.setdefault(pydantic_model, PackedRunnable(pydantic_model, answer))
+
+    monkeypatch.setattr(llm, "get_llm_runnable", fake_runnable)
+    results = llm.call_llm_packed(prompts, "gpt-4o", "OpenAI", Signal, use_cache=False, pack_size=2)
+
+    # The first pack is answered in one call with the system message sent once
+    assert (results["600519"].signal, results["000001.SZ"].signal) == ("bullish", "bearish")
+    packed = next(runnable for model, runnable in runnables.items() if model is not Signal and len(model.model_fields) == 2)
+    assert len(packed.prompts) == 1 and [message.type for message in packed.prompts[0]] == ["system", "human"]
+
+    # The last pack (AAPL) gets no valid answer and falls back to a per-ticker call
+    assert results["AAPL"].signal == "single" and len(runnables[Signal].prompts) == 1
+    assert list(results) == list(prompts)
@@ -0,0 +1,119 @@
+"""
+Test module for the LLM retry policy and retry metrics.
+The LLM runnable is replaced with a fake, so no provider is called.
+"""
+
+import sys
+import os
+import time
+
+from pydantic import BaseModel
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm import limits, retry
+from src.llm.limits import ProviderLimits
+from src.llm.retry import RetryPolicy, RetryStats
+from src.utils import llm
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code, headers)
+
+
+class FakeRunnable:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def ainvoke(self, prompt):
+        self.calls.append(time.monotonic())
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_errors_are_classified():
+    assert retry.classify_error(APIStatusError(429)) == retry.RATE_LIMIT
+    assert retry.classify_error(APIStatusError(503)) == retry.TRANSIENT
+    assert retry.classify_error(APIStatusError(401)) == retry.FATAL
+    assert retry.classify_error(TimeoutError()) == retry.TIMEOUT
+    assert retry.classify_error(retry.ResponseParseError("no JSON")) == retry.PARSE
+    assert retry.retry_after(APIStatusError(429, {"retry-after": "7"})) == 7.0
+    assert retry.retry_after(APIStatusError(429, {"retry-after-ms": "250"})) == 0.25
+
+
+def test_rate_limits_wait_for_retry_after_and_fatal_errors_stop(monkeypatch):
+    """A 429 is retried after the provider's Retry-After, a 401 is not retried, and both are counted per agent and model."""
+    monkeypatch.setattr(retry, "_retry_policy", RetryPolicy(timeout=5, backoff_base=0.01, backoff_max=1))
+    monkeypatch.setattr(retry, "_retry_stats", RetryStats())
+    monkeypatch.setattr(limits, "_limits", {"OpenAI": ProviderLimits(max_concurrency=2, rpm=0, tpm=0)})
+
+    runnable = FakeRunnable([APIStatusError(429, {"retry-after": "0.2"}), Signal(signal="bullish", confidence=70.0)])
+    monkeypatch.setattr(llm, "get_llm_runnable", lambda *args: runnable)
+    result = llm.call_llm("analyze AAPL", "gpt-4o", "OpenAI", Signal, agent_name="warren_buffett_agent", use_cache=False)
+    assert result.signal == "bullish"
+    assert runnable.calls[1] - runnable.calls[0] >= 0.2
+
+    runnable = FakeRunnable([APIStatusError(401), Signal(signal="bullish", confidence=70.0)])
+    monkeypatch.setattr(llm, "get_llm_runnable", lambda *args: runnable)
+    result = llm.call_llm("analyze MSFT", "gpt-4o", "OpenAI", Signal, agent_name="warren_buffett_agent", use_cache=False)
+    assert result.confidence == 0.0 and len(runnable.calls) == 1
+
+    counters = retry.get_retry_stats().stats()["warren_buffett_agent"]["gpt-4o"]
+    assert (counters["calls"], counters["attempts"], counters["retries"]) == (2, 3, 1)
+    assert (counters["rate_limit"], counters["fatal"], counters["fallbacks"]) == (1, 1, 1)
+
+
+def test_rate_limited_pack_pauses_provider_and_does_not_fan_out(monkeypatch):
+    """A 429 on a packed prompt pauses the provider and retries the pack, instead of sending one request per ticker."""
+    monkeypatch.setattr(retry, "_retry_policy", RetryPolicy(timeout=5, backoff_base=0.01, backoff_max=1))
+    monkeypatch.setattr(retry, "_retry_stats", RetryStats())
+    provider_limits = ProviderLimits(max_concurrency=2, rpm=0, tpm=0)
+    monkeypatch.setattr(limits, "_limits", {"OpenAI": provider_limits})
+    pauses = []
+    monkeypatch.setattr(provider_limits, "pause", pauses.append)
+
+    per_ticker = FakeRunnable([])
+    packed = FakeRunnable([APIStatusError(429, {"retry-after": "0.05"}), APIStatusError(429, {"retry-after": "0.05"})])
+    monkeypatch.setattr(llm, "get_llm_runnable", lambda model_name, model_provider, pydantic_model: per_ticker if pydantic_model is Signal else packed)
+
+    results = llm.call_llm_packed({"AAPL": "analyze AAPL", "MSFT": "analyze MSFT"}, "gpt-4o", "OpenAI", Signal, agent_name="warren_buffett_agent", max_retries=2, use_cache=False, pack_size=2)
+
+    assert len(packed.calls) == 2 and not per_ticker.calls
+    assert pauses == [0.05, 0.05]
+    assert all(result.confidence == 0.0 for result in results.values())
+    assert retry.get_retry_stats().stats()["warren_buffett_agent"]["gpt-4o"]["fallbacks"] == 2
+
+
+def test_packed_schemas_do_not_grow_runnables_without_bound(monkeypatch):
+    """Every ticker tuple gets its own packed schema, so the runnable pool is an LRU."""
+    class FakeModel:
+        def with_structured_output(self, schema, method):
+            return schema
+
+    monkeypatch.setattr(llm, "get_pooled_model", lambda model_name, model_provider: FakeModel())
+    monkeypatch.setattr(llm, "_runnables", llm.OrderedDict())
+    monkeypatch.setattr(llm, "_MAX_RUNNABLES", 8)
+
+    base = llm.get_llm_runnable("gpt-4o", "OpenAI", Signal)
+    for i in range(50):
+        llm.get_llm_runnable("gpt-4o", "OpenAI", llm._packed_model(Signal, (f"T{i}", f"U{i}")))
+        # The base schema stays warm while it keeps being used
+        assert llm.get_llm_runnable("gpt-4o", "OpenAI", Signal) is base
+    assert len(llm._runnables) == 8
@@ -0,0 +1,75 @@
+"""
+Test module for single-flight request coalescing.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import singleflight
+from src.utils.singleflight import SingleFlight, coalesce
+
+
+def test_concurrent_calls_share_one_fetch():
+    """Threads asking for the same key while a fetch is in flight wait for it instead of fetching again."""
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["result"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 5
+    assert flight.stats()["key"] == {"hits": 5, "coalesced": 4}
+
+    # Once the fetch has finished, the next call runs again
+    flight.do("key", fetch)
+    assert len(calls) == 2
+
+
+def test_async_calls_share_one_fetch_and_errors():
+    """Coroutines coalesce too, and an error is raised to every waiter."""
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_coalesced_function_stats_are_per_function(monkeypatch):
+    """Counters for a decorated function don't grow with the number of distinct arguments."""
+    monkeypatch.setattr(singleflight, "_singleflight", SingleFlight())
+
+    @coalesce
+    def fetch(ticker: str, end_date: str):
+        return [ticker, end_date]
+
+    for day in range(1, 11):
+        fetch("AAPL", f"2024-01-{day:02d}")
+
+    stats = singleflight.get_singleflight().stats()
+    assert list(stats.values()) == [{"hits": 10, "coalesced": 0}]
+    assert next(iter(stats)).endswith("fetch")
@@ -0,0 +1,66 @@
+"""
+Test module for offline snapshot mode.
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tools.api import get_company_news, get_financial_metrics, get_market_cap, get_price_series, search_line_items
+
+
+def write_snapshot(directory, file_format: str):
+    frames = {
+        "prices": pd.DataFrame({
+            "ticker": ["AAPL", "AAPL", "AAPL", "MSFT"],
+            "time": ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-03"],
+            "open": [1.0, 2.0, 3.0, 9.0], "close": [1.0, 2.0, 3.0, 9.0], "high": [1.0, 2.0, 3.0, 9.0], "low": [1.0, 2.0, 3.0, 9.0],
+            "volume": [10, 20, 30, 90],
+        }),
+        "line_items": pd.DataFrame({
+            "ticker": ["AAPL", "AAPL", "AAPL"],
+            "report_period": ["2022-12-31", "2023-12-31", "2024-12-31"],
+            "period": ["annual"] * 3,
+            "currency": ["USD"] * 3,
+            "revenue": [1.0, 2.0, 3.0],
+            "net_income": [0.1, 0.2, 0.3],
+        }),
+        "company_news": pd.DataFrame({
+            "ticker": ["AAPL", "AAPL"], "title": ["a", "b"], "author": ["x", "x"], "source": ["s", "s"],
+            "date": ["2024-01-02", "2024-02-02"], "url": ["", ""], "sentiment": ["positive", None],
+        }),
+    }
+    for dataset, df in frames.items():
+        if file_format == "parquet":
+            df.to_parquet(directory / f"{dataset}.parquet", row_group_size=2)
+        else:
+            df.to_csv(directory / f"{dataset}.csv", index=False)
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_snapshot_mode_reads_local_files(tmp_path, monkeypatch, file_format):
+    """With DATA_SNAPSHOT_DIR set, the data functions filter local files by ticker and date."""
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    write_snapshot(tmp_path, file_format)
+    monkeypatch.setenv("DATA_SNAPSHOT_DIR", str(tmp_path))
+
+    series = get_price_series("AAPL", "2024-01-03", "2024-01-10")
+    assert series.time_strings() == ["2024-01-03", "2024-01-04"]
+    assert series.close.tolist() == [2.0, 3.0]
+
+    items = search_line_items("AAPL", ["revenue"], "2024-06-30", period="annual", limit=1)
+    assert [(item.report_period, item.revenue) for item in items] == [("2023-12-31", 2.0)]
+    assert not hasattr(items[0], "net_income")
+
+    news = get_company_news("AAPL", "2024-01-31", start_date="2024-01-01")
+    assert [n.title for n in news] == ["a"]
+
+    # Datasets without a snapshot file return nothing rather than going to the network
+    assert get_financial_metrics("AAPL", "2024-06-30") == []
+    assert get_market_cap("AAPL", "2024-06-30") is None